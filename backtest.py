@@ -0,0 +1,108 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: backtest.py
+# DESCRIPTION: Offline, vectorized replay of the apply_strategy state machine
+#              over a historical price and prediction series.
+###############################################################################
+import numpy as np
+
+from config import config_params
+
+
+ACTIONS = np.array(['No Action', 'Buy', 'Sell'], dtype=object)
+NO_ACTION, BUY, SELL = 0, 1, 2
+
+
+# FUNCTIONS
+def simulate_actions(signal, initial_action='No Action'):
+    """ Replays the apply_strategy transitions for a boolean "in trade zone" series
+    (median > threshold) without a per bar loop. Returns action codes (NO_ACTION,
+    BUY, SELL).
+
+    The state machine only has two states that matter: holding (the last action was
+    a Buy) or flat (No Action or Sell). Holding always sells on the next bar; flat
+    buys when in the trade zone. So within a run of in zone bars the actions
+    alternate Buy, Sell, Buy, ... from the first bar of the run, and the first bar
+    after a run sells if the run had an odd length. A starting position of 'Buy' is
+    handled as an extra in zone bar in front of the series. """
+
+    signal = np.asarray(signal, dtype=bool)
+    if initial_action == 'Buy':
+        signal = np.concatenate([[True], signal])
+
+    index = np.arange(len(signal))
+    run_starts = signal & ~np.concatenate([[False], signal[:-1]])
+    run_start = np.maximum.accumulate(np.where(run_starts, index, 0))
+    in_run_buy = signal & ((index - run_start) % 2 == 0)    # even position within the run
+
+    previous_buy = np.concatenate([[False], in_run_buy[:-1]])
+    actions = np.where(signal, np.where(in_run_buy, BUY, SELL), np.where(previous_buy, SELL, NO_ACTION))
+
+    return actions[1:] if initial_action == 'Buy' else actions
+
+
+def backtest_arrays(price, median, threshold=None, bet=None, initial_action='No Action', initial_btc=0.0, fee_rate=0.0):
+    """ Array version of the backtest. Every Buy spends "bet" USD at that bar's price
+    and the following Sell sells all of the BTC bought, like the live strategy.
+    "fee_rate" is charged on the USD value of every fill. Returns a dict of arrays:
+    action (codes), usd_received, btc_received, trade_net_profit and
+    running_trade_net_profit. """
+
+    threshold = config_params['threshold'] if threshold is None else threshold
+    bet = config_params['bet'] if bet is None else bet
+    price = np.asarray(price, dtype=np.float64)
+    median = np.asarray(median, dtype=np.float64)
+    if price.shape != median.shape:
+        raise ValueError('price and median must have the same length')
+
+    actions = simulate_actions(median > threshold, initial_action)
+    is_buy = actions == BUY
+    is_sell = actions == SELL
+
+    btc_received = np.where(is_buy, bet * (1 - fee_rate) / price, 0.0)
+    position = np.concatenate([[initial_btc], btc_received[:-1]])    # every Sell closes the position opened on the bar before
+    usd_received = np.where(is_sell, position * price * (1 - fee_rate), 0.0)
+    trade_net_profit = np.where(is_sell, usd_received - bet, 0.0)
+
+    return {
+        'action': actions,
+        'usd_received': usd_received,
+        'btc_received': btc_received,
+        'trade_net_profit': trade_net_profit,
+        'running_trade_net_profit': np.cumsum(trade_net_profit),
+    }
+
+
+def backtest(price_df, median, threshold=None, bet=None, initial_action='No Action', initial_btc=0.0, fee_rate=0.0, price_label='Close'):
+    """ Runs the backtest over a price data frame and a median prediction series (one
+    value per row). Returns a copy of the data frame with the log file style result
+    columns: median, action, usd_received, btc_received, trade_net_profit,
+    running_trade_net_profit and trade_win_or_loss. """
+
+    results = backtest_arrays(price_df[price_label].to_numpy(), median, threshold, bet, initial_action, initial_btc, fee_rate)
+
+    df = price_df.copy()
+    df['median'] = np.asarray(median, dtype=np.float64)
+    df['action'] = ACTIONS[results['action']]
+    for column in ['usd_received', 'btc_received', 'trade_net_profit', 'running_trade_net_profit']:
+        df[column] = results[column]
+    is_sell = results['action'] == SELL
+    df['trade_win_or_loss'] = np.where(is_sell & (results['trade_net_profit'] > 0), 'Win', np.where(is_sell & (results['trade_net_profit'] < 0), 'Loss', None))
+    return df
+
+
+def summarize_backtest(results):
+    """ Headline numbers for a backtest_arrays result. """
+
+    sells = results['action'] == SELL
+    profits = results['trade_net_profit'][sells]
+    running = results['running_trade_net_profit']
+    return {
+        'num_trades': int(sells.sum()),
+        'wins': int((profits > 0).sum()),
+        'losses': int((profits < 0).sum()),
+        'net_profit': float(running[-1]) if len(running) else 0.0,
+        'max_drawdown': float(np.max(np.maximum.accumulate(running) - running)) if len(running) else 0.0,
+    }
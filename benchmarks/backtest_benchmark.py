@@ -0,0 +1,78 @@
+###############################################################################
+# FILENAME: backtest_benchmark.py
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Checks the vectorized backtest against a bar by bar replay of the
+#              apply_strategy state machine and times it on years of hourly bars.
+#              Run from the repo root with: python -m benchmarks.backtest_benchmark
+###############################################################################
+import time
+import numpy as np
+
+import backtest
+from benchmarks.indicators_benchmark import generate_ohlcv
+
+
+BENCHMARK_SIZES = [8760, 87600, 1000000]    # one year, ten years of hourly bars, and a stress size
+CHECK_SIZE = 20000
+THRESHOLD = 0.5
+BET = 10000
+TOLERANCE = 1e-9
+
+
+# REFERENCE IMPLEMENTATION
+def reference_backtest(price, median, threshold, bet, initial_action='No Action', initial_btc=0.0):
+    """ Bar by bar port of the apply_strategy transitions and fills. """
+
+    trade_status = initial_action
+    btc_held = initial_btc
+    actions, profits = [], []
+    for i in range(len(price)):
+        if median[i] > threshold:
+            action = {'No Action': 'Buy', 'Buy': 'Sell', 'Sell': 'Buy'}[trade_status]
+        else:
+            action = {'No Action': 'No Action', 'Buy': 'Sell', 'Sell': 'No Action'}[trade_status]
+
+        profit = 0.0
+        if action == 'Buy':
+            btc_held = bet / price[i]
+        elif action == 'Sell':
+            profit = btc_held * price[i] - bet
+            btc_held = 0.0
+        actions.append(action)
+        profits.append(profit)
+        trade_status = action
+    return np.array(actions, dtype=object), np.array(profits)
+
+
+# CHECKS
+def check_against_reference():
+    price = generate_ohlcv(CHECK_SIZE)['Close'].to_numpy()
+    rng = np.random.default_rng(7)
+    for initial_action in ['No Action', 'Buy', 'Sell']:
+        median = rng.uniform(0, 1, CHECK_SIZE)
+        expected_actions, expected_profits = reference_backtest(price, median, THRESHOLD, BET, initial_action, 0.3)
+        results = backtest.backtest_arrays(price, median, THRESHOLD, BET, initial_action, 0.3)
+        if not np.array_equal(backtest.ACTIONS[results['action']], expected_actions):
+            raise AssertionError('actions differ from reference (initial action ' + initial_action + ')')
+        error = np.max(np.abs(results['trade_net_profit'] - expected_profits))
+        if error > TOLERANCE:
+            raise AssertionError('trade_net_profit differs from reference by ' + str(error))
+        print('backtest matches reference from {} (max abs error {:.2e})'.format(initial_action, error))
+
+
+def run_benchmarks():
+    for num_bars in BENCHMARK_SIZES:
+        price = generate_ohlcv(num_bars)['Close'].to_numpy()
+        median = np.random.default_rng(0).uniform(0, 1, num_bars)
+        start = time.perf_counter()
+        results = backtest.backtest_arrays(price, median, THRESHOLD, BET)
+        elapsed = time.perf_counter() - start
+        print('backtest on {} bars: {:.4f}s ({:,.0f} bars/s) {}'.format(num_bars, elapsed, num_bars / elapsed, backtest.summarize_backtest(results)))
+
+
+# ENTRY POINT
+if __name__ == '__main__':
+    check_against_reference()
+    run_benchmarks()
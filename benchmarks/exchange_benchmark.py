@@ -0,0 +1,157 @@
+###############################################################################
+# FILENAME: exchange_benchmark.py
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Drives the FalconX order path and apply_strategy against the local
+#              exchange emulator and reports end-to-end latency percentiles.
+#              Run from the repo root with: python -m benchmarks.exchange_benchmark
+###############################################################################
+import io
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+
+from config import config_params
+from exchanges.emulator import ExchangeEmulator
+
+
+NUM_ORDERS = 200    # market orders per scenario
+NUM_STRATEGY_RUNS = 100    # apply_strategy calls per scenario
+NUM_MARKET_STATE_RUNS = 100    # pre-trade data gathers per scenario
+NUM_ROUTED_ORDERS = 100    # best execution router orders per scenario
+SCENARIOS = {    # name: emulator settings
+    'no latency': {},
+    'lognormal 20ms': {'latency': {'kind': 'lognormal', 'median': 0.02, 'sigma': 0.5}},
+    'slow orders': {'latency': {'*': {'kind': 'constant', 'value': 0.005}, 'falconx:order': {'kind': 'uniform', 'low': 0.1, 'high': 0.3}}},
+    '5% errors': {'latency': {'kind': 'constant', 'value': 0.005}, 'error_rate': 0.05},
+    'rate limited': {'rate_limits': {'falconx': (50, 10)}},
+    'slow coinbase': {'latency': {'*': {'kind': 'constant', 'value': 0.005}, 'coinbase:oracle': {'kind': 'constant', 'value': 3.0}}},    # beyond the router's quote deadline
+}
+LOG_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Unix', 'Time'] + list(config_params['h2o_model_dict']) + ['mean', 'median', 'action', 'falconx_usd_balance', 'falconx_btc_balance', 'falconx_btc_price_quote', 'usd_received', 'btc_received', 'trade_net_profit', 'running_trade_net_profit', 'trade_win_or_loss']
+
+
+# HELPERS
+def percentiles(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return 'p50 {:.1f}ms  p99 {:.1f}ms  mean {:.1f}ms  max {:.1f}ms'.format(np.percentile(latencies, 50), np.percentile(latencies, 99), latencies.mean(), latencies.max())
+
+
+def timed(function, *args):
+    """ Calls "function" with stdout silenced. Returns (latency, result, exception). """
+
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = function(*args)
+        return time.perf_counter() - start, result, None
+    except Exception as e:
+        return time.perf_counter() - start, None, e
+
+
+def point_exchanges_at(emulator):
+    """ Sends the exchange modules to the emulator and returns a FalconX signer with
+    the emulator's keys. Orders are only placed in production mode, which is safe
+    here because every request goes to the local server. """
+
+    import exchanges.falconx
+    import exchanges.coinbase
+    config_params['in_production'] = True
+    exchanges.falconx.api_url = emulator.falconx_url
+    exchanges.coinbase.api_url = emulator.coinbase_url
+    return exchanges.falconx.FXRfqAuth(*emulator.credentials['falconx'])
+
+
+# BENCHMARKS
+def benchmark_orders(auth):
+    import exchanges.falconx
+    latencies, failures = [], 0
+    for i in range(NUM_ORDERS):
+        if i % 2 == 0:
+            latency, result, error = timed(exchanges.falconx.place_falconx_market_order, auth, 1000, ['BTC', 'USD'], 'buy')
+        else:
+            latency, result, error = timed(exchanges.falconx.place_falconx_market_order, auth, None, ['BTC', 'USD'], 'sell')
+        latencies.append(latency)
+        failures += error is not None or not isinstance(result, dict) or result.get('status') != 'success'
+    return latencies, failures
+
+
+def benchmark_market_state(auth):
+    """ Pre-trade data (quote, balances, pairs) fetched one after the other versus
+    concurrently with get_falconx_market_state. """
+
+    import exchanges.falconx
+
+    def sequential():
+        exchanges.falconx.get_falconx_btc_price_quote(auth)
+        exchanges.falconx.get_all_falconx_accounts(auth)
+        exchanges.falconx.get_falconx_token_pairs(auth)
+
+    sequential_latencies = [timed(sequential)[0] for _ in range(NUM_MARKET_STATE_RUNS)]
+    concurrent_latencies = [timed(exchanges.falconx.get_falconx_market_state, auth, None, True)[0] for _ in range(NUM_MARKET_STATE_RUNS)]
+    return sequential_latencies, concurrent_latencies
+
+
+def benchmark_router(emulator, auth):
+    """ Alternating buys and sells through the best execution router over both venues.
+    Returns the order latencies, the failures and the orders routed per venue. """
+
+    from exchanges import router
+    import exchanges.coinbase
+    coinbase_venue = router.CoinbaseVenue(exchanges.coinbase.CoinbaseExchangeAuth(*emulator.credentials['coinbase']), emulator.coinbase_account_id('USD'), emulator.coinbase_account_id('BTC'))
+    best_execution_router = router.BestExecutionRouter([router.FalconXVenue(auth), coinbase_venue])
+
+    latencies, failures, venues, position = [], 0, {}, None
+    for i in range(NUM_ROUTED_ORDERS):
+        side = 'buy' if i % 2 == 0 else 'sell'
+        if side == 'buy':
+            latency, fill, error = timed(best_execution_router.route_market_order, 'buy', 1000)
+        else:    # sell what the last buy filled, as apply_strategy does
+            latency, fill, error = timed(best_execution_router.route_market_order, 'sell', None, position)
+        latencies.append(latency)
+        failures += error is not None
+        if error is None:
+            venues[fill['venue']] = venues.get(fill['venue'], 0) + 1
+            position = fill['btc_received'] if side == 'buy' else None
+    best_execution_router.close()
+    return latencies, failures, venues
+
+
+def benchmark_strategy(auth):
+    from strategy import apply_strategy
+    price_df = pd.DataFrame([[30000.0, 30100.0, 29900.0, 30050.0, 12.0, 1600000000, '2020-09-13 12:26:40']], columns=LOG_COLUMNS[:7])
+    log_df = pd.DataFrame([[30000.0, 30100.0, 29900.0, 30050.0, 12.0, 1600000000, '2020-09-13 12:26:40'] + [0.5] * (len(config_params['h2o_model_dict']) + 2) + ['No Action', 0, 0, 0, 0, 0, 0, 0, None]], columns=LOG_COLUMNS)
+    ml_dict = dict({model_name: 0.9 for model_name in config_params['h2o_model_dict']}, mean=0.9, median=0.9)    # always in the trade zone: alternating buys and sells
+    config_params['threshold'] = 0.5
+
+    latencies, failures = [], 0
+    for _ in range(NUM_STRATEGY_RUNS):
+        latency, result, error = timed(apply_strategy, auth, price_df.copy(), log_df.tail(1).reset_index(drop=True), ml_dict)
+        latencies.append(latency)
+        if error is None:
+            log_df = result
+        failures += error is not None
+    return latencies, failures
+
+
+def run_benchmarks():
+    for name, settings in SCENARIOS.items():
+        with ExchangeEmulator(seed=0, **settings) as emulator:
+            auth = point_exchanges_at(emulator)
+            order_latencies, order_failures = benchmark_orders(auth)
+            strategy_latencies, strategy_failures = benchmark_strategy(auth)
+            sequential_latencies, concurrent_latencies = benchmark_market_state(auth)
+            router_latencies, router_failures, router_venues = benchmark_router(emulator, auth)
+            print('[{}]'.format(name))
+            print('  place_falconx_market_order: {} ({} of {} failed)'.format(percentiles(order_latencies), order_failures, NUM_ORDERS))
+            print('  market state, sequential:   {}'.format(percentiles(sequential_latencies)))
+            print('  market state, concurrent:   {}'.format(percentiles(concurrent_latencies)))
+            print('  routed orders:              {} ({} of {} failed, by venue {})'.format(percentiles(router_latencies), router_failures, NUM_ROUTED_ORDERS, router_venues))
+            print('  apply_strategy:             {} ({} of {} failed)'.format(percentiles(strategy_latencies), strategy_failures, NUM_STRATEGY_RUNS))
+            print('  responses by route/status: {}'.format(dict(sorted(emulator.stats.items()))))
+
+
+# ENTRY POINT
+if __name__ == '__main__':
+    run_benchmarks()
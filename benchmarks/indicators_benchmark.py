@@ -0,0 +1,323 @@
+###############################################################################
+# FILENAME: indicators_benchmark.py
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Golden value checks and timing / memory benchmark for the
+#              indicator library, with a stored baseline to catch regressions.
+#              Run from the repo root with: python -m benchmarks.indicators_benchmark
+#              (--help for sizes, tolerances and updating the baseline / fixtures)
+###############################################################################
+import os
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import importlib.util
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+import utils.features
+import utils.incremental
+import utils.indicators
+from config import config_params
+
+
+BENCHMARK_SIZES = [1000, 100000, 1000000, 10000000]    # number of bars per benchmark run
+EXTRA_WINDOWS = [200, 1000]    # benchmarked on top of the configured lookback periods
+GOLDEN_SIZE = 5000    # number of bars used for the golden value comparison
+TOLERANCE = 1e-9    # max relative difference allowed vs the reference output
+FIXTURE_ROWS = list(range(0, GOLDEN_SIZE, 97)) + list(range(GOLDEN_SIZE - 25, GOLDEN_SIZE))    # rows of each output kept in the golden fixture
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'indicators_golden.json')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'indicators_baseline.json')
+TIME_TOLERANCE = 0.5    # fail when a call is this much slower than the baseline (0.5 = 50%)
+MEMORY_TOLERANCE = 0.1    # fail when a call peaks this much higher than the baseline
+MIN_TIME_DIFFERENCE = 0.002    # seconds, smaller slowdowns are treated as timer noise
+TARGET_REPEAT_SECONDS = 0.2    # small inputs are repeated up to about this long, the best call counts
+
+
+# DATA
+def generate_ohlcv(num_bars, seed=42, with_time=True):
+    """ Builds a synthetic OHLCV data frame (geometric random walk) with the same
+    column layout as the price input file. The Time strings are slow to format at
+    millions of bars and can be left out when only the indicators need the frame. """
+
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, num_bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.001, num_bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.uniform(1, 100, num_bars)
+    unix = 1600000000 + 300 * np.arange(num_bars)
+
+    df = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume, 'Unix': unix})
+    if with_time:
+        df['Time'] = pd.to_datetime(df['Unix'], unit='s').dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+# REFERENCE IMPLEMENTATIONS
+def reference_rsi(df, rolling_window):
+    """ Row by row port of the original loop based rsi, used as the golden reference. """
+
+    close = df['Close'].to_list()
+    gain = [np.nan] + [max(close[i] - close[i - 1], 0) for i in range(1, len(close))]
+    loss = [np.nan] + [abs(min(close[i] - close[i - 1], 0)) for i in range(1, len(close))]
+
+    avg_gain = [np.nan] * len(close)
+    avg_loss = [np.nan] * len(close)
+    if len(close) > rolling_window:
+        avg_gain[rolling_window] = sum(gain[1:rolling_window + 1]) / rolling_window
+        avg_loss[rolling_window] = sum(loss[1:rolling_window + 1]) / rolling_window
+    for i in range(rolling_window + 1, len(close)):
+        avg_gain[i] = (avg_gain[i - 1] * (rolling_window - 1) + gain[i]) / rolling_window
+        avg_loss[i] = (avg_loss[i - 1] * (rolling_window - 1) + loss[i]) / rolling_window
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.array(avg_gain) / np.array(avg_loss)
+        return 100 - (100 / (1 + rs))
+
+
+def reference_zlema(df, rolling_window):
+    """ Row by row port of the original loop based zlema, used as the golden reference. """
+
+    close = df['Close'].to_list()
+    lag = int(math.floor((rolling_window - 1) / 2))
+    smoothing_factor = 2 / (rolling_window + 1)
+
+    output = [np.nan] * len(close)
+    output[lag - 1] = close[lag - 1]
+    for i in range(lag, len(close)):
+        output[i] = ((1 - smoothing_factor) * output[i - 1]) + smoothing_factor * (close[i] + (close[i] - close[i - lag]))
+
+    return np.array(output)
+
+
+def reference_cci(df, rolling_window):
+    """ The original shifted-column cci, used as the golden reference. """
+
+    typical_price = (df['High'] + df['Low'] + df['Close']) / 3
+    typical_price_sma = typical_price.rolling(rolling_window).mean()
+    mean_deviation = 0
+    for x in range(0, rolling_window):
+        mean_deviation = mean_deviation + abs(typical_price_sma - typical_price.shift(periods=x))
+    return ((typical_price - typical_price_sma) / (0.015 * (mean_deviation / rolling_window))).to_numpy()
+
+
+INDICATOR_CALLS = {    # every public function of an indicators module (utils/indicators.py or a reference copy) on the standard OHLCV columns
+    'bollinger_band': lambda indicators, df, n: indicators.bollinger_band(df, 'Close', n, config_params['standard_deviation']),
+    'roc': lambda indicators, df, n: indicators.roc(df, 'Close', n),
+    'sma': lambda indicators, df, n: indicators.sma(df, 'Close', n),
+    'zlema': lambda indicators, df, n: indicators.zlema(df, 'Close', n),
+    'momentum': lambda indicators, df, n: indicators.momentum(df, 'Close', n),
+    'cci': lambda indicators, df, n: indicators.cci(df, 'High', 'Low', 'Close', n),
+    'rsi': lambda indicators, df, n: indicators.rsi(df, 'Close', n),
+    'money_flow_index': lambda indicators, df, n: indicators.money_flow_index(df, 'Close', 'High', 'Low', 'Volume', n),
+    'chande_momentum_oscillator': lambda indicators, df, n: indicators.chande_momentum_oscillator(df, 'Close', n),
+    'annualized_historical_volatility': lambda indicators, df, n: indicators.annualized_historical_volatility(df, 'Close', n),
+    'garman_klass_volatility': lambda indicators, df, n: indicators.garman_klass_volatility(df, 'Open', 'High', 'Low', 'Close', n),
+    'vwap': lambda indicators, df, n: indicators.vwap(df, 'Close', 'High', 'Low', 'Volume', n),
+}
+
+
+def indicator_output(name, df, rolling_window, indicators=utils.indicators):
+    """ The column an indicators.py function appends, as a float64 array. """
+
+    return INDICATOR_CALLS[name](indicators, df, rolling_window)[utils.features.column_name(name, rolling_window)].to_numpy(dtype=np.float64)
+
+
+def load_reference_indicators(path):
+    """ Imports a standalone copy of indicators.py (e.g. the original loop based
+    version, exported with: git show <commit>:utils/indicators.py > PATH) to
+    generate the golden fixtures from. """
+
+    spec = importlib.util.spec_from_file_location('reference_indicators', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+REFERENCES = {    # optimized indicator call and reference implementation
+    'rsi': (lambda df, n: utils.indicators.rsi(df, 'Close', n)['X' + str(n) + '._RSI'], reference_rsi),
+    'zlema': (lambda df, n: utils.indicators.zlema(df, 'Close', n)['X' + str(n) + '.__ZLEMA'], reference_zlema),
+    'cci': (lambda df, n: utils.indicators.cci(df, 'High', 'Low', 'Close', n)['X' + str(n) + '.__CCI'], reference_cci),
+}
+
+
+# CHECKS
+def check_golden_values():
+    """ Compares each optimized indicator against its reference implementation. """
+
+    df = generate_ohlcv(GOLDEN_SIZE)
+    for name, (function, reference) in REFERENCES.items():
+        for rolling_window in config_params['lookback_periods']:
+            expected = reference(df, rolling_window)
+            actual = function(df, rolling_window).to_numpy(dtype=np.float64)
+            if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+                raise AssertionError('{}({}) NaN layout differs from reference'.format(name, rolling_window))
+            error = np.nanmax(np.abs(expected - actual) / np.maximum(np.abs(expected), 1))    # relative, prices and oscillators differ in scale
+            if error > TOLERANCE:
+                raise AssertionError('{}({}) differs from reference by {}'.format(name, rolling_window, error))
+            print('{}({}) matches reference (max rel error {:.2e})'.format(name, rolling_window, error))
+
+
+def check_incremental_consistency():
+    """ Compares the bar by bar incremental indicators against the batch feature engine. """
+
+    df = generate_ohlcv(GOLDEN_SIZE)
+    errors = utils.incremental.compare_with_batch(utils.features.ohlcv_arrays(df), config_params['lookback_periods'], config_params['indicator_list'], config_params['standard_deviation'])
+    for column, error in errors.items():
+        if error > TOLERANCE:
+            raise AssertionError('incremental {} differs from batch by {}'.format(column, error))
+    print('incremental indicators match batch ({} columns, max rel error {:.2e})'.format(len(errors), max(errors.values())))
+
+
+def max_relative_error(expected, actual):
+    """ Largest difference relative to max(|expected|, 1), so prices and oscillators
+    of very different scale share one tolerance. NaN layouts must match exactly. """
+
+    expected, actual = np.asarray(expected, dtype=np.float64), np.asarray(actual, dtype=np.float64)
+    if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return math.inf
+    if np.all(np.isnan(expected)):
+        return 0.0
+    return float(np.nanmax(np.abs(expected - actual) / np.maximum(np.abs(expected), 1)))
+
+
+def write_golden_fixtures(path=FIXTURE_PATH, reference_path=None):
+    """ Stores the output of every indicator at every lookback period (at the
+    FIXTURE_ROWS of a GOLDEN_SIZE bar series) as the golden values later runs must
+    match. The values come from the indicators.py at "reference_path" (the
+    reference the optimized code is held to) or, when None, from the current code
+    after a deliberate change of results. """
+
+    indicators = utils.indicators if reference_path is None else load_reference_indicators(reference_path)
+    df = generate_ohlcv(GOLDEN_SIZE)
+    fixtures = {'num_bars': GOLDEN_SIZE, 'rows': FIXTURE_ROWS, 'source': 'utils/indicators.py' if reference_path is None else os.path.basename(reference_path), 'outputs': {}}
+    for name in INDICATOR_CALLS:
+        for rolling_window in config_params['lookback_periods']:
+            values = indicator_output(name, df, rolling_window, indicators)[FIXTURE_ROWS]
+            fixtures['outputs'][name + '|' + str(rolling_window)] = [None if np.isnan(value) else float(value) for value in values]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(fixtures, f, indent=1)
+    print('Wrote golden fixtures for {} outputs to {}'.format(len(fixtures['outputs']), path))
+
+
+def check_golden_fixtures(path=FIXTURE_PATH):
+    """ Compares every indicator against the stored golden fixture values. """
+
+    with open(path) as f:
+        fixtures = json.load(f)
+    df = generate_ohlcv(fixtures['num_bars'])
+    for key, stored in fixtures['outputs'].items():
+        name, rolling_window = key.split('|')
+        expected = np.array([np.nan if value is None else value for value in stored])
+        error = max_relative_error(expected, indicator_output(name, df, int(rolling_window))[fixtures['rows']])
+        if error > TOLERANCE:
+            raise AssertionError('{}({}) differs from its golden fixture by {}'.format(name, rolling_window, error))
+    print('All {} indicator outputs match their golden fixtures'.format(len(fixtures['outputs'])))
+
+
+# BENCHMARKS
+def measure(function, num_bars):
+    """ Returns (best seconds per call, peak traced bytes) of "function". Small inputs
+    are repeated for about TARGET_REPEAT_SECONDS; the peak comes from a separate
+    tracemalloc run so tracing does not slow the timed calls. """
+
+    best = math.inf
+    spent = 0.0
+    while spent < TARGET_REPEAT_SECONDS or best == math.inf:
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best, spent = min(best, elapsed), spent + elapsed
+        if elapsed > TARGET_REPEAT_SECONDS:
+            break
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(sizes=None, windows=None):
+    """ Times every indicator at every benchmark size and window. Returns {key:
+    {'seconds', 'rows_per_second', 'peak_bytes'}} keyed 'name|window|bars'. """
+
+    sizes = BENCHMARK_SIZES if sizes is None else sizes
+    windows = config_params['lookback_periods'] + EXTRA_WINDOWS if windows is None else windows
+    results = {}
+    for num_bars in sizes:
+        df = generate_ohlcv(num_bars, with_time=False)
+        for name, function in INDICATOR_CALLS.items():
+            for rolling_window in windows:
+                seconds, peak = measure(lambda: function(utils.indicators, df, rolling_window), num_bars)
+                results['{}|{}|{}'.format(name, rolling_window, num_bars)] = {'seconds': seconds, 'rows_per_second': num_bars / seconds, 'peak_bytes': peak}
+                print('{}({}) on {:,} bars: {:.4f}s ({:,.0f} bars/s, peak {:.1f} MB)'.format(name, rolling_window, num_bars, seconds, num_bars / seconds, peak / 2 ** 20))
+        del df
+    return results
+
+
+def write_baseline(results, path=BASELINE_PATH):
+    baseline = {'machine': platform.platform(), 'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__, 'results': results}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+    print('Wrote baseline of {} results to {}'.format(len(results), path))
+
+
+def compare_with_baseline(results, path=BASELINE_PATH, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """ Returns a list of regressions (messages) of "results" against the stored
+    baseline. Results without a baseline entry are skipped. """
+
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline['machine'] != platform.platform():
+        print('Baseline was recorded on {}, timings may not compare.'.format(baseline['machine']))
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline['results']:
+            continue
+        stored = baseline['results'][key]
+        if result['seconds'] > stored['seconds'] * (1 + time_tolerance) and result['seconds'] - stored['seconds'] > MIN_TIME_DIFFERENCE:
+            regressions.append('{} took {:.4f}s, baseline {:.4f}s'.format(key, result['seconds'], stored['seconds']))
+        if result['peak_bytes'] > stored['peak_bytes'] * (1 + memory_tolerance):
+            regressions.append('{} peaked at {:.1f} MB, baseline {:.1f} MB'.format(key, result['peak_bytes'] / 2 ** 20, stored['peak_bytes'] / 2 ** 20))
+    return regressions
+
+
+# ENTRY POINT
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Indicator golden value checks and benchmarks.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=BENCHMARK_SIZES, help='bar counts to benchmark')
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE)
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true', help='store this run as the new baseline instead of comparing')
+    parser.add_argument('--update-fixtures', action='store_true', help='regenerate the golden fixtures from the current code (or --reference)')
+    parser.add_argument('--reference', help='indicators.py to generate the fixtures from, e.g. the baseline exported with git show <commit>:utils/indicators.py')
+    parser.add_argument('--checks-only', action='store_true', help='skip the benchmarks')
+    args = parser.parse_args()
+
+    check_golden_values()
+    check_incremental_consistency()
+    if args.update_fixtures:
+        write_golden_fixtures(reference_path=args.reference)
+    check_golden_fixtures()
+    if args.checks_only:
+        sys.exit(0)
+
+    results = run_benchmarks(args.sizes)
+    if args.update_baseline or not os.path.exists(BASELINE_PATH):
+        write_baseline(results)
+        sys.exit(0)
+    regressions = compare_with_baseline(results, time_tolerance=args.time_tolerance, memory_tolerance=args.memory_tolerance)
+    for regression in regressions:
+        print('REGRESSION: ' + regression)
+    print('{} regressions in {} results'.format(len(regressions), len(results)))
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,143 @@
+###############################################################################
+# FILENAME: mojo_benchmark.py
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Validates the NumPy MOJO scorer against H2O's own MOJO runtime on
+#              a fixture set and times batch scoring of every shipped model.
+#              Run from the repo root with: python -m benchmarks.mojo_benchmark
+#              (--update-fixtures on a machine with h2o and Java stores H2O's
+#              predictions so the check also runs where H2O is not installed)
+###############################################################################
+import os
+import re
+import sys
+import json
+import glob
+import time
+import argparse
+import importlib.util
+import numpy as np
+import pandas as pd
+
+import utils.features
+from benchmarks.indicators_benchmark import generate_ohlcv
+from scoring import numpy_mojo
+
+
+MODEL_PATHS = sorted(glob.glob('models/*.zip'))
+FIXTURE_SIZE = 5000    # rows compared against H2O
+BENCHMARK_SIZE = 1000000    # rows timed per model
+TOLERANCE = 1e-6    # max absolute difference in class 1 probability vs H2O
+FIXTURE_ROWS = list(range(0, FIXTURE_SIZE, 50)) + list(range(FIXTURE_SIZE - 50, FIXTURE_SIZE))    # rows of the H2O predictions kept in the fixture
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'mojo_h2o_predictions.json')
+SUFFIXES = {suffix: indicator for indicator, (suffix, dependencies, function) in utils.features.INDICATORS.items()}
+
+
+# FIXTURES
+def model_features(feature_names, df):
+    """ Builds the feature columns a model was trained on (X<lookback><suffix>) from an
+    OHLCV data frame with the feature engine. C1 is the row number column of the
+    training csv export; names the engine does not know are left missing. """
+
+    ohlcv = utils.features.ohlcv_arrays(df)
+    features = {}
+    for name in feature_names:
+        match = re.fullmatch(r'X(\d+)(.+)', name)
+        if name == 'C1':
+            features[name] = np.arange(len(df), dtype=np.float64)
+        elif match and match.group(2) in SUFFIXES:
+            features[name] = utils.features.calculate_indicator(SUFFIXES[match.group(2)], ohlcv, int(match.group(1)))
+        else:
+            features[name] = np.full(len(df), np.nan)
+    return pd.DataFrame(features)
+
+
+# CHECKS
+def check_against_h2o():
+    """ Compares every shipped model's NumPy predictions against H2O's. Skipped when
+    the h2o package is not installed (a Java runtime is also required). """
+
+    if importlib.util.find_spec('h2o') is None:
+        print('h2o not installed, skipping validation against the H2O MOJO runtime')
+        return
+
+    df = generate_ohlcv(FIXTURE_SIZE)
+    for model_path in MODEL_PATHS:
+        features_df = model_features(numpy_mojo.load_mojo(model_path).feature_names, df)
+        error = numpy_mojo.compare_with_h2o(model_path, features_df)
+        if error > TOLERANCE:
+            raise AssertionError('{} differs from H2O by {}'.format(model_path, error))
+        print('{} matches H2O (max abs error {:.2e})'.format(model_path, error))
+
+
+def run_benchmarks():
+    """ Times model compilation and batch scoring of every shipped model. """
+
+    df = generate_ohlcv(BENCHMARK_SIZE)
+    for model_path in MODEL_PATHS:
+        start = time.perf_counter()
+        model = numpy_mojo.load_mojo(model_path)
+        load_time = time.perf_counter() - start
+
+        features_df = model_features(model.feature_names, df)
+        start = time.perf_counter()
+        model.predict(features_df)
+        elapsed = time.perf_counter() - start
+        print('{}: compiled in {:.3f}s, scored {} rows in {:.3f}s ({:,.0f} rows/s)'.format(model_path, load_time, BENCHMARK_SIZE, elapsed, BENCHMARK_SIZE / elapsed))
+
+
+def write_h2o_fixtures(path=FIXTURE_PATH):
+    """ Stores H2O's class 1 predictions of every shipped model (at the FIXTURE_ROWS
+    of the FIXTURE_SIZE fixture set) for check_h2o_fixtures. Needs h2o and a Java
+    runtime. """
+
+    import h2o    # only writing the fixture needs H2O
+    df = generate_ohlcv(FIXTURE_SIZE)
+    fixtures = {'num_bars': FIXTURE_SIZE, 'rows': FIXTURE_ROWS, 'h2o_version': h2o.__version__, 'predictions': {}}
+    for model_path in MODEL_PATHS:
+        features_df = model_features(numpy_mojo.load_mojo(model_path).feature_names, df).iloc[FIXTURE_ROWS]
+        fixtures['predictions'][os.path.basename(model_path)] = h2o.mojo_predict_pandas(features_df, mojo_zip_path=model_path)['p1'].astype(float).tolist()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(fixtures, f, indent=1)
+    print('Wrote H2O predictions of {} models to {}'.format(len(fixtures['predictions']), path))
+
+
+def check_h2o_fixtures(path=FIXTURE_PATH):
+    """ Compares every shipped model's NumPy predictions against the stored H2O
+    predictions. Returns False when there is no fixture yet, in which case the NumPy
+    scorer is not validated and mojo_scorer should stay 'h2o'. """
+
+    if not os.path.exists(path):
+        print('No H2O prediction fixture at {}, the NumPy scorer is not validated (run with --update-fixtures where h2o is installed)'.format(path))
+        return False
+    with open(path) as f:
+        fixtures = json.load(f)
+    df = generate_ohlcv(fixtures['num_bars'])
+    for model_path in MODEL_PATHS:
+        if os.path.basename(model_path) not in fixtures['predictions']:
+            raise AssertionError('{} has no H2O predictions in {}, regenerate the fixture'.format(model_path, path))
+        model = numpy_mojo.load_mojo(model_path)
+        expected = np.array(fixtures['predictions'][os.path.basename(model_path)])
+        error = float(np.max(np.abs(expected - model.predict(model_features(model.feature_names, df).iloc[fixtures['rows']]))))
+        if error > TOLERANCE:
+            raise AssertionError('{} differs from the stored H2O predictions by {}'.format(model_path, error))
+        print('{} matches the stored H2O predictions (max abs error {:.2e})'.format(model_path, error))
+    return True
+
+
+# ENTRY POINT
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='NumPy MOJO scorer validation and benchmarks.')
+    parser.add_argument('--update-fixtures', action='store_true', help="store H2O's predictions as the fixture (needs h2o and Java)")
+    parser.add_argument('--checks-only', action='store_true', help='skip the benchmarks')
+    args = parser.parse_args()
+
+    check_against_h2o()
+    if args.update_fixtures:
+        write_h2o_fixtures()
+    check_h2o_fixtures()
+    if args.checks_only:
+        sys.exit(0)
+    run_benchmarks()
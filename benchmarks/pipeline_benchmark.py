@@ -0,0 +1,256 @@
+###############################################################################
+# FILENAME: pipeline_benchmark.py
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Runs the full run() cycle offline (exchange connect, data, indicators,
+#              models, strategy, performance upload) against local stand-ins for
+#              the credentials, cloud storage and the exchanges, and reports the
+#              stage timings of cold starts and of warm cycles separately.
+#              Run from the repo root with: python -m benchmarks.pipeline_benchmark
+#              (--help for history length, model count and iterations)
+###############################################################################
+import io
+import os
+import sys
+import json
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import numpy as np
+import pandas as pd
+
+from config import config_params
+from benchmarks.indicators_benchmark import generate_ohlcv
+
+
+HISTORY_BARS = 100000    # bars in the price file before the first cycle
+LOG_ROWS = 1000    # rows in the bot log before the first cycle
+NUM_MODELS = 5    # models in the ensemble, the shipped MOJOs are reused when there are more models than files
+NUM_PROCESSES = 3    # fresh processes, each gives one cold start
+NUM_CYCLES = 20    # run() cycles per process, all but the first are warm
+MODEL_PATHS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', '*.zip')))
+BUCKET_NAME = 'benchmark-bucket'
+OUTPUT_LOG_BLOB = 'bot/log.csv'
+
+
+# DATA
+def log_columns():
+    return ['Open', 'High', 'Low', 'Close', 'Volume', 'Unix', 'Time'] + list(config_params['h2o_model_dict']) + ['mean', 'median', 'action', 'falconx_usd_balance', 'falconx_btc_balance', 'falconx_btc_price_quote', 'usd_received', 'btc_received', 'trade_net_profit', 'running_trade_net_profit', 'trade_win_or_loss']
+
+
+def write_inputs(price_path, log_path, bars_df, log_rows):
+    """ Writes the price csv and a bot log of "log_rows" 'No Action' rows ending one
+    bar before the last price bar, with a column per configured model. """
+
+    bars_df.to_csv(price_path, index=False)
+
+    log_df = bars_df.iloc[-log_rows - 1:-1].reset_index(drop=True)    # the first cycle logs the last bar
+    for column in log_columns()[7:]:
+        log_df[column] = 0.5 if column in config_params['h2o_model_dict'] or column in ('mean', 'median') else 0
+    log_df['action'] = 'No Action'
+    log_df['trade_win_or_loss'] = None
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    log_df[log_columns()].to_csv(log_path, index=False)
+    return len(log_df)
+
+
+def append_bar(price_path, bar_df):
+    with open(price_path, 'a') as f:
+        bar_df.to_csv(f, index=False, header=False)
+
+
+def write_credentials(path, emulator):
+    """ The emulator's FalconX keys as a credentials file, under the names the
+    falconx module is pointed at. """
+
+    names = ['falconx_api_key', 'falconx_secret', 'falconx_passphrase']
+    api_key, secret, passphrase = emulator.credentials['falconx']
+    with open(path, 'w') as f:
+        json.dump(dict(zip(names, [api_key, secret, passphrase])), f)
+    return names
+
+
+def configure(workdir, price_path, log_path, num_models, journal):
+    """ Points config_params at the local files, storage stand-in, credentials and
+    models. The uploaded log is the next cycle's input log, as when the bot reads
+    back its own cloud log. With "journal" the log is kept in a trade journal and
+    uploaded in the background. """
+
+    config_params.update({
+        'in_production': True,    # orders go to the local emulator
+        'output_results_to_cloud': True,
+        'scheduler': 'schedule',
+        'execution_hours': list(range(24)),
+        'threshold': 0.5,
+        'cloud_storage': 'local',
+        'local_storage_path': os.path.join(workdir, 'bucket'),
+        'cloud_bucket_name': BUCKET_NAME,
+        'input_price_file_path': price_path,
+        'input_log_file_path': log_path,
+        'price_store_path': os.path.join(workdir, 'price_store'),
+        'log_store_path': os.path.join(workdir, 'log_store'),
+        'indicator_state_path': os.path.join(workdir, 'indicator_state.json'),
+        'output_log_file_path': OUTPUT_LOG_BLOB,
+        'output_log_file_temp_path': os.path.join('tmp', 'log.csv'),    # evaluate_performance deletes ./tmp after the upload
+        'trade_journal_path': os.path.join(workdir, 'journal') if journal else '',
+        'h2o_model_dict': {'model' + str(i + 1): MODEL_PATHS[i % len(MODEL_PATHS)] for i in range(num_models)},
+        'mojo_scorer': 'numpy',
+        'mojo_missing_columns': 'ignore',    # the shipped models stand in for the ensemble, the default lookbacks compute few of their columns
+        'ensemble_executor': 'thread',
+        'execution_venues': ['falconx'],
+        'prediction_cache_path': '',
+        'credential_backends': ['file'],
+        'credential_file_path': os.path.join(workdir, 'credentials.json'),
+        'metrics_jsonl_path': os.path.join(workdir, 'traces.jsonl'),
+        'metrics_port': None,
+    })
+
+
+# TRACES
+def stage_durations(trace, prefix=''):
+    """ {stage path: seconds} of one exported trace. Per indicator, per model and per
+    quote spans (names with a ':') are left out. """
+
+    path = prefix + trace['name']
+    durations = {path: trace['duration']}
+    for child in trace['children']:
+        if ':' not in child['name']:
+            durations.update(stage_durations(child, path + '/'))
+    return durations
+
+
+def read_traces(path):
+    with open(path) as f:
+        return [record for record in map(json.loads, f) if record['type'] == 'trace' and record['name'] == 'run']
+
+
+# ONE PROCESS
+def run_process(history_bars, log_rows, num_models, num_cycles, journal, result_path, seed):
+    """ One cold start followed by warm cycles, each after a new bar is appended to
+    the price file. Writes {'import': seconds, 'cycles': [{stage: seconds}],
+    'failures', 'cloud_log_rows', 'expected_log_rows'} to "result_path". """
+
+    workdir = tempfile.mkdtemp(prefix='pipeline_benchmark_')
+    bars_df = generate_ohlcv(history_bars + num_cycles, seed=seed)
+    price_path = os.path.join(workdir, 'prices.csv')
+    log_path = os.path.join(workdir, 'bucket', BUCKET_NAME, OUTPUT_LOG_BLOB)    # where the performance upload lands
+    configure(workdir, price_path, log_path, num_models, journal)
+    log_rows = write_inputs(price_path, log_path, bars_df.iloc[:history_bars], log_rows)
+    os.chdir(workdir)
+
+    from exchanges.emulator import ExchangeEmulator
+    with ExchangeEmulator(seed=seed) as emulator:
+        start = time.perf_counter()
+        import run    # the bot modules
+        import_seconds = time.perf_counter() - start
+
+        import exchanges.falconx
+        import exchanges.coinbase
+        exchanges.falconx.api_url = emulator.falconx_url
+        exchanges.coinbase.api_url = emulator.coinbase_url
+        exchanges.falconx.FALCONX_API_KEY, exchanges.falconx.FALCONX_SECRET, exchanges.falconx.FALCONX_PASSPHRASE = write_credentials(config_params['credential_file_path'], emulator)
+
+        failures = 0
+        for i in range(num_cycles):
+            if i:
+                append_bar(price_path, bars_df.iloc[[history_bars + i - 1]])
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run.run()
+            except Exception as e:
+                failures += 1
+                print('Cycle {} failed: {}'.format(i, e), file=sys.stderr)
+
+        if journal:
+            from utils.journal import get_journal_uploader
+            with contextlib.redirect_stdout(io.StringIO()):
+                get_journal_uploader().stop()    # ships what is left, as at process exit
+
+    cycles = [stage_durations(trace) for trace in read_traces(config_params['metrics_jsonl_path'])]
+    with open(result_path, 'w') as f:
+        json.dump({'import': import_seconds, 'cycles': cycles, 'failures': failures, 'cloud_log_rows': len(pd.read_csv(log_path)), 'expected_log_rows': log_rows + num_cycles - failures}, f)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+# REPORT
+def summarize(samples):
+    """ {stage: [seconds]} -> {stage: {'count', 'p50', 'p90', 'mean', 'max'}} """
+
+    summary = {}
+    for stage, values in samples.items():
+        values = np.asarray(values)
+        summary[stage] = {'count': len(values), 'p50': float(np.percentile(values, 50)), 'p90': float(np.percentile(values, 90)), 'mean': float(values.mean()), 'max': float(values.max())}
+    return summary
+
+
+def print_summary(title, summary):
+    print('\n' + title)
+    print('  {:<40} {:>6} {:>10} {:>10} {:>10} {:>10}'.format('stage', 'count', 'p50 ms', 'p90 ms', 'mean ms', 'max ms'))
+    for stage, stats in summary.items():
+        print('  {:<40} {:>6} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f}'.format(stage, stats['count'], stats['p50'] * 1000, stats['p90'] * 1000, stats['mean'] * 1000, stats['max'] * 1000))
+
+
+def run_benchmarks(history_bars=HISTORY_BARS, log_rows=LOG_ROWS, num_models=NUM_MODELS, num_processes=NUM_PROCESSES, num_cycles=NUM_CYCLES, journal=False, output_path=None):
+    """ Runs "num_processes" fresh processes of "num_cycles" cycles each. The first
+    cycle of every process (plus the bot's module import) is the cold start, the
+    others are warm cycles. Returns the cold and warm stage summaries. Raises
+    RuntimeError when a cloud log does not end up with one row per cycle. """
+
+    cold, warm, failures = {'import': []}, {}, 0
+    with tempfile.TemporaryDirectory() as result_dir:
+        for i in range(num_processes):
+            result_path = os.path.join(result_dir, str(i) + '.json')
+            command = [sys.executable, '-m', 'benchmarks.pipeline_benchmark', '--process', result_path, '--seed', str(i),
+                       '--history-bars', str(history_bars), '--log-rows', str(log_rows), '--models', str(num_models), '--cycles', str(num_cycles)] + (['--journal'] if journal else [])
+            subprocess.run(command, check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            with open(result_path) as f:
+                result = json.load(f)
+            failures += result['failures']
+            if result['cloud_log_rows'] != result['expected_log_rows']:
+                raise RuntimeError('Cloud log of process {} has {} rows, expected {}.'.format(i + 1, result['cloud_log_rows'], result['expected_log_rows']))
+            cold['import'].append(result['import'])
+            for cycle_number, cycle in enumerate(result['cycles']):
+                for stage, seconds in cycle.items():
+                    (cold if cycle_number == 0 else warm).setdefault(stage, []).append(seconds)
+            print('Process {} of {}: {} cycles, cold run {:.3f}s'.format(i + 1, num_processes, len(result['cycles']), result['cycles'][0]['run'] if result['cycles'] else float('nan')))
+
+    results = {
+        'version': config_params['version'],
+        'settings': {'history_bars': history_bars, 'log_rows': log_rows, 'models': num_models, 'processes': num_processes, 'cycles': num_cycles, 'journal': journal},
+        'failures': failures,
+        'cold': summarize(cold),
+        'warm': summarize(warm),
+    }
+    print_summary('Cold start (module import, then the first run() of a fresh process)', results['cold'])
+    print_summary('Warm cycles (one new bar each)', results['warm'])
+    print('\n{} failed cycles'.format(failures))
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(results, f, indent=1)
+        print('Wrote results to ' + output_path)
+    return results
+
+
+# ENTRY POINT
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline end-to-end benchmark of run().')
+    parser.add_argument('--history-bars', type=int, default=HISTORY_BARS)
+    parser.add_argument('--log-rows', type=int, default=LOG_ROWS)
+    parser.add_argument('--models', type=int, default=NUM_MODELS)
+    parser.add_argument('--processes', type=int, default=NUM_PROCESSES, help='cold starts')
+    parser.add_argument('--cycles', type=int, default=NUM_CYCLES, help='run() cycles per process')
+    parser.add_argument('--journal', action='store_true', help='keep the log in a trade journal with background uploads')
+    parser.add_argument('--output', default=None, help='json file for the summary, e.g. to track it per release')
+    parser.add_argument('--process', default=None, help=argparse.SUPPRESS)    # internal: run one process, write its result here
+    parser.add_argument('--seed', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.process:
+        run_process(args.history_bars, args.log_rows, args.models, args.cycles, args.journal, args.process, args.seed)
+    else:
+        run_benchmarks(args.history_bars, args.log_rows, args.models, args.processes, args.cycles, args.journal, args.output)
@@ -15,26 +15,97 @@ config_params = {
     'cloud_bucket_path': '',    # FIXME: your value goes here
     'input_price_file_path': '',    # FIXME: your value goes here
     'input_log_file_path': '',    # FIXME: your value goes here
+    'price_store_path': '',    # FIXME: your value goes here (directory of the columnar price store synced from input_price_file_path)
+    'log_store_path': '',    # FIXME: your value goes here (directory of the columnar log store synced from input_log_file_path)
     'input_machine_learning_file_path': '',    # FIXME: your value goes here
     'indicator_output_path': '',    # FIXME: your value goes here
+    'indicator_state_path': '',    # FIXME: your value goes here (json state of the incremental indicators used by run() and the event scheduler; empty recomputes them in batch every run)
     'predictions_output_path': '',    # FIXME: your value goes here
     'ohlc_file_column_list': [ "Open", "High", "Low", "Close", "Volume", "Unix", "Time"],
     'log_file_column_list': ["Open", "High", "Low", "Close", "Volume", "Unix", "Time", 'model1', 'mean', 'median', 'action', 'falconx_usd_balance', 'falconx_btc_balance', 'falconx_btc_price_quote', 'trade_net_profit', 'running_trade_net_profit', 'trade_win_or_loss'],
     'output_log_file_path': '',    # FIXME: your value goes here
     'output_log_file_temp_path': '',    # FIXME: your value goes here
+    'trade_journal_path': '',    # FIXME: your value goes here (directory of the append-only trade journal, see utils/journal.py; empty rewrites and uploads the whole log every run)
+    'journal_upload_interval_seconds': 60,    # the journal uploader also runs right after every run
+    'cloud_storage': 'gcs',    # 'gcs', or 'local' for the local stand-in in utils/cloud_storage.py
+    'local_storage_path': '',    # root directory of the local storage stand-in (one sub directory per bucket)
     'threshold':'',    # FIXME: your numerical threshold value goes here
     'bet': 10000,    # size of each bet in USD
     'execution_hours': [0, 12],
+    'scheduler': 'event',    # 'event' pre-warms ahead of each execution hour (scheduler.py), 'schedule' runs run() at :01 past every hour
+    'bar_interval_seconds': 300,    # cadence of the input price bars
+    'deadline_offset_seconds': 0,    # seconds after the top of an execution hour at which its bar closes
+    'prewarm_seconds': 60,    # how long before the deadline data, indicators, models and connections are prepared
+    'bar_wait_timeout_seconds': 120,    # give up on a run when the closing bar has not arrived by then
+    'bar_poll_interval_seconds': 0.25,    # how often the price file is checked for the closing bar
     'data_reduction_factor': 12,
     'lookback_periods': [30, 60, 90],    # FIXME: your value goes here
     'standard_deviation': 2,
+    'indicator_warmup_bars': 1000,    # bars before the longest lookback fed to the live indicators so the recursive ones (rsi, cmo, zlema) settle to their full history values
+    'indicator_list': [    # indicators computed for every lookback period (see utils/features.py for the full list)
+        'bollinger_band', 'roc', 'sma', 'zlema', 'momentum', 'cci', 'rsi', 'money_flow_index',
+        'chande_momentum_oscillator', 'annualized_historical_volatility', 'garman_klass_volatility', 'vwap',
+    ],
     'num_ml_predictions': 10,
+    'universe': [],    # token pairs traded by multi_symbol.py, e.g. [['BTC', 'USD'], ['ETH', 'USD']], empty trades BTC/USD through run()
+    'universe_price_file_path': '',    # FIXME: your value goes here (price csv of each pair, {base} and {quote} are filled in)
+    'universe_log_file_path': '',    # FIXME: your value goes here (bot log csv of each pair, {base} and {quote} are filled in)
+    'universe_price_store_path': '',    # FIXME: your value goes here (columnar price store of each pair, {base} and {quote} are filled in)
+    'universe_log_store_path': '',    # FIXME: your value goes here (columnar log store of each pair, {base} and {quote} are filled in)
+    'universe_indicator_state_path': '',    # json state of each pair's incremental indicators, {base} and {quote} are filled in (empty rebuilds them at every pre-warm)
+    'universe_output_log_file_path': '',    # FIXME: your value goes here (cloud log path of each pair, {base} and {quote} are filled in)
+    'universe_output_log_file_temp_path': '',    # FIXME: your value goes here (local log file of each pair, {base} and {quote} are filled in)
+    'universe_max_workers': 10,    # pairs loaded and traded at once, keep at or below exchange_pool_size
+    'falconx_api_url': 'https://api.falconx.io/v1/',    # point at a local exchanges/emulator.py server for load tests
+    'coinbase_api_url': 'https://api.exchange.coinbase.com/',
+    'exchange_connect_timeout': 3.05,    # seconds to open a connection to an exchange
+    'exchange_read_timeout': 10,    # seconds to wait for an exchange response
+    'exchange_get_retries': 3,    # retries for GET requests (orders are never resent once they reach the exchange)
+    'exchange_retry_backoff': 0.25,    # seconds, doubled on every retry
+    'exchange_pool_size': 10,    # keep-alive connections kept open per exchange
+    'execution_venues': ['falconx'],    # venues quoted by the best execution router ('falconx', 'coinbase'), with one venue orders go straight to FalconX
+    'quote_deadline_seconds': 1.5,    # venues that have not quoted by then are left out of the routing decision
+    'falconx_fees_in_quote': True,    # FalconX RFQ prices include the fee, set False to add fee_bps - rebate_bps on top
+    'coinbase_product_id': 'BTC-USD',
+    'coinbase_usd_account_id': '',    # FIXME: your value goes here
+    'coinbase_btc_account_id': '',    # FIXME: your value goes here
+    'credential_backends': ['secret_manager'],    # where exchange credentials are looked up, in order: 'secret_manager', 'env', 'file'
+    'credential_ttl_seconds': 3600,    # resolved credentials are reused this long, then looked up again (picks up rotated secrets)
+    'secret_manager_project_id': '',    # FIXME: your value goes here
+    'credential_env_prefix': '',    # the env backend reads <prefix><NAME>, e.g. 'EOC_' for EOC_FALCONX_API_KEY
+    'credential_file_path': '',    # FIXME: your value goes here (json file of credential name -> value for the file backend)
+    'balance_snapshot_max_age': 5,    # seconds an account balance snapshot is trusted before it is fetched again
     'h2o_model_dict': {    # FIXME: update absolute paths depending on machine
         'model1': '',    # FIXME: your value goes here
     },
     'h2o_jar_dict': {    # FIXME: update absolute paths depending on machine
         'model1': '',    # FIXME: your value goes here
     },
+    'mojo_scorer': 'h2o',    # 'h2o' runs the MOJOs on a local H2O cluster, 'numpy' (experimental) scores them in process (scoring/numpy_mojo.py); keep 'h2o' until benchmarks/mojo_benchmark.py passes against a committed H2O prediction fixture
+    'mojo_missing_columns': 'warn',    # model columns absent from the features score as NaN in the numpy scorer; 'warn' (as H2O does), 'raise' or 'ignore'
+    'model_weights': {},    # optional ensemble weight per model name for the weighted mean, models not listed weigh 1
+    'model_timeout_seconds': 10,    # models that take longer are left out of the ensemble for the run
+    'ensemble_executor': 'thread',    # 'thread' or 'process' (process needs the experimental mojo_scorer = numpy)
+    'ensemble_trim_fraction': 0.2,    # share of the lowest and highest predictions dropped from the trimmed mean
+    'prediction_cache_size': 10000,    # predictions kept in memory (least recently used evicted)
+    'prediction_cache_path': '',    # FIXME: your value goes here (sqlite file for the on disk prediction cache, empty for memory only)
+    'prediction_cache_disk_size': 1000000,    # predictions kept on disk
+    'sweep_grid': {    # values tried by sweep.py, parameters left out keep their value above
+        'threshold': [0.45, 0.5, 0.55, 0.6],
+        'lookback_periods': [[30, 60, 90]],
+        'execution_hours': [[0, 12], [0, 6, 12, 18]],
+        'standard_deviation': [2],
+        'data_reduction_factor': [1, 12],
+    },
+    'sweep_num_samples': None,    # None tries the whole grid, a number draws that many trials at random
+    'sweep_scorer': 'h2o',    # 'h2o' scores the sweep with H2O's MOJO runtime (needs h2o and Java, genmodel jars from h2o_jar_dict), 'numpy' with the experimental in process scorer
+    'sweep_results_path': '',    # FIXME: your value goes here (json lines of finished trials, read back to resume)
+    'sweep_summary_path': '',    # FIXME: your value goes here (ranked csv summary)
+    'metrics_jsonl_path': '',    # FIXME: your value goes here (json lines of every run's stage spans and rolling stage latencies, empty to disable)
+    'metrics_host': '127.0.0.1',
+    'metrics_port': 9108,    # Prometheus scrape endpoint (/metrics) while the bot runs in production, None to disable
+    'metrics_window': 500,    # observations per stage kept for the rolling quantiles
+    'stage_regression_factor': 3,    # a stage slower than this multiple of its rolling median is reported
     # TODO: additional config parameters go here
 }
 
@@ -0,0 +1,109 @@
+###############################################################################
+# FILENAME: client.py
+# PROJECT: EOC CEFI Trading Bot Template
+# CLIENT:
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Shared HTTP layer for the exchange modules. One pooled keep-alive
+#              session per venue, default connect / read timeouts and retry with
+#              backoff for idempotent GET requests, plus helpers to fan requests
+#              out concurrently with asyncio.
+###############################################################################
+import asyncio
+import threading
+import concurrent.futures
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import tracing
+from config import config_params
+
+
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+# SESSIONS
+_sessions = {}
+_lock = threading.Lock()
+
+
+def build_session():
+    """ Session with a connection pool and a retry policy. GETs are retried on
+    connection errors, read errors and RETRY_STATUSES with exponential backoff
+    (honouring Retry-After). Other methods (orders) are only retried when the
+    connection could not be opened, i.e. the request never reached the venue. """
+
+    retry = Retry(
+        total=config_params['exchange_get_retries'],
+        backoff_factor=config_params['exchange_retry_backoff'],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,    # hand the last response back, callers read the error body
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config_params['exchange_pool_size'], max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(venue):
+    """ Returns the process wide session for a venue ('falconx', 'coinbase'),
+    creating it on first use so later calls reuse its open connections. """
+
+    if venue not in _sessions:
+        with _lock:
+            if venue not in _sessions:
+                _sessions[venue] = build_session()
+    return _sessions[venue]
+
+
+def close_sessions():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+# REQUESTS
+def request(venue, method, url, **kwargs):
+    """ requests.request through the venue's pooled session, with the configured
+    (connect, read) timeout unless the caller passes one. Counted as http_calls (and
+    http_errors) on the active trace span. """
+
+    kwargs.setdefault('timeout', (config_params['exchange_connect_timeout'], config_params['exchange_read_timeout']))
+    tracing.count('http_calls')
+    response = get_session(venue).request(method, url, **kwargs)
+    if response.status_code >= 400:
+        tracing.count('http_errors')
+    return response
+
+
+def get(venue, url, **kwargs):
+    return request(venue, 'GET', url, **kwargs)
+
+
+def post(venue, url, **kwargs):
+    return request(venue, 'POST', url, **kwargs)
+
+
+# ASYNC
+async def call_async(function, *args, **kwargs):
+    """ Runs a blocking exchange call in a worker thread so several can be awaited
+    together. The calls share the venue's pooled session (pool_maxsize connections). """
+
+    return await asyncio.to_thread(function, *args, **kwargs)
+
+
+def run_sync(coroutine):
+    """ Runs a coroutine to completion from synchronous code, also when the caller is
+    already inside a running event loop (the coroutine then runs on its own loop in
+    a helper thread). """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(tracing.in_current_context(asyncio.run), coroutine).result()
@@ -7,6 +7,7 @@
 # DESCRIPTION: This file handles interface with the FalconX API.
 ###############################################################################
 import time
+import asyncio
 import datetime
 import pytz
 import json
@@ -16,98 +17,111 @@ import hashlib
 import base64
 import requests
 from requests.auth import AuthBase
-from google.cloud import storage
-from google.cloud import secretmanager
+from exchanges import client as exchange_client
+from exchanges import credentials
 from config import config_params
 
 
 # CONFIG
-client = secretmanager.SecretManagerServiceClient()    # get authentication info
-project_id = ""    # FIXME: add your value here
-
-CB_PRIME_API_KEY = ''    # FIXME: add your value here
+CB_PRIME_API_KEY = ''    # FIXME: add your value here (credential name, resolved through exchanges/credentials.py on the first request)
 CB_PRIME_PASSPHRASE = ''    # FIXME: add your value here
 CB_PRIME_SECRET = ''    # FIXME: add your value here
-cb_prime_api_key = client.access_secret_version({"name": f"projects/{project_id}/secrets/{CB_PRIME_API_KEY}/versions/latest"}).payload.data.decode('UTF-8')
-cb_prime_passphrase = client.access_secret_version({"name": f"projects/{project_id}/secrets/{CB_PRIME_PASSPHRASE}/versions/latest"}).payload.data.decode('UTF-8')
-cb_prime_secret= client.access_secret_version({"name": f"projects/{project_id}/secrets/{CB_PRIME_SECRET}/versions/latest"}).payload.data.decode('UTF-8')
 
-api_url = 'https://api.exchange.coinbase.com/'
+api_url = config_params['coinbase_api_url']
 method = 'GET'
 request_path = '/accounts'
 
 
 # AUTHENTICATE
 class CoinbaseExchangeAuth(AuthBase):
+    """ Signs Coinbase requests. The keys are strings or credentials.Secret handles,
+    resolved when the first request is signed. """
+
     def __init__(self, api_key, secret_key, passphrase):
         self.api_key = api_key
         self.secret_key = secret_key
         self.passphrase = passphrase
+        self._decoded_secret = None
+        self.hmac_key = None
 
     def __call__(self, request):
+        secret_key = credentials.resolve(self.secret_key)
+        if secret_key != self._decoded_secret:    # decoded once per secret value, not on every request
+            self.hmac_key, self._decoded_secret = base64.b64decode(secret_key), secret_key
         timestamp = str(int(time.time()))
         message = (timestamp + request.method + request.path_url).encode("utf-8")
         if request.body:
             message = b''.join([message, request.body]) 
-        hmac_key = base64.b64decode(self.secret_key)
-        signature = hmac.new(hmac_key, message, hashlib.sha256)
+        signature = hmac.new(self.hmac_key, message, hashlib.sha256)
         signature_b64 = base64.b64encode(signature.digest())
 
         request.headers.update({
             'CB-ACCESS-SIGN': signature_b64,
             'CB-ACCESS-TIMESTAMP': timestamp,
-            'CB-ACCESS-KEY': self.api_key,
-            'CB-ACCESS-PASSPHRASE': self.passphrase,
+            'CB-ACCESS-KEY': credentials.resolve(self.api_key),
+            'CB-ACCESS-PASSPHRASE': credentials.resolve(self.passphrase),
         })
         return request
 
 
 # FUNCTIONS
 def get_coinbase_connection():
-    return CoinbaseExchangeAuth(cb_prime_api_key, cb_prime_secret, cb_prime_passphrase)
+    return CoinbaseExchangeAuth(credentials.Secret(CB_PRIME_API_KEY), credentials.Secret(CB_PRIME_SECRET), credentials.Secret(CB_PRIME_PASSPHRASE))
 
 def get_all_coinbase_accounts(auth):
     """ Prints a list of all accounts on the coinbase profile to screen so you can see 
     the balances. """
-    response = requests.get(api_url + 'accounts', auth=auth)
+    response = exchange_client.get('coinbase', api_url + 'accounts', auth=auth)
     accounts = response.json()
     for account in accounts:
         print(account)
 
 def get_single_coinbase_account(auth, account_id):
     """ Prints the avialable balance information for a specific coin account on the CB profile. """
-    response = requests.get(api_url + 'accounts/' + account_id, auth=auth)
+    response = exchange_client.get('coinbase', api_url + 'accounts/' + account_id, auth=auth)
     return response.json()['balance']
 
 def get_single_coinbase_account_ledger(auth, account_id):
     """ Returns the avialable ledger information for a specific coin account on the CB profile. """
-    response = requests.get(api_url + 'accounts/' + account_id + '/ledger', auth=auth)
+    response = exchange_client.get('coinbase', api_url + 'accounts/' + account_id + '/ledger', auth=auth)
     return response.json()
 
 def get_coinbase_fees_quote(auth):
     """ Prints the maker and taker fee rates for the account (depends on volume). """
-    response = requests.get(api_url + 'fees', auth=auth)
+    response = exchange_client.get('coinbase', api_url + 'fees', auth=auth)
     print(response.text)
 
+def get_coinbase_fee_rates(auth):
+    """ Returns the maker and taker fee rates for the account as floats. """
+    response = exchange_client.get('coinbase', api_url + 'fees', auth=auth)
+    fees = response.json()
+    return {'maker_fee_rate': float(fees['maker_fee_rate']), 'taker_fee_rate': float(fees['taker_fee_rate'])}
+
 def get_coinbase_btc_price_quote_coinbase(auth):
     """ Returns the current price of BTC. """
-    response = requests.get(api_url + 'oracle', auth=auth)
+    response = exchange_client.get('coinbase', api_url + 'oracle', auth=auth)
     prices = response.json()['prices']
     return float(prices['BTC'])
 
-def place_coinbase_market_order(auth, amount_usd, product_id, side, usd_acct, btc_acct):
-    """ Places a market order on Coinbase. """
+def place_coinbase_market_order(auth, amount_usd, product_id, side, usd_acct, btc_acct, amount_btc=None):
+    """ Places a market order on Coinbase, sized in USD ("amount_usd", as funds) or,
+    when "amount_btc" is given, in BTC (as size, e.g. to sell a position without
+    depending on the price at the fill). """
     print('Placing market ' + side + ' order on Coinbase...')
-    print('Coinbase USD account balance before trade: ' + str(get_single_coinbase_account(auth, usd_acct)))
-    print('Coinbase BTC account balance before trade: ' + str(get_single_coinbase_account(auth, btc_acct)))
+    usd_balance, btc_balance = get_coinbase_balances(auth, usd_acct, btc_acct)
+    print('Coinbase USD account balance before trade: ' + str(usd_balance))
+    print('Coinbase BTC account balance before trade: ' + str(btc_balance))
     data = {
             'type': 'market',
             'side': side,
             'product_id': product_id,
             'funds': amount_usd,   # buy the amount dictated by config file (usd)
         }
+    if amount_btc is not None:
+        del data['funds']
+        data['size'] = '{:.8f}'.format(amount_btc)
     if config_params['in_production']:     
-        response = requests.post(api_url + 'orders', auth=auth, json=data)
+        response = exchange_client.post('coinbase', api_url + 'orders', auth=auth, json=data)
         return response.json()
     else:
         print('Not in production mode, no trade actually executed.')
@@ -131,3 +145,34 @@ def get_coinbase_trade_fees(auth, acct):
                 fees = fees + float(item['amount'])
     return fees
 
+
+# ASYNC
+async def get_single_coinbase_account_async(auth, account_id):
+    return await exchange_client.call_async(get_single_coinbase_account, auth, account_id)
+
+async def get_single_coinbase_account_ledger_async(auth, account_id):
+    return await exchange_client.call_async(get_single_coinbase_account_ledger, auth, account_id)
+
+async def get_coinbase_btc_price_quote_async(auth):
+    return await exchange_client.call_async(get_coinbase_btc_price_quote_coinbase, auth)
+
+async def gather_coinbase_balances(auth, usd_acct, btc_acct):
+    """ USD and BTC account balances, fetched concurrently. """
+    return await asyncio.gather(get_single_coinbase_account_async(auth, usd_acct), get_single_coinbase_account_async(auth, btc_acct))
+
+async def gather_coinbase_market_state(auth, usd_acct, btc_acct):
+    """ BTC price and both account balances in one round trip. """
+    btc_price, usd_balance, btc_balance = await asyncio.gather(
+        get_coinbase_btc_price_quote_async(auth),
+        get_single_coinbase_account_async(auth, usd_acct),
+        get_single_coinbase_account_async(auth, btc_acct),
+    )
+    return {'btc_price': btc_price, 'usd_balance': usd_balance, 'btc_balance': btc_balance}
+
+def get_coinbase_balances(auth, usd_acct, btc_acct):
+    """ Synchronous wrapper of gather_coinbase_balances. """
+    return exchange_client.run_sync(gather_coinbase_balances(auth, usd_acct, btc_acct))
+
+def get_coinbase_market_state(auth, usd_acct, btc_acct):
+    """ Synchronous wrapper of gather_coinbase_market_state. """
+    return exchange_client.run_sync(gather_coinbase_market_state(auth, usd_acct, btc_acct))
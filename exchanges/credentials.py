@@ -0,0 +1,147 @@
+###############################################################################
+# FILENAME: credentials.py
+# PROJECT: EOC CEFI Trading Bot Template
+# CLIENT:
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Exchange credentials resolved on first use from pluggable
+#              backends (Secret Manager, environment variables, a local json
+#              file) and cached in process for a configurable time, so importing
+#              the exchange modules makes no network calls.
+###############################################################################
+import os
+import json
+import time
+import threading
+
+from config import config_params
+
+
+# BACKENDS
+class SecretManagerBackend:
+    """ Google Secret Manager, latest version of secret "name" in "project_id". The
+    client library is imported and the client created on the first lookup. """
+
+    def __init__(self, project_id=None):
+        self.project_id = config_params['secret_manager_project_id'] if project_id is None else project_id
+        self._client = None
+
+    def get(self, name):
+        from google.api_core import exceptions    # only deployments using Secret Manager need google-cloud
+        if self._client is None:
+            from google.cloud import secretmanager
+            self._client = secretmanager.SecretManagerServiceClient()
+        try:
+            response = self._client.access_secret_version({"name": f"projects/{self.project_id}/secrets/{name}/versions/latest"})
+        except exceptions.NotFound:
+            return None
+        return response.payload.data.decode('UTF-8')
+
+
+class EnvironmentBackend:
+    """ Environment variable "prefix" + name, upper case with '-' as '_' (secret
+    'falconx-api-key' is read from FALCONX_API_KEY). """
+
+    def __init__(self, prefix=None):
+        self.prefix = config_params['credential_env_prefix'] if prefix is None else prefix
+
+    def get(self, name):
+        return os.environ.get(self.prefix + name.upper().replace('-', '_'))
+
+
+class FileBackend:
+    """ Local json file of name -> value, e.g. for development machines. Read on every
+    lookup, the provider's cache keeps that rare. """
+
+    def __init__(self, path=None):
+        self.path = config_params['credential_file_path'] if path is None else path
+
+    def get(self, name):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f).get(name)
+
+
+BACKENDS = {
+    'secret_manager': SecretManagerBackend,
+    'env': EnvironmentBackend,
+    'file': FileBackend,
+}
+
+
+# PROVIDER
+class CredentialProvider:
+    """ Resolves a credential from the first backend that has it and keeps it for
+    "ttl" seconds, after which it is looked up again (picking up rotated secrets). """
+
+    def __init__(self, backends, ttl=None):
+        if not backends:
+            raise ValueError('The credential provider needs at least one backend.')
+        self.backends = list(backends)
+        self.ttl = config_params['credential_ttl_seconds'] if ttl is None else ttl
+        self._cache = {}    # name -> (value, monotonic time resolved)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:    # concurrent first requests resolve once
+            cached = self._cache.get(name)
+            if cached is not None and time.monotonic() - cached[1] < self.ttl:
+                return cached[0]
+            for backend in self.backends:
+                value = backend.get(name)
+                if value is not None:
+                    self._cache[name] = (value, time.monotonic())
+                    return value
+        raise RuntimeError('Credential ' + repr(name) + ' not found in any of the backends ' + str([type(backend).__name__ for backend in self.backends]))
+
+    def invalidate(self, name=None):
+        """ Drops "name" (every credential when None) from the cache, e.g. after the
+        exchange rejected it. """
+
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(name, None)
+
+
+class Secret:
+    """ Lazy handle on a credential, resolved through "provider" (the shared one by
+    default) each time its value is needed. """
+
+    def __init__(self, name, provider=None):
+        self.name = name
+        self.provider = provider
+
+    def get(self):
+        return (get_credential_provider() if self.provider is None else self.provider).get(self.name)
+
+    def __repr__(self):    # never print the value
+        return 'Secret(' + repr(self.name) + ')'
+
+
+def resolve(value):
+    """ The value of a Secret, or "value" itself when it is a plain string. """
+
+    return value.get() if isinstance(value, Secret) else value
+
+
+# SHARED PROVIDER
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_credential_provider():
+    """ Returns the process wide provider over config_params['credential_backends'],
+    creating it on first use. """
+
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                for backend_name in config_params['credential_backends']:
+                    if backend_name not in BACKENDS:
+                        raise ValueError('Unknown credential backend: ' + str(backend_name) + ' (expected one of ' + str(list(BACKENDS)) + ')')
+                _provider = CredentialProvider([BACKENDS[backend_name]() for backend_name in config_params['credential_backends']])
+    return _provider
@@ -0,0 +1,379 @@
+###############################################################################
+# FILENAME: emulator.py
+# PROJECT: EOC CEFI Trading Bot Template
+# CLIENT:
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Local HTTP stand-in for the FalconX and Coinbase endpoints used
+#              by falconx.py and coinbase.py. Validates the FX / CB signature
+#              headers and injects latency, rate limits and errors so the order
+#              path can be load tested without network access or real funds.
+###############################################################################
+import re
+import json
+import hmac
+import time
+import uuid
+import base64
+import random
+import hashlib
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+FALCONX_PREFIX = '/falconx/v1/'
+COINBASE_PREFIX = '/coinbase/'
+SIGNATURE_WINDOW_SECONDS = 30    # max age of a signed request's timestamp
+ROUTES = [    # (method, venue, path pattern, route name)
+    ('POST', 'falconx', r'quotes', 'falconx:quotes'),
+    ('POST', 'falconx', r'order', 'falconx:order'),
+    ('GET', 'falconx', r'balances/total', 'falconx:balances'),
+    ('GET', 'falconx', r'pairs', 'falconx:pairs'),
+    ('GET', 'coinbase', r'accounts', 'coinbase:accounts'),
+    ('GET', 'coinbase', r'accounts/(?P<account_id>[^/]+)', 'coinbase:account'),
+    ('GET', 'coinbase', r'accounts/(?P<account_id>[^/]+)/ledger', 'coinbase:ledger'),
+    ('GET', 'coinbase', r'fees', 'coinbase:fees'),
+    ('GET', 'coinbase', r'oracle', 'coinbase:oracle'),
+    ('POST', 'coinbase', r'orders', 'coinbase:orders'),
+]
+
+
+# LATENCY, RATE LIMITS
+def sample_latency(spec, rng):
+    """ Draws one response delay in seconds. "spec" is None (no delay) or a dict
+    with a "kind" of constant (value), uniform (low, high), normal (mean, std) or
+    lognormal (median, sigma). """
+
+    if spec is None:
+        return 0.0
+    kind = spec['kind']
+    if kind == 'constant':
+        return spec['value']
+    if kind == 'uniform':
+        return rng.uniform(spec['low'], spec['high'])
+    if kind == 'normal':
+        return max(0.0, rng.gauss(spec['mean'], spec['std']))
+    if kind == 'lognormal':
+        return rng.lognormvariate(0, spec['sigma']) * spec['median']
+    raise ValueError('Unknown latency kind: ' + str(kind))
+
+
+class TokenBucket:
+    """ "rate" requests per second with bursts of up to "burst" requests. """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+# EMULATOR
+class ExchangeEmulator:
+    """ Serves both venues from one local server: FalconX under /falconx/v1/ and
+    Coinbase under /coinbase/. Point the exchange modules' api_url at falconx_url /
+    coinbase_url and sign with the emulator's keys.
+
+    latency: a sample_latency spec for every route, or a dict of route name -> spec
+        (route names are listed in ROUTES, '*' sets the default).
+    rate_limits: dict of venue -> (requests per second, burst); over the limit a
+        request gets a 429.
+    error_rate: probability a request fails with one of "error_statuses" instead of
+        being handled, a float for every route or a dict of route name -> float. """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=None, rate_limits=None, error_rate=0.0, error_statuses=(500, 502, 503), btc_price=30000.0, price_volatility=0.0005, fee_bps=4.0, starting_balances=None, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.buckets = {venue: TokenBucket(rate, burst) for venue, (rate, burst) in (rate_limits or {}).items()}
+        self.btc_price = btc_price
+        self.price_volatility = price_volatility
+        self.fee_bps = fee_bps
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.credentials = {    # venue -> (api key, base64 secret, passphrase)
+            'falconx': ('fx-emulator-key', base64.b64encode(b'falconx-emulator-secret').decode(), 'fx-emulator-passphrase'),
+            'coinbase': ('cb-emulator-key', base64.b64encode(b'coinbase-emulator-secret').decode(), 'cb-emulator-passphrase'),
+        }
+        balances = dict({'USD': 100000.0, 'BTC': 0.0}, **(starting_balances or {}))
+        self.falconx_balances = dict(balances)
+        self.coinbase_accounts = {str(uuid.uuid4()): {'currency': currency, 'balance': balance} for currency, balance in balances.items()}
+        self.coinbase_ledgers = {account_id: [] for account_id in self.coinbase_accounts}
+        self.quotes = {}
+        self.stats = {}    # (route, status) -> count
+        self.server = None
+        self.thread = None
+
+    # LIFECYCLE
+    @property
+    def url(self):
+        return 'http://{}:{}'.format(self.host, self.server.server_address[1])
+
+    @property
+    def falconx_url(self):
+        return self.url + FALCONX_PREFIX
+
+    @property
+    def coinbase_url(self):
+        return self.url + COINBASE_PREFIX
+
+    def start(self):
+        emulator = self
+
+        class Handler(EmulatorRequestHandler):
+            pass
+        Handler.emulator = emulator
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='exchange-emulator', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def coinbase_account_id(self, currency):
+        return next(account_id for account_id, account in self.coinbase_accounts.items() if account['currency'] == currency)
+
+    # REQUEST PIPELINE
+    def _route_setting(self, setting, route, default):
+        if isinstance(setting, dict) and 'kind' not in setting:
+            return setting.get(route, setting.get('*', default))
+        return default if setting is None else setting
+
+    def _record(self, route, status):
+        with self.lock:
+            self.stats[(route, status)] = self.stats.get((route, status), 0) + 1
+
+    def handle(self, method, path, headers, body):
+        """ Runs one request through signature check, rate limit, error injection and
+        latency, then the route handler. Returns (status, response object). """
+
+        match = None
+        for route_method, venue, pattern, route in ROUTES:
+            prefix = FALCONX_PREFIX if venue == 'falconx' else COINBASE_PREFIX
+            match = re.fullmatch(re.escape(prefix) + pattern, path.split('?')[0])
+            if match and method == route_method:
+                break
+            match = None
+        if match is None:
+            self._record('unknown', 404)
+            return 404, {'message': 'Not found: ' + method + ' ' + path}
+
+        error = self._check_signature(venue, method, path, headers, body)
+        if error:
+            self._record(route, 401)
+            return 401, {'message': error}
+        if venue in self.buckets and not self.buckets[venue].take():
+            self._record(route, 429)
+            return 429, {'message': 'Rate limit exceeded'}
+
+        with self.lock:
+            delay = sample_latency(self._route_setting(self.latency, route, None), self.rng)
+            fail = self.rng.random() < self._route_setting(self.error_rate, route, 0.0)
+            status = self.rng.choice(self.error_statuses)
+        time.sleep(delay)
+        if fail:
+            self._record(route, status)
+            return status, {'message': 'Injected error'}
+
+        payload = json.loads(body) if body else {}
+        with self.lock:
+            self._move_price()
+            status, response = getattr(self, '_' + route.replace(':', '_'))(payload, **match.groupdict())
+        self._record(route, status)
+        return status, response
+
+    def _check_signature(self, venue, method, path, headers, body):
+        api_key, secret, passphrase = self.credentials[venue]
+        header_prefix = 'FX-ACCESS-' if venue == 'falconx' else 'CB-ACCESS-'
+        if headers.get(header_prefix + 'KEY') != api_key or headers.get(header_prefix + 'PASSPHRASE') != passphrase:
+            return 'Invalid API key or passphrase'
+
+        timestamp = headers.get(header_prefix + 'TIMESTAMP', '')
+        try:
+            if abs(time.time() - float(timestamp)) > SIGNATURE_WINDOW_SECONDS:
+                return 'Request timestamp expired'
+        except ValueError:
+            return 'Invalid request timestamp'
+
+        message = timestamp.encode() + method.encode() + path.encode() + body    # same message the FXRfqAuth / CoinbaseExchangeAuth signers build
+        expected = base64.b64encode(hmac.new(base64.b64decode(secret), message, hashlib.sha256).digest()).decode()
+        if not hmac.compare_digest(expected, headers.get(header_prefix + 'SIGN', '')):
+            return 'Invalid signature'
+        return None
+
+    def _move_price(self):
+        self.btc_price *= 1 + self.rng.gauss(0, self.price_volatility)
+
+    def _fee_rate(self):
+        return self.fee_bps / 10000
+
+    # FALCONX ROUTES
+    def _falconx_quotes(self, payload):
+        quantity = float(payload['quantity']['value'])
+        quote_id = str(uuid.uuid4())
+        buy_price = self.btc_price * (1 + self._fee_rate())
+        sell_price = self.btc_price * (1 - self._fee_rate())
+        self.quotes[quote_id] = (buy_price, sell_price)
+        fee_usd = quantity * self.btc_price * self._fee_rate()
+        now = datetime.datetime.utcnow()
+        return 200, {
+            'status': 'success',
+            'fx_quote_id': quote_id,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'token_pair': payload['token_pair'],
+            'quantity_requested': payload['quantity'],
+            'side_requested': payload['side'],
+            't_quote': now.isoformat(),
+            't_expiry': (now + datetime.timedelta(seconds=8)).isoformat(),
+            'gross_fee_bps': self.fee_bps,
+            'gross_fee_usd': fee_usd,
+            'rebate_bps': 0,
+            'rebate_usd': 0,
+            'fee_bps': self.fee_bps,
+            'fee_usd': fee_usd,
+        }
+
+    def _falconx_order(self, payload):
+        side = payload['side']
+        quantity = float(payload['quantity']['value'])
+        buy_price = self.btc_price * (1 + self._fee_rate())
+        sell_price = self.btc_price * (1 - self._fee_rate())
+        if side == 'buy':
+            cost = quantity * buy_price
+            if cost > self.falconx_balances['USD']:
+                return 400, {'status': 'failure', 'error': {'code': 'INSUFFICIENT_BALANCE', 'reason': 'Not enough USD'}}
+            self.falconx_balances['USD'] -= cost
+            self.falconx_balances['BTC'] += quantity
+            position_in, position_out = {'token': 'BTC', 'value': quantity}, {'token': 'USD', 'value': cost}
+        else:
+            if quantity > self.falconx_balances['BTC'] + 1e-12:
+                return 400, {'status': 'failure', 'error': {'code': 'INSUFFICIENT_BALANCE', 'reason': 'Not enough BTC'}}
+            proceeds = quantity * sell_price
+            self.falconx_balances['BTC'] -= quantity
+            self.falconx_balances['USD'] += proceeds
+            position_in, position_out = {'token': 'USD', 'value': proceeds}, {'token': 'BTC', 'value': quantity}
+
+        return 200, {
+            'status': 'success',
+            'fx_quote_id': str(uuid.uuid4()),
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'token_pair': payload['token_pair'],
+            'quantity_requested': payload['quantity'],
+            'side_requested': side,
+            'side_executed': side,
+            'position_in': position_in,
+            'position_out': position_out,
+            'order_type': payload.get('order_type', 'market'),
+            't_execute': datetime.datetime.utcnow().isoformat(),
+        }
+
+    def _falconx_balances(self, payload):
+        return 200, [{'token': token, 'total_balance': balance, 'platform': 'api'} for token, balance in self.falconx_balances.items()]
+
+    def _falconx_pairs(self, payload):
+        return 200, [{'base_token': 'BTC', 'quote_token': 'USD'}, {'base_token': 'ETH', 'quote_token': 'USD'}]
+
+    # COINBASE ROUTES
+    def _coinbase_account_json(self, account_id):
+        account = self.coinbase_accounts[account_id]
+        return {'id': account_id, 'currency': account['currency'], 'balance': '{:.8f}'.format(account['balance']), 'available': '{:.8f}'.format(account['balance']), 'hold': '0', 'trading_enabled': True}
+
+    def _coinbase_accounts(self, payload):
+        return 200, [self._coinbase_account_json(account_id) for account_id in self.coinbase_accounts]
+
+    def _coinbase_account(self, payload, account_id):
+        if account_id not in self.coinbase_accounts:
+            return 404, {'message': 'NotFound'}
+        return 200, self._coinbase_account_json(account_id)
+
+    def _coinbase_ledger(self, payload, account_id):
+        if account_id not in self.coinbase_accounts:
+            return 404, {'message': 'NotFound'}
+        return 200, list(reversed(self.coinbase_ledgers[account_id]))    # newest first
+
+    def _coinbase_fees(self, payload):
+        return 200, {'maker_fee_rate': '{:.4f}'.format(self._fee_rate()), 'taker_fee_rate': '{:.4f}'.format(self._fee_rate()), 'usd_volume': '0'}
+
+    def _coinbase_oracle(self, payload):
+        return 200, {'timestamp': str(int(time.time())), 'messages': [], 'signatures': [], 'prices': {'BTC': '{:.2f}'.format(self.btc_price)}}
+
+    def _coinbase_orders(self, payload):
+        usd_id, btc_id = self.coinbase_account_id('USD'), self.coinbase_account_id('BTC')
+        funds = float(payload['size']) * self.btc_price if 'size' in payload else float(payload['funds'])    # market orders are sized in funds (usd) or size (btc)
+        fee = funds * self._fee_rate()
+        if payload['side'] == 'buy':
+            if funds > self.coinbase_accounts[usd_id]['balance']:
+                return 400, {'message': 'Insufficient funds'}
+            size = round((funds - fee) / self.btc_price, 8)    # fills in whole satoshis, as the reported balance
+            self._coinbase_fill(usd_id, -funds + fee, 'match')
+            self._coinbase_fill(usd_id, -fee, 'fee')
+            self._coinbase_fill(btc_id, size, 'match')
+        else:
+            size = float(payload['size']) if 'size' in payload else funds / self.btc_price
+            if size > self.coinbase_accounts[btc_id]['balance'] + 1e-12:
+                return 400, {'message': 'Insufficient funds'}
+            self._coinbase_fill(btc_id, -size, 'match')
+            self._coinbase_fill(usd_id, funds, 'match')
+            self._coinbase_fill(usd_id, -fee, 'fee')
+        return 200, {'id': str(uuid.uuid4()), 'product_id': payload['product_id'], 'side': payload['side'], 'type': 'market', 'funds': str(funds), 'executed_value': str(funds), 'filled_size': '{:.8f}'.format(size), 'fill_fees': '{:.8f}'.format(fee), 'status': 'done', 'settled': True}
+
+    def _coinbase_fill(self, account_id, amount, entry_type):
+        self.coinbase_accounts[account_id]['balance'] += amount
+        self.coinbase_ledgers[account_id].append({
+            'id': str(uuid.uuid4()),
+            'created_at': datetime.datetime.now(tz=datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            'amount': '{:.8f}'.format(amount),
+            'balance': '{:.8f}'.format(self.coinbase_accounts[account_id]['balance']),
+            'type': entry_type,
+        })
+
+
+class EmulatorRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'    # keep-alive, so pooled client sessions reuse connections
+    disable_nagle_algorithm = True    # no delayed ACK stall between the header and body writes on a kept-alive connection
+    emulator = None
+
+    def _respond(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        status, response = self.emulator.handle(self.command, self.path, self.headers, body)
+        data = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):    # keep benchmark output readable
+        pass
@@ -8,92 +8,149 @@
 ###############################################################################
 import json
 import hmac
+import asyncio
+import threading
 import math
 import hashlib
 import time
 import requests
 import base64
-from google.cloud import storage
-from google.cloud import secretmanager
 from requests.auth import AuthBase
 
+from exchanges import client as exchange_client
+from exchanges import credentials
 from config import config_params
 
 
 # CONFIG
-client = secretmanager.SecretManagerServiceClient()    # get authentication info
-project_id = ''    # FIXME: add your credentials here
-
-FALCONX_API_KEY = ''    # FIXME: add your value here
+FALCONX_API_KEY = ''    # FIXME: add your value here (credential name, resolved through exchanges/credentials.py on the first request)
 FALCONX_PASSPHRASE = ''    # FIXME: add your value here
 FALCONX_SECRET = ''    # FIXME: add your value here
-falconx_api_key = client.access_secret_version({"name": f"projects/{project_id}/secrets/{FALCONX_API_KEY}/versions/latest"}).payload.data.decode('UTF-8')
-falconx_passphrase = client.access_secret_version({"name": f"projects/{project_id}/secrets/{FALCONX_PASSPHRASE}/versions/latest"}).payload.data.decode('UTF-8')
-falconx_secret= client.access_secret_version({"name": f"projects/{project_id}/secrets/{FALCONX_SECRET}/versions/latest"}).payload.data.decode('UTF-8')
 
-api_url = 'https://api.falconx.io/v1/'
+api_url = config_params['falconx_api_url']
 
 
 # AUTHENTICATE
 class FXRfqAuth(AuthBase):
+    """ Signs FalconX requests. The keys are strings or credentials.Secret handles;
+    handles are resolved when the first request is signed, not when the signer is
+    created. """
+
     def __init__(self, api_key, secret_key, passphrase):
         self.api_key = api_key
         self.secret_key = secret_key
         self.passphrase = passphrase
+        self._decoded_secret = None
+        self.hmac_key = None
 
     def __call__(self, request):
+        secret_key = credentials.resolve(self.secret_key)
+        if secret_key != self._decoded_secret:    # decoded once per secret value, not on every request
+            self.hmac_key, self._decoded_secret = base64.b64decode(secret_key), secret_key
         timestamp = str(time.time())
         request_body = request.body.decode() if request.body else ''
         message = timestamp + request.method + request.path_url + request_body
-        hmac_key = base64.b64decode(self.secret_key)
-        signature = hmac.new(hmac_key, message.encode(), hashlib.sha256)
+        signature = hmac.new(self.hmac_key, message.encode(), hashlib.sha256)
         signature_b64 = base64.b64encode(signature.digest())
 
         request.headers.update({
             'FX-ACCESS-SIGN': signature_b64,
             'FX-ACCESS-TIMESTAMP': timestamp,
-            'FX-ACCESS-KEY': self.api_key,
-            'FX-ACCESS-PASSPHRASE': self.passphrase,
+            'FX-ACCESS-KEY': credentials.resolve(self.api_key),
+            'FX-ACCESS-PASSPHRASE': credentials.resolve(self.passphrase),
             'Content-Type': 'application/json'
         })
         return request
 
 
+# ACCOUNT STATE
+class FalconXAccountSnapshot:
+    """ Every FalconX balance from a single balances/total call, shared by all the
+    lookups of one decision cycle (and by every pair of a multi pair cycle). The
+    balances are fetched again only after an order fill (invalidate) or once they
+    are older than "max_age" seconds. Safe to share between threads. """
+
+    def __init__(self, auth, max_age=None):
+        self.auth = auth
+        self.max_age = config_params['balance_snapshot_max_age'] if max_age is None else max_age
+        self.balances = None
+        self.fetched_at = None
+        self.num_fetches = 0
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        with self._lock:
+            self.balances = {item['token']: item['total_balance'] for item in get_all_falconx_accounts(self.auth)}
+            self.fetched_at = time.monotonic()
+            self.num_fetches += 1
+
+    def invalidate(self):
+        """ Marks the balances stale, e.g. after an order fill. """
+        self.balances = None
+
+    def is_stale(self):
+        return self.balances is None or time.monotonic() - self.fetched_at > self.max_age
+
+    def balance(self, token):
+        with self._lock:    # threads waiting on a refresh reuse it instead of fetching again
+            if self.is_stale():
+                self.refresh()
+            balances = self.balances
+        if token not in balances:
+            print('Token balance for ' + token + ' not found on FalconX account, returning zero.')
+            return 0
+        return balances[token]
+
+
 # FUNCTIONS
 def get_falconx_connection():
-    return FXRfqAuth(falconx_api_key, falconx_secret, falconx_passphrase)
+    return FXRfqAuth(credentials.Secret(FALCONX_API_KEY), credentials.Secret(FALCONX_SECRET), credentials.Secret(FALCONX_PASSPHRASE))
 
-def get_falconx_btc_price_quote(auth):
-    """ Returns the current price of BTC. """
+def get_falconx_quote(auth, side='buy', quantity=1, token_pair=('BTC', 'USD')):
+    """ Returns the full RFQ response (prices, fee and rebate fields) for "quantity"
+    of the base token of "token_pair". """
     params = {
         'token_pair': {
-        'base_token': 'BTC',
-        'quote_token': 'USD'
+        'base_token': token_pair[0],
+        'quote_token': token_pair[1]
         },
         'quantity': {
-        'token': 'BTC',
-        'value': 1,
+        'token': token_pair[0],
+        'value': quantity,
         },
-        'side': 'buy'
+        'side': side
     }
-    r = requests.post(api_url + 'quotes', json=params, auth=auth)
+    r = exchange_client.post('falconx', api_url + 'quotes', json=params, auth=auth)
+    return r.json()
+
+def get_falconx_btc_price_quote(auth):
+    """ Returns the current price of BTC. """
+    return get_falconx_price_quote(auth, ('BTC', 'USD'))
+
+def get_falconx_price_quote(auth, token_pair):
+    """ Returns the current buy price of one base token of "token_pair" and the quote id. """
+    quote = get_falconx_quote(auth, token_pair=token_pair)    # parsed once
     print('FalconX Quote details...')
-    print('Buy price for 1 BTC: ' + str(r.json()['buy_price']))
-    print('Gross fee bps: ' + str(r.json()['gross_fee_bps']))
-    print('Gross fee usd: ' + str(r.json()['gross_fee_usd']))
-    print('Rebate bps: ' + str(r.json()['rebate_bps']))
-    print('Rebate usd: ' + str(r.json()['rebate_usd']))
-    print('Fee bps: ' + str(r.json()['fee_bps']))
-    print('Fee usd: ' + str(r.json()['fee_usd']))
-    return [float(r.json()['buy_price']), r.json()['fx_quote_id']]
+    print('Buy price for 1 ' + token_pair[0] + ': ' + str(quote['buy_price']))
+    print('Gross fee bps: ' + str(quote['gross_fee_bps']))
+    print('Gross fee usd: ' + str(quote['gross_fee_usd']))
+    print('Rebate bps: ' + str(quote['rebate_bps']))
+    print('Rebate usd: ' + str(quote['rebate_usd']))
+    print('Fee bps: ' + str(quote['fee_bps']))
+    print('Fee usd: ' + str(quote['fee_usd']))
+    return [float(quote['buy_price']), quote['fx_quote_id']]
 
 def get_all_falconx_accounts(auth):
     """ Prints the avialable balance information for a specific coin account on the FalconX profile. """
-    response = requests.get(api_url + 'balances/total', auth=auth)
+    response = exchange_client.get('falconx', api_url + 'balances/total', auth=auth)
     return response.json()
 
-def get_single_falconx_account_balance(auth, token):
-    """ Returns the total balance on FalconX of thhe input token. """
+def get_single_falconx_account_balance(auth, token, snapshot=None):
+    """ Returns the total balance on FalconX of thhe input token. Served from
+    "snapshot" (a FalconXAccountSnapshot) when one is passed. """
+    if snapshot is not None:
+        return snapshot.balance(token)
+
     response = get_all_falconx_accounts(auth)
     for item in response:
         if item['token'] == token:
@@ -103,33 +160,37 @@ def get_single_falconx_account_balance(auth, token):
     return 0
 
 def get_falconx_token_pairs(auth):
-    response = requests.get(api_url + 'pairs', auth=auth)
+    response = exchange_client.get('falconx', api_url + 'pairs', auth=auth)
     return response.json()
 
-def place_falconx_market_order(auth, amount_usd, product_id, side):
-    """ Places a market order on FalconX. """
+def place_falconx_market_order(auth, amount_usd, product_id, side, snapshot=None, quote=None):
+    """ Places a market order on FalconX. Balances come from "snapshot" (one is
+    created for the call when none is passed) and are refreshed once after the fill.
+    A buy is sized with "quote" (BTC price) when given, otherwise a fresh quote. """
     print('Placing market ' + side + ' order on FalconX...')
-    falconx_usd = get_single_falconx_account_balance(auth, 'USD')
-    falconx_btc = get_single_falconx_account_balance(auth, 'BTC')
-    print('FalconX USD account balance before trade: ' + str(falconx_usd))
-    print('FalconX BTC account balance before trade: ' + str(falconx_btc))
+    base_token, quote_token = product_id[0], product_id[1]
+    snapshot = FalconXAccountSnapshot(auth) if snapshot is None else snapshot
+    falconx_usd = get_single_falconx_account_balance(auth, quote_token, snapshot)
+    falconx_btc = get_single_falconx_account_balance(auth, base_token, snapshot)
+    print('FalconX ' + quote_token + ' account balance before trade: ' + str(falconx_usd))
+    print('FalconX ' + base_token + ' account balance before trade: ' + str(falconx_btc))
 
-    if side == 'buy':    # buy into a BTC position
+    if side == 'buy':    # buy into a base token (e.g. BTC) position
         if falconx_usd <= 0:
             return 'There is a negative or zero balance in the FalconX account currently. No action taken.'
         else:
-            token = 'BTC'
+            token = base_token
             side_for_falconx_api = 'buy'
-            quote = get_falconx_btc_price_quote(auth)[0]
+            quote = get_falconx_price_quote(auth, product_id)[0] if quote is None else quote
             value = round(amount_usd / quote, 8)
 
-    elif side == 'sell':    # selling out of a BTC position into USD
+    elif side == 'sell':    # selling out of a base token position into the quote token
         if falconx_btc <= 0:
-            return 'There is a negative or zero BTC balance in the FalconX account currently. No action taken'
+            return 'There is a negative or zero ' + base_token + ' balance in the FalconX account currently. No action taken'
         else:
-            token = 'BTC'
+            token = base_token
             side_for_falconx_api = 'sell'
-            value = round_decimals_down(get_single_falconx_account_balance(auth, 'BTC'), 8)    # sell out of entire BTC position held in the account
+            value = round_decimals_down(falconx_btc, 8)    # sell out of entire position held in the account
     data = {
             "token_pair": {
                 "base_token": product_id[0],
@@ -144,9 +205,10 @@ def place_falconx_market_order(auth, amount_usd, product_id, side):
         }
 
     if config_params['in_production']:     
-        response = requests.post(api_url + 'order', auth=auth, json=data)
-        print('FalconX USD account balance after trade: ' + str(get_single_falconx_account_balance(auth, 'USD')))
-        print('FalconX BTC account balance after trade: ' + str(get_single_falconx_account_balance(auth, 'BTC')))
+        response = exchange_client.post('falconx', api_url + 'order', auth=auth, json=data)
+        snapshot.invalidate()    # the fill changed the balances
+        print('FalconX ' + quote_token + ' account balance after trade: ' + str(get_single_falconx_account_balance(auth, quote_token, snapshot)))
+        print('FalconX ' + base_token + ' account balance after trade: ' + str(get_single_falconx_account_balance(auth, base_token, snapshot)))
         return response.json()
     else:
         print('Not in production mode, no trade actually executed.')
@@ -164,3 +226,36 @@ def round_decimals_down(number, decimals):
     factor = 10 ** decimals
     return math.floor(number * factor) / factor
 
+
+# ASYNC
+async def get_falconx_btc_price_quote_async(auth):
+    return await exchange_client.call_async(get_falconx_btc_price_quote, auth)
+
+async def get_all_falconx_accounts_async(auth):
+    return await exchange_client.call_async(get_all_falconx_accounts, auth)
+
+async def get_falconx_token_pairs_async(auth):
+    return await exchange_client.call_async(get_falconx_token_pairs, auth)
+
+async def place_falconx_market_order_async(auth, amount_usd, product_id, side, snapshot=None, quote=None):
+    return await exchange_client.call_async(place_falconx_market_order, auth, amount_usd, product_id, side, snapshot, quote)
+
+async def get_falconx_price_quote_async(auth, token_pair):
+    return await exchange_client.call_async(get_falconx_price_quote, auth, token_pair)
+
+async def gather_falconx_market_state(auth, snapshot=None, include_pairs=False, token_pair=('BTC', 'USD')):
+    """ Fetches the quote for "token_pair", every account balance (into "snapshot",
+    unless it is still fresh) and, if asked, the token pairs concurrently, so the
+    pre-trade data costs one round trip. """
+    snapshot = FalconXAccountSnapshot(auth) if snapshot is None else snapshot
+    requests_to_send = [get_falconx_price_quote_async(auth, token_pair)]
+    if snapshot.is_stale():
+        requests_to_send.append(exchange_client.call_async(snapshot.refresh))
+    if include_pairs:
+        requests_to_send.append(get_falconx_token_pairs_async(auth))
+    results = await asyncio.gather(*requests_to_send)
+    return {'quote': results[0], 'snapshot': snapshot, 'pairs': results[-1] if include_pairs else None}
+
+def get_falconx_market_state(auth, snapshot=None, include_pairs=False, token_pair=('BTC', 'USD')):
+    """ Synchronous wrapper of gather_falconx_market_state. """
+    return exchange_client.run_sync(gather_falconx_market_state(auth, snapshot, include_pairs, token_pair))
@@ -0,0 +1,234 @@
+###############################################################################
+# FILENAME: router.py
+# PROJECT: EOC CEFI Trading Bot Template
+# CLIENT:
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# DESCRIPTION: Best execution router. Requests quotes and balances from every
+#              configured venue in parallel, ranks the venues by price after
+#              fees and sends the market order to the best one.
+###############################################################################
+import math
+import time
+import datetime
+import functools
+import collections
+import concurrent.futures
+
+from utils import tracing
+from exchanges import falconx
+from exchanges import coinbase
+from config import config_params
+
+
+BALANCE_TOLERANCE = 1e-8    # btc, one satoshi of rounding between a fill and the venue balance
+
+
+# VENUES
+class FalconXVenue:
+    """ FalconX RFQ. Prices come from a quote for the traded side; the RFQ price is
+    all-in unless falconx_fees_in_quote is off, then fee_bps - rebate_bps is added. """
+
+    name = 'falconx'
+
+    def __init__(self, auth, snapshot=None):
+        self.auth = auth
+        self.snapshot = falconx.FalconXAccountSnapshot(auth) if snapshot is None else snapshot
+
+    def quote_requests(self, side, amount_btc=None):
+        return {
+            'quote': functools.partial(falconx.get_falconx_quote, self.auth, side, amount_btc or 1),
+            'balances': self.snapshot.refresh,
+        }
+
+    def evaluate(self, side, results):
+        quote = results['quote']
+        price = float(quote['buy_price'] if side == 'buy' else quote['sell_price'])
+        fee_rate = 0.0 if config_params['falconx_fees_in_quote'] else (float(quote['fee_bps']) - float(quote.get('rebate_bps') or 0)) / 10000
+        return {
+            'price': price,
+            'fee_rate': fee_rate,
+            'usd_balance': float(self.snapshot.balance('USD')),
+            'btc_balance': float(self.snapshot.balance('BTC')),
+        }
+
+    def place_order(self, side, amount_usd, amount_btc, quote):
+        response = falconx.place_falconx_market_order(self.auth, amount_usd if side == 'buy' else amount_btc, ['BTC', 'USD'], side, self.snapshot, quote['price'])
+        if not isinstance(response, dict):
+            raise RuntimeError('FalconX order not filled: ' + str(response))
+        if side == 'buy':
+            return {'usd_received': 0, 'btc_received': response['quantity_requested']['value'], 'price': response['buy_price'], 'response': response}
+        return {'usd_received': response['position_in']['value'], 'btc_received': 0, 'price': response['sell_price'], 'response': response}
+
+
+class CoinbaseVenue:
+    """ Coinbase Exchange. The oracle price plus the account's taker fee rate. """
+
+    name = 'coinbase'
+
+    def __init__(self, auth, usd_acct=None, btc_acct=None, product_id=None):
+        self.auth = auth
+        self.usd_acct = config_params['coinbase_usd_account_id'] if usd_acct is None else usd_acct
+        self.btc_acct = config_params['coinbase_btc_account_id'] if btc_acct is None else btc_acct
+        self.product_id = config_params['coinbase_product_id'] if product_id is None else product_id
+
+    def quote_requests(self, side, amount_btc=None):
+        return {
+            'price': functools.partial(coinbase.get_coinbase_btc_price_quote_coinbase, self.auth),
+            'fees': functools.partial(coinbase.get_coinbase_fee_rates, self.auth),
+            'usd_balance': functools.partial(coinbase.get_single_coinbase_account, self.auth, self.usd_acct),
+            'btc_balance': functools.partial(coinbase.get_single_coinbase_account, self.auth, self.btc_acct),
+        }
+
+    def evaluate(self, side, results):
+        return {
+            'price': float(results['price']),
+            'fee_rate': results['fees']['taker_fee_rate'],
+            'usd_balance': float(results['usd_balance']),
+            'btc_balance': float(results['btc_balance']),
+        }
+
+    def place_order(self, side, amount_usd, amount_btc, quote):
+        if side == 'sell':    # sized in btc, a price move before the fill cannot oversell the position
+            amount_btc = math.floor((quote['btc_balance'] if amount_btc is None else min(amount_btc, quote['btc_balance'])) * 1e8) / 1e8
+            response = coinbase.place_coinbase_market_order(self.auth, None, self.product_id, side, self.usd_acct, self.btc_acct, amount_btc=amount_btc)
+        else:
+            response = coinbase.place_coinbase_market_order(self.auth, amount_usd, self.product_id, side, self.usd_acct, self.btc_acct)
+        if not isinstance(response, dict) or 'filled_size' not in response:
+            raise RuntimeError('Coinbase order not filled: ' + str(response))
+        funds, size, fee = float(response.get('executed_value') or response['funds']), float(response['filled_size']), float(response['fill_fees'])
+        if side == 'buy':
+            return {'usd_received': 0, 'btc_received': size, 'price': funds / size, 'response': response}
+        return {'usd_received': funds - fee, 'btc_received': 0, 'price': funds / size, 'response': response}
+
+
+VENUES = {
+    'falconx': FalconXVenue,
+    'coinbase': CoinbaseVenue,
+}
+
+
+# ROUTER
+def effective_price(side, price, fee_rate):
+    """ USD paid per BTC bought, or received per BTC sold, after fees. """
+
+    return price * (1 + fee_rate) if side == 'buy' else price * (1 - fee_rate)
+
+
+class BestExecutionRouter:
+    """ Routes market orders to the venue with the best price after fees. Every
+    venue's quote and balance requests are sent at once; whatever has not answered
+    within "deadline" seconds is left out of the decision, so one slow venue
+    cannot stall the order. Per venue quote latencies are kept in quote_log. """
+
+    def __init__(self, venues, deadline=None, max_log_entries=1000):
+        if not venues:
+            raise ValueError('The router needs at least one venue.')
+        self.venues = {venue.name: venue for venue in venues}
+        self.deadline = config_params['quote_deadline_seconds'] if deadline is None else deadline
+        self.quote_log = collections.deque(maxlen=max_log_entries)
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=config_params['exchange_pool_size'], thread_name_prefix='router')
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _timed(function, start):
+        result = function()
+        return time.perf_counter() - start, result
+
+    def collect_quotes(self, side, amount_btc=None):
+        """ Returns {venue name: quote} for the venues that answered every request in
+        time. A quote holds price, fee_rate, effective_price, usd_balance,
+        btc_balance and latency (seconds until the venue's last answer). Late
+        answers are dropped, the pool is not waited on. """
+
+        start = time.perf_counter()
+        futures = {}
+        for venue in self.venues.values():
+            for request_name, function in venue.quote_requests(side, amount_btc).items():
+                futures[self._pool.submit(tracing.in_current_context(self._timed), function, start)] = (venue.name, request_name)
+        done, not_done = concurrent.futures.wait(futures, timeout=self.deadline)
+
+        results = {name: {} for name in self.venues}
+        latencies = {name: 0.0 for name in self.venues}
+        status = {name: 'ok' for name in self.venues}
+        for future in not_done:
+            future.cancel()
+            status[futures[future][0]] = 'timeout'
+        for future in done:
+            venue_name, request_name = futures[future]
+            try:
+                latency, results[venue_name][request_name] = future.result()
+                latencies[venue_name] = max(latencies[venue_name], latency)
+            except Exception as e:
+                print('Quote request {} on {} failed: {}'.format(request_name, venue_name, e))
+                status[venue_name] = 'error'
+
+        quotes = {}
+        for name, venue in self.venues.items():
+            entry = {'time': datetime.datetime.utcnow(), 'venue': name, 'side': side, 'status': status[name], 'latency': latencies[name] if status[name] == 'ok' else time.perf_counter() - start}
+            if status[name] == 'ok':
+                quote = venue.evaluate(side, results[name])
+                quote['effective_price'] = effective_price(side, quote['price'], quote['fee_rate'])
+                quote['latency'] = latencies[name]
+                quotes[name] = quote
+                entry['effective_price'] = quote['effective_price']
+                print('{} {} quote: {:.2f} ({:.2f} after fees) in {:.1f}ms'.format(name, side, quote['price'], quote['effective_price'], quote['latency'] * 1000))
+            else:
+                print('{} {} quote: {} after {:.1f}ms, venue skipped'.format(name, side, status[name], entry['latency'] * 1000))
+            self.quote_log.append(entry)
+            tracing.record('quote:' + name, entry['latency'], status=status[name])
+        return quotes
+
+    def select_venue(self, side, quotes, amount_usd=None, amount_btc=None):
+        """ Best venue that can fill the order: the lowest effective price among
+        venues holding enough USD for a buy, the highest among venues holding the
+        BTC to sell ("amount_btc", any BTC when None) for a sell. """
+
+        if side == 'buy':
+            eligible = {name: quote for name, quote in quotes.items() if quote['usd_balance'] >= (amount_usd or 0) and quote['usd_balance'] > 0}
+            best = min(eligible, key=lambda name: eligible[name]['effective_price'], default=None)
+        elif side == 'sell':
+            eligible = {name: quote for name, quote in quotes.items() if quote['btc_balance'] >= (amount_btc or 0) - BALANCE_TOLERANCE and quote['btc_balance'] > 0}
+            best = max(eligible, key=lambda name: eligible[name]['effective_price'], default=None)
+        else:
+            raise ValueError('Unknown order side: ' + str(side))
+        if best is None:
+            raise RuntimeError('No venue quoted a {} within {}s with the balance to fill it (quotes: {}).'.format(side, self.deadline, sorted(quotes)))
+        return best
+
+    def route_market_order(self, side, amount_usd=None, amount_btc=None):
+        """ Quotes every venue, then places the market order on the best one. A buy
+        spends "amount_usd", a sell sells "amount_btc" (the whole position on the
+        venue when None). Returns the fill: venue, price, usd_received,
+        btc_received and the venue response. """
+
+        quotes = self.collect_quotes(side, amount_btc)
+        venue_name = self.select_venue(side, quotes, amount_usd, amount_btc)
+        print('Routing {} order to {}.'.format(side, venue_name))
+        fill = self.venues[venue_name].place_order(side, amount_usd, amount_btc, quotes[venue_name])
+        fill['venue'] = venue_name
+        return fill
+
+
+# SHARED ROUTER
+_router = None
+
+
+def get_best_execution_router(falconx_connection=None):
+    """ Returns the process wide router over config_params['execution_venues'],
+    creating it on first use. """
+
+    global _router
+    if _router is None:
+        venues = []
+        for venue_name in config_params['execution_venues']:
+            if venue_name not in VENUES:
+                raise ValueError('Unknown execution venue: ' + str(venue_name))
+            if venue_name == 'falconx':
+                venues.append(FalconXVenue(falconx.get_falconx_connection() if falconx_connection is None else falconx_connection))
+            else:
+                venues.append(CoinbaseVenue(coinbase.get_coinbase_connection()))
+        _router = BestExecutionRouter(venues)
+    return _router
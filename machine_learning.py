@@ -8,66 +8,175 @@
 import os
 import pandas as pd
 import numpy as np
-import h2o
-from google.cloud import storage
 import datetime
 import statistics as stats
 import math
 
-import utils.indicators
+import utils.features
+import utils.incremental
+from scoring.registry import get_model_registry, aggregate_predictions
+from scoring.cache import get_prediction_cache, row_fingerprint
 from config import config_params
 
 
 # FUNCTIONS
+def indicator_history_bars():
+    """ Number of latest bars the live indicators are computed from: the longest
+    lookback, the bar before it (for the differences) and indicator_warmup_bars for
+    the recursive indicators to settle, so the latest feature row matches the one
+    computed from the full history (sweep, backtest, incremental state). """
+
+    return max(config_params['lookback_periods']) + 1 + config_params['indicator_warmup_bars']
+
+
 def calculate_indicators(ohlc_df):
     """ Uses the input ohlc time history to calculate indicator values for all the
     lookback periods specified in the project config file. """
 
     # FORMAT INPUT DATA
-    finage_df = ohlc_df.copy()
+    finage_df = ohlc_df.iloc[-indicator_history_bars():].copy()    # clip input ohlc dataset to the lookback plus warm-up to speed up indicator calcs
     finage_df.columns = config_params['ohlc_file_column_list']
-    finage_df['Time'] = finage_df['Time'].apply(lambda x: datetime.datetime.strptime(x, '%Y-%m-%d %H:%M:%S'))   
-    finage_df = finage_df.iloc[-max(config_params['lookback_periods']):]    # clip input ohlc dataset to minimum size to speed up indicator calcs
-    master_df = finage_df.copy()
+    finage_df['Time'] = pd.to_datetime(finage_df['Time'], format='%Y-%m-%d %H:%M:%S')    # vectorized, passes through columns that are already datetimes
 
     # ADD INDICATORS
     print('Calculating indicators... [' + str(datetime.datetime.utcnow()) + ']')
-    # FIXME: magic goes here...
+    feature_matrix, column_names = utils.features.calculate_features(    # every indicator x lookback in one numpy pass
+        utils.features.ohlcv_arrays(finage_df),
+        config_params['lookback_periods'],
+        config_params['indicator_list'],
+        standard_deviation=config_params['standard_deviation'],
+    )
+    master_df = pd.concat([finage_df, utils.features.features_to_df(feature_matrix, column_names, index=finage_df.index)], axis=1)    # single conversion back to pandas
     
     return master_df
 
 
+def calculate_latest_indicators(price_store):
+    """ Live counterpart of calculate_indicators. Loads the saved incremental indicator
+    state, applies only the bars of "price_store" newer than the last one it has seen,
+    saves the state back and returns the latest bar with its indicator values as a
+    one row data frame. The state is rebuilt from the last indicator_history_bars()
+    bars when none is saved yet or the indicator config has changed. """
+
+    engine = load_indicator_engine()
+    master_df = update_indicator_engine_from_store(engine, price_store)
+    engine.save(config_params['indicator_state_path'])
+
+    return master_df
+
+
+def load_indicator_engine(path=None):
+    """ The incremental indicator state saved at "path" (indicator_state_path by
+    default), or a new empty engine when none is saved yet or the indicator config
+    has changed. A state file that cannot be read (e.g. truncated by a crash) is
+    rebuilt as well, so it can never keep the bot down. """
+
+    path = config_params['indicator_state_path'] if path is None else path
+    if path and os.path.exists(path):
+        try:
+            engine = utils.incremental.IncrementalFeatureEngine.load(path)
+        except (ValueError, KeyError, TypeError) as e:    # json.JSONDecodeError is a ValueError
+            print('Indicator state at ' + path + ' could not be loaded (' + str(e) + '), rebuilding incremental indicator state...')
+        else:
+            if engine.matches_config(config_params['lookback_periods'], config_params['indicator_list'], config_params['standard_deviation']):
+                return engine
+            print('Indicator config changed, rebuilding incremental indicator state...')
+    return utils.incremental.IncrementalFeatureEngine(config_params['lookback_periods'], config_params['indicator_list'], config_params['standard_deviation'])
+
+
+def new_indicator_bars(engine, price_store):
+    """ The bars of "price_store" "engine" has not applied yet: every bar after its
+    last one, or the last indicator_history_bars() bars for a new engine. Empty when
+    the engine is up to date. """
+
+    if engine.last_unix is None:
+        return price_store.tail(min(indicator_history_bars(), len(price_store)))
+    return price_store.read_range(start_index=engine.last_unix + 1)
+
+
+def update_indicator_engine_from_store(engine, price_store):
+    """ Applies the bars of "price_store" "engine" has not seen and returns the latest
+    bar with its indicator values as a one row data frame. When the engine is already
+    up to date (e.g. a retried run) the latest row is returned as it is. """
+
+    new_bars_df = new_indicator_bars(engine, price_store)
+    return update_indicator_engine(engine, new_bars_df if len(new_bars_df) else price_store.tail(1))
+
+
+def update_indicator_engine(engine, ohlc_df):
+    """ Applies the bars of "ohlc_df" newer than the last one "engine" has seen (all of
+    them for a new engine) and returns the latest bar with its indicator values as a
+    one row data frame. The engine is updated in memory only. """
+
+    finage_df = ohlc_df.set_axis(config_params['ohlc_file_column_list'], axis=1)
+    new_bars_df = finage_df if engine.last_unix is None else finage_df[finage_df['Unix'] > engine.last_unix]    # only bars the state has not seen yet
+
+    print('Updating indicators with ' + str(len(new_bars_df)) + ' new bar(s)... [' + str(datetime.datetime.utcnow()) + ']')
+    latest = engine.warm_up(utils.features.ohlcv_arrays(new_bars_df), unix=new_bars_df['Unix'].to_numpy())
+
+    master_df = finage_df.iloc[[-1]].copy()
+    master_df['Time'] = pd.to_datetime(master_df['Time'], format='%Y-%m-%d %H:%M:%S')
+    for column_name, value in latest.items():
+        master_df[column_name] = value
+
+    return master_df
+
+
 def apply_online_machine_learning(prediction_input_df):
-    """ Use h2o to calculate model predictions values by connecting to their servers online. """
+    """ Use h2o to calculate model predictions values for the latest feature row. Every
+    model in h2o_model_dict is scored concurrently through the model registry; models
+    that fail or time out are reported and left out of the ensemble aggregates.
+    Predictions already made for the same feature row by the same model artifact
+    (e.g. a retried run) come from the prediction cache instead. """
 
-    # RUN H2O
-    # Initialize connection
-    h2o.init()
+    return score_feature_rows(prediction_input_df.iloc[[-1]])[0]
 
-    # Load indicators
-    observations = h2o.import_file(path=config_params['indicator_output_path'], destination_frame='observations')
 
-    # Load models
-    # Model 1
-    model1 = h2o.import_mojo(config_params['h2o_model_dict']['model1'])
-    model1_predictions = model1.predict(observations)
-    # FIXME: additional models go here with same pattern
+def score_feature_rows(features_df):
+    """ Batched counterpart of apply_online_machine_learning: one prediction dict
+    (model values, ensemble aggregates and model_latencies) per row of "features_df",
+    e.g. the latest row of every traded pair. Each model scores all the rows it has
+    no cached prediction for in a single call. """
+
+    # CHECK CACHE
+    cache = get_prediction_cache()
+    fingerprints = [row_fingerprint(row) for _, row in features_df.iterrows()]
+    identities = {model_name: cache.check_model(model_name, model_path) for model_name, model_path in config_params['h2o_model_dict'].items()}
+    prediction_dicts = [{} for _ in fingerprints]
+    missing = {}    # model name -> positions of the rows it still has to score
+    for model_name, identity in identities.items():
+        for i, fingerprint in enumerate(fingerprints):
+            value = cache.get(model_name, identity, fingerprint)
+            if value is None:
+                missing.setdefault(model_name, []).append(i)
+            else:
+                prediction_dicts[i][model_name] = value
+
+    # RUN MODELS
+    registry = get_model_registry()
+    report = {model_name: {'status': 'cached', 'latency': 0.0, 'error': None} for model_name in identities if model_name not in missing}
+    if missing:
+        rows_to_score = sorted(set(i for rows in missing.values() for i in rows))
+        row_positions = {i: position for position, i in enumerate(rows_to_score)}
+        predictions, scored_report = registry.score(features_df.iloc[rows_to_score], list(missing))
+        report.update(scored_report)
+        for model_name, rows in missing.items():
+            for i in rows:
+                if model_name in predictions:
+                    prediction_dicts[i][model_name] = float(predictions[model_name][row_positions[i]])
+                    cache.put(model_name, identities[model_name], fingerprints[i], prediction_dicts[i][model_name], report[model_name]['latency'] / len(rows_to_score))
+                else:
+                    prediction_dicts[i][model_name] = np.nan
+    for model_name, entry in report.items():
+        print('{}: {} in {:.3f}s{}'.format(model_name, entry['status'], entry['latency'], '' if entry['error'] is None else ' (' + entry['error'] + ')'))
+    print('Prediction cache: {hits} hits, {misses} misses, ~{seconds_saved:.3f}s of scoring saved'.format(**cache.stats()))
 
     # Extract and output predictions
-    prediction_df = pd.DataFrame()
-    prediction_df['model1'] = model1_predictions.as_data_frame()['p1']
-    # FIXME: additional model predictions go here with same pattern
-    prediction_list = [
-        prediction_df['model'].iloc[-1],
-        # FIXME: additional model predictions go here with same pattern
-    ]
-
-    prediction_dict = {
-        'model1': prediction_df['model1'].iloc[-1],
-        # FIXME: additional model predictions go here with same pattern
-        'mean': stats.mean(prediction_list),
-        'median': stats.median(prediction_list),
-    }
-    
-    return prediction_dict
+    results = []
+    for prediction_dict in prediction_dicts:
+        prediction_dict = {model_name: prediction_dict[model_name] for model_name in identities}    # registry order
+        prediction_dict.update(aggregate_predictions(prediction_dict, registry.weights, config_params['ensemble_trim_fraction']))
+        prediction_dict['model_latencies'] = {model_name: report[model_name]['latency'] for model_name in identities}
+        results.append(prediction_dict)
 
+    return results
@@ -0,0 +1,184 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: multi_symbol.py
+# DESCRIPTION: Runs one trading cycle over a universe of token pairs. Bars and
+#              features are loaded for the pairs concurrently, every pair is
+#              scored in one batched model call and the strategy is evaluated
+#              for the pairs concurrently over the shared exchange sessions.
+###############################################################################
+import datetime
+import concurrent.futures
+import pandas as pd
+
+from exchanges.falconx import get_falconx_connection, FalconXAccountSnapshot
+from exchanges import client as exchange_client
+from machine_learning import calculate_indicators, indicator_history_bars, score_feature_rows, load_indicator_engine, update_indicator_engine_from_store
+from scoring.registry import get_model_registry
+from strategy import apply_strategy
+from performance import evaluate_performance
+from utils.storage import ColumnStore
+from utils import tracing
+from config import config_params
+
+
+# PAIRS
+def pair_name(token_pair):
+    return token_pair[0] + '-' + token_pair[1]
+
+
+def pair_path(template, token_pair):
+    """ Fills the {base} and {quote} placeholders of a universe_* config path. """
+
+    return template.format(base=token_pair[0], quote=token_pair[1])
+
+
+def load_pair(token_pair, engine=None):
+    """ Latest price bars, bot log and latest feature row of one pair. The bars come
+    from the pair's column stores as in run(). Indicators are computed pair by pair
+    because the recursive ones (ema, Wilder smoothing) must not carry one pair's
+    state into the next pair's bars. With "engine" (the pair's incremental
+    indicators from prewarm_universe) only the bars it has not seen are applied. """
+
+    price_store = ColumnStore(pair_path(config_params['universe_price_store_path'], token_pair))
+    price_store.sync_csv(pair_path(config_params['universe_price_file_path'], token_pair))
+    price_df = price_store.tail(indicator_history_bars())
+    history_store = ColumnStore(pair_path(config_params['universe_log_store_path'], token_pair))
+    history_store.sync_csv(pair_path(config_params['universe_log_file_path'], token_pair))
+    history_df = history_store.read_all()
+    if engine is None:
+        feature_row = calculate_indicators(price_df).iloc[[-1]]
+    else:
+        feature_row = update_indicator_engine_from_store(engine, price_store)
+    feature_row.index = [pair_name(token_pair)]
+    return price_df, history_df, feature_row
+
+
+def engine_path(token_pair):
+    """ Saved incremental indicator state of one pair, or '' when not configured. """
+
+    return pair_path(config_params['universe_indicator_state_path'], token_pair) if config_params['universe_indicator_state_path'] else ''
+
+
+# PRE-WARM
+def prewarm_universe(universe=None, max_workers=None):
+    """ Everything of a universe cycle that does not depend on the closing bar, run
+    ahead of the deadline by the event scheduler: opens the FalconX session, syncs
+    every pair's stores, brings every pair's incremental indicators up to its last
+    bar (from its saved state when universe_indicator_state_path is set) and scores
+    the resulting feature rows once so the models are loaded. Returns a dict of
+    token pair -> indicator engine for run_universe; a pair that fails is reported
+    and left out, it is computed in batch at the deadline. """
+
+    universe = [tuple(token_pair) for token_pair in (config_params['universe'] if universe is None else universe)]
+    max_workers = max_workers or config_params['universe_max_workers']
+
+    def prewarm_pair(token_pair):
+        engine = load_indicator_engine(engine_path(token_pair))
+        return engine, load_pair(token_pair, engine)[2]
+
+    print('Pre-warming {} pairs... [{}]'.format(len(universe), datetime.datetime.utcnow()))
+    with tracing.trace('prewarm_universe', pairs=len(universe)) as prewarm_span:
+        with tracing.span('exchanges'):
+            exchange_client.get_session('falconx')
+        engines, feature_rows = {}, []
+        with tracing.span('data'):
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pair') as pool:
+                futures = {pool.submit(tracing.in_current_context(prewarm_pair), token_pair): token_pair for token_pair in universe}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        engines[futures[future]], feature_row = future.result()
+                        feature_rows.append(feature_row)
+                    except Exception as e:
+                        print('{} not pre-warmed: {}'.format(pair_name(futures[future]), e))
+        if feature_rows:
+            with tracing.span('models', rows=len(feature_rows)):
+                predictions, report = get_model_registry().score(pd.concat(feature_rows))
+            for model_name, entry in report.items():
+                print('{} warmed: {} in {:.3f}s'.format(model_name, entry['status'], entry['latency']))
+
+    print('{} of {} pairs warm in {:.3f}s [{}]'.format(len(engines), len(universe), prewarm_span.duration, datetime.datetime.utcnow()))
+    return engines
+
+
+# RUNNER
+def run_universe(universe=None, max_workers=None, engines=None):
+    """ One trading cycle over every pair of "universe" (config_params['universe'] by
+    default). A pair whose data or strategy fails is reported and skipped, the
+    other pairs still trade. All pairs share one FalconX account snapshot, so the
+    balances are fetched once per cycle (and again after each fill). "engines"
+    (token pair -> incremental indicators, see prewarm_universe) leaves only the
+    new bars to apply for those pairs. Returns a dict of pair name -> strategy
+    result df. """
+
+    universe = [tuple(token_pair) for token_pair in (config_params['universe'] if universe is None else universe)]
+    if not universe:
+        raise ValueError('No token pairs to trade, set config_params["universe"].')
+    max_workers = max_workers or config_params['universe_max_workers']
+    engines = {} if engines is None else engines
+
+    print('Trading {} pairs... [{}]'.format(len(universe), datetime.datetime.utcnow()))
+    with tracing.trace('universe', pairs=len(universe)) as run_span:
+        with tracing.span('exchanges'):
+            falconx_connection = get_falconx_connection()
+            account_snapshot = FalconXAccountSnapshot(falconx_connection)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pair') as pool:
+            # Load data and features
+            with tracing.span('data') as data_span:
+                balances_future = pool.submit(tracing.in_current_context(account_snapshot.refresh))    # overlaps the data loading
+                loaded = {}
+                futures = {pool.submit(tracing.in_current_context(load_pair), token_pair, engines.get(token_pair)): token_pair for token_pair in universe}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        loaded[futures[future]] = future.result()
+                    except Exception as e:
+                        print('Skipping {}: data not loaded ({})'.format(pair_name(futures[future]), e))
+                data_span.set(pairs_loaded=len(loaded))
+
+            # Apply machine learning
+            token_pairs = [token_pair for token_pair in universe if token_pair in loaded]
+            if not token_pairs:
+                raise RuntimeError('No pair data could be loaded.')
+            with tracing.span('model_predictions', rows=len(token_pairs)):
+                ml_dicts = dict(zip(token_pairs, score_feature_rows(pd.concat([loaded[token_pair][2] for token_pair in token_pairs]))))
+
+            # Apply strategy
+            with tracing.span('strategy') as strategy_span:
+                try:
+                    balances_future.result()
+                except Exception as e:
+                    print('Account balances not prefetched ({}), fetching on first use.'.format(e))
+                futures = {
+                    pool.submit(tracing.in_current_context(apply_strategy), falconx_connection, loaded[token_pair][0], loaded[token_pair][1], ml_dicts[token_pair], account_snapshot=account_snapshot, token_pair=token_pair): token_pair
+                    for token_pair in token_pairs
+                }
+                results = {}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        results[futures[future]] = future.result()
+                    except Exception as e:
+                        print('Strategy failed for {}: {}'.format(pair_name(futures[future]), e))
+                strategy_span.set(pairs_traded=len(results))
+
+        # Evaluate performance (one pair at a time, evaluate_performance shares a tmp dir)
+        with tracing.span('performance'):
+            for token_pair, engine in engines.items():
+                if engine_path(token_pair):
+                    engine.save(engine_path(token_pair))
+            for token_pair, strategy_result_df in results.items():
+                evaluate_performance(
+                    strategy_result_df,
+                    pair_path(config_params['universe_output_log_file_path'], token_pair),
+                    pair_path(config_params['universe_output_log_file_temp_path'], token_pair),
+                )
+
+    print('\nUniverse run complete, {} of {} pairs traded! [{}]'.format(len(results), len(universe), datetime.datetime.utcnow()))
+    tracing.print_summary(run_span)
+    return {pair_name(token_pair): strategy_result_df for token_pair, strategy_result_df in results.items()}
+
+
+# ENTRY POINT
+if __name__ == '__main__':
+    run_universe()
@@ -10,23 +10,19 @@ import shutil
 import pandas as pd
 import datetime
 
-from google.cloud import storage
-
+from utils import cloud_storage
 from config import config_params
 
 
-def evaluate_performance(df):
-    """ Evaluate the performance of an individual trading bot. """
-
-    # Setup cloud connection
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(config_params['cloud_bucket_name'])
-
-    # Create dir for temp files if it doesn't already exist
-    if not os.path.exists(os.path.join(os.getcwd(), 'tmp')):    
-        os.mkdir(os.path.join(os.getcwd(), 'tmp'))
+def evaluate_performance(df, output_log_file_path=None, output_log_file_temp_path=None, journal=None, uploader=None):
+    """ Evaluate the performance of an individual trading bot. The log is written to
+    the output_log_file_* config paths unless other ones are passed (one per pair
+    when trading a universe). With a "journal" (utils/journal.py) only the rows the
+    journal does not have yet (row numbers from len(journal) on) are appended to it
+    and "uploader" ships them in the background, instead of the whole log being
+    rewritten and uploaded. """
 
-    # Evaluate individual results and output to cloud
+    # Evaluate individual results
     df.loc[df['action'] == 'Sell', 'trade_net_profit'] = pd.to_numeric(df['usd_received'])  - config_params['bet']
     df.loc[df['action'] == 'Buy', 'trade_net_profit'] = 0   
     df.loc[df['action'] == 'Hold', 'trade_net_profit'] = 0   
@@ -37,21 +33,34 @@ def evaluate_performance(df):
     df.loc[(df['action'] == 'Sell') & (df['trade_net_profit'] > 0), 'trade_win_or_loss'] = 'Win'
     df.loc[(df['action'] == 'Sell') & (df['trade_net_profit'] < 0), 'trade_win_or_loss'] = 'Loss'
 
+    # Append new rows to the journal and output to cloud in the background
+    if journal is not None:
+        new_rows_df = df[df.index >= len(journal)].copy()
+        last_row_df = journal.tail()
+        running_trade_net_profit = pd.to_numeric(last_row_df['running_trade_net_profit']).fillna(0).sum()    # 0 for an empty journal
+        new_rows_df['running_trade_net_profit'] = running_trade_net_profit + new_rows_df['trade_net_profit'].cumsum()
+        journal.append(new_rows_df)
+        if uploader is not None:
+            uploader.notify()
+        return
+
     # Calculate running balances
     df['running_trade_net_profit'] = df['trade_net_profit'].cumsum()
 
-    # Create cloud blob
-    blob = bucket.blob(config_params['output_log_file_path'])
+    # Create dir for temp files if it doesn't already exist
+    if not os.path.exists(os.path.join(os.getcwd(), 'tmp')):    
+        os.mkdir(os.path.join(os.getcwd(), 'tmp'))
 
     # Create local file
-    local_file = config_params['output_log_file_temp_path']
+    local_file = config_params['output_log_file_temp_path'] if output_log_file_temp_path is None else output_log_file_temp_path
     df.to_csv(local_file, index=False)
 
     # Upload to cloud
     if config_params['in_production'] or config_params['output_results_to_cloud']:
         print('Writing results to cloud... [' + str(datetime.datetime.utcnow()) + ']')
+        bucket = cloud_storage.get_storage_client().bucket(config_params['cloud_bucket_name'])
+        blob = bucket.blob(config_params['output_log_file_path'] if output_log_file_path is None else output_log_file_path)
         blob.upload_from_filename(local_file)   
 
     # Tear down temp dir
     shutil.rmtree(os.path.join(os.getcwd(), 'tmp'))
-
@@ -15,9 +15,15 @@ import pandas as pd
 import numpy as np
 
 from exchanges.falconx import get_falconx_connection
-from machine_learning import apply_offline_machine_learning, apply_online_machine_learning, calculate_indicators
+from exchanges.router import get_best_execution_router
+from machine_learning import apply_online_machine_learning, calculate_indicators, calculate_latest_indicators, indicator_history_bars
 from strategy import apply_strategy
 from performance import evaluate_performance
+from multi_symbol import run_universe
+from scheduler import EventScheduler
+from utils.storage import ColumnStore
+from utils.journal import get_trade_journal, get_journal_uploader, load_log_context
+from utils import tracing
 from config import config_params
 
 
@@ -29,77 +35,86 @@ def alive():
     print(config_params['name'] + ' - ' + config_params['version'] + ' is busy printing money... [' + str(datetime.datetime.utcnow()) + ']')
 
 
+def read_log(history_store):
+    history_store.sync_csv(config_params['input_log_file_path'])
+    return history_store.read_all()
+
+
 def run():
 
-    runtime_dict = {}    # place to log the runtimes for each section of interest in the bot
     current_hour = int(datetime.datetime.utcnow().hour)
     
     if current_hour in config_params['execution_hours']:    
 
         print(config_params['name'] + ' - ' + config_params['version'] + ' is scheduled to run this hour! [' + str(datetime.datetime.utcnow()) + ']')
 
-        # Connect exchanges
-        print('\nConnecting exchanges... [' + str(datetime.datetime.utcnow()) + ']')
-        runtime_dict['start_exchanges'] = datetime.datetime.utcnow()
-        falconx_connection = get_falconx_connection()
-        runtime_dict['end_exchanges'] = datetime.datetime.utcnow()
-        runtime_dict['exchange_runtime'] = runtime_dict['end_exchanges'] - runtime_dict['start_exchanges']
-
-        # Connect data files
-        print('Connecting data... [' + str(datetime.datetime.utcnow()) + ']')
-        runtime_dict['start_data'] = datetime.datetime.utcnow()
-        price_df = pd.read_csv(config_params['input_price_file_path'])    # price data for log file 
-        history_df = pd.read_csv(config_params['input_log_file_path'])    # historical bot output file
-        runtime_dict['end_data'] = datetime.datetime.utcnow()
-        runtime_dict['data_runtime'] = runtime_dict['end_data'] - runtime_dict['start_data']
-
-        # # Apply machine learning
-        print('Applying machine learning... [' + str(datetime.datetime.utcnow()) + ']')
-
-        runtime_dict['start_indicators'] = datetime.datetime.utcnow()    # generate indicators
-        indicator_df = calculate_indicators(
-            price_df
-        )
-        runtime_dict['end_indicators'] = datetime.datetime.utcnow()
-
-        runtime_dict['start_h2o_model_predictions'] = datetime.datetime.utcnow()    # run ml
-        ml_dict = apply_machine_learning(
-            indicator_df,
-        )
-        runtime_dict['end_h2o_model_predictions'] = datetime.datetime.utcnow()
-
-        runtime_dict['total_indicator_calculation_runtime'] = runtime_dict['end_indicators'] - runtime_dict['start_indicators']    # runtime calcs
-        runtime_dict['total_h2o_runtime'] = runtime_dict['end_h2o_model_predictions'] - runtime_dict['start_h2o_online_model_predictions']
-        runtime_dict['total_machine_learning_runtime'] = runtime_dict['end_h2o_model_predictions'] - runtime_dict['start_indicators']
-
-        # Apply strategy
-        print('Applying strategy... [' + str(datetime.datetime.utcnow()) + ']')
-        runtime_dict['start_strategy'] = datetime.datetime.utcnow()
-        strategy_result_df = apply_strategy(
-            falconx_connection,
-            price_df,
-            history_df,
-            offline_ml_dict,
-        )
-        runtime_dict['end_strategy'] = datetime.datetime.utcnow()
-        runtime_dict['strategy_runtime'] = runtime_dict['end_strategy'] - runtime_dict['start_strategy']
-
-        # Evaluate performance
-        print('Evaluating performance... [' + str(datetime.datetime.utcnow()) + ']')
-        runtime_dict['start_performance'] = datetime.datetime.utcnow()
-        evaluate_performance(
-            strategy_result_df,
-        )
-        runtime_dict['end_performance'] = datetime.datetime.utcnow()
-        runtime_dict['performance_runtime'] = runtime_dict['end_performance'] - runtime_dict['start_performance']
-
-        # Log total runtime
-        runtime_dict['total_runtime'] = runtime_dict['end_performance'] - runtime_dict['start_exchanges']
+        if config_params['universe']:    # multi pair deployment, see multi_symbol.py
+            run_universe()
+            return
+
+        with tracing.trace('run') as run_span:    # stage timings, see utils/tracing.py
+
+            # Connect exchanges
+            print('\nConnecting exchanges... [' + str(datetime.datetime.utcnow()) + ']')
+            with tracing.span('exchanges'):
+                falconx_connection = get_falconx_connection()
+                router = get_best_execution_router(falconx_connection) if len(config_params['execution_venues']) > 1 else None    # best execution across venues
+
+            # Connect data files
+            print('Connecting data... [' + str(datetime.datetime.utcnow()) + ']')
+            with tracing.span('data') as data_span:
+                price_store = ColumnStore(config_params['price_store_path'])    # price data for log file 
+                price_store.sync_csv(config_params['input_price_file_path'])    # only reads the end of the csv once the store is populated
+                price_df = price_store.tail(indicator_history_bars())
+                history_store = ColumnStore(config_params['log_store_path'])    # historical bot output file
+                journal = get_trade_journal()    # append-only log, None when not configured
+                if journal is not None:
+                    history_df = load_log_context(journal, lambda: read_log(history_store))    # last row only
+                else:
+                    history_df = read_log(history_store)
+                data_span.set(price_rows=len(price_df), history_rows=len(history_df))
+
+            # Apply machine learning
+            print('Applying machine learning... [' + str(datetime.datetime.utcnow()) + ']')
+            with tracing.span('machine_learning'):
+                with tracing.span('indicators', rows=len(price_df)):    # generate indicators, one child span per indicator
+                    if config_params['indicator_state_path']:    # saved incremental state, only the bars since the last run are applied
+                        indicator_df = calculate_latest_indicators(
+                            price_store
+                        )
+                    else:
+                        indicator_df = calculate_indicators(
+                            price_df
+                        )
+                with tracing.span('model_predictions'):    # run ml, one child span per model
+                    ml_dict = apply_online_machine_learning(    # models stay loaded in the scoring service between runs
+                        indicator_df,
+                    )
+
+            # Apply strategy
+            print('Applying strategy... [' + str(datetime.datetime.utcnow()) + ']')
+            with tracing.span('strategy'):
+                strategy_result_df = apply_strategy(
+                    falconx_connection,
+                    price_df,
+                    history_df,
+                    ml_dict,
+                    router=router,
+                )
+
+            # Evaluate performance
+            print('Evaluating performance... [' + str(datetime.datetime.utcnow()) + ']')
+            with tracing.span('performance', rows=len(strategy_result_df)):
+                evaluate_performance(
+                    strategy_result_df,
+                    journal=journal,
+                    uploader=get_journal_uploader(),    # ships the new rows in the background
+                )
+
+        # Log runtimes
         print('\nRun complete! [' + str(datetime.datetime.utcnow()) + ']')
-        print('\nRuntime summary (H:MM:SS):')
-        for key, value in runtime_dict.items():
-            if 'runtime' in key:
-                print('{}: {}'.format(key, value))
+        print('\nRuntime summary:')
+        tracing.print_summary(run_span)
         print()
 
     else:   
@@ -107,12 +122,17 @@ def run():
 
 
 # ENTRY POINT
-if config_params['in_production']:
-    schedule.every(1).minutes.do(alive)    
-    schedule.every().hour.at(":01").do(run)    
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
-else:
-    run()
+if __name__ == '__main__':
+    if config_params['in_production']:
+        tracing.start_metrics_server()    # Prometheus /metrics
+    if config_params['in_production'] and config_params['scheduler'] == 'event':
+        EventScheduler().run_forever()    # pre-warms ahead of each execution hour
+    elif config_params['in_production']:
+        schedule.every(1).minutes.do(alive)    
+        schedule.every().hour.at(":01").do(run)    
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    else:
+        run()
 
@@ -0,0 +1,195 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: scheduler.py
+# DESCRIPTION: Event driven scheduler. Ahead of each execution hour it loads the
+#              data, brings the indicators up to the last closed bar and warms
+#              the models and exchange connections, so that once the bar closes
+#              only the new bar, one scoring call and the order are left.
+###############################################################################
+import time
+import datetime
+
+from exchanges.falconx import get_falconx_connection, get_falconx_token_pairs
+from exchanges.router import get_best_execution_router
+from machine_learning import load_indicator_engine, new_indicator_bars, update_indicator_engine, apply_online_machine_learning
+from multi_symbol import run_universe, prewarm_universe
+from strategy import apply_strategy
+from performance import evaluate_performance
+from scoring.registry import get_model_registry
+from utils.storage import ColumnStore
+from utils.journal import get_trade_journal, get_journal_uploader, load_log_context
+from utils import tracing
+from config import config_params
+
+
+HEARTBEAT_SECONDS = 60    # alive message while waiting
+
+
+# TIMING
+def next_deadline(now=None, execution_hours=None, offset_seconds=None):
+    """ Next bar close the bot trades on: the top of the next hour in
+    "execution_hours" (UTC) plus "offset_seconds". Returns a naive UTC datetime. """
+
+    now = datetime.datetime.utcnow() if now is None else now
+    execution_hours = config_params['execution_hours'] if execution_hours is None else execution_hours
+    offset = datetime.timedelta(seconds=config_params['deadline_offset_seconds'] if offset_seconds is None else offset_seconds)
+    if not execution_hours:
+        raise ValueError('No execution hours configured.')
+
+    candidate = now.replace(minute=0, second=0, microsecond=0)
+    for _ in range(24 * 2 + 1):
+        if candidate.hour in execution_hours and candidate + offset > now:
+            return candidate + offset
+        candidate += datetime.timedelta(hours=1)
+    raise ValueError('No valid execution hour in ' + str(execution_hours))
+
+
+def sleep_until(moment):
+    """ Sleeps until "moment" (naive UTC datetime), printing a heartbeat every
+    HEARTBEAT_SECONDS. """
+
+    while True:
+        remaining = (moment - datetime.datetime.utcnow()).total_seconds()
+        if remaining <= 0:
+            return
+        if remaining > HEARTBEAT_SECONDS:
+            print(config_params['name'] + ' - ' + config_params['version'] + ' is waiting for ' + str(moment) + ' [' + str(datetime.datetime.utcnow()) + ']')
+        time.sleep(min(remaining, HEARTBEAT_SECONDS))
+
+
+# PIPELINE
+class PrewarmedPipeline:
+    """ run() split in two. prewarm() does everything that does not depend on the
+    closing bar; run_deadline() waits for that bar and does the rest. """
+
+    def __init__(self):
+        self.falconx_connection = None
+        self.router = None
+        self.price_store = None
+        self.history_store = None
+        self.history_df = None
+        self.journal = None
+        self.engine = None
+        self.feature_row = None    # latest feature row as of prewarm
+        self.warmed_up_to = None    # unix of the last bar applied by prewarm
+
+    def prewarm(self):
+        print('Pre-warming pipeline... [' + str(datetime.datetime.utcnow()) + ']')
+        with tracing.trace('prewarm') as prewarm_span:
+
+            # Exchanges: signer, router and an open keep-alive connection
+            with tracing.span('exchanges'):
+                self.falconx_connection = get_falconx_connection()
+                self.router = get_best_execution_router(self.falconx_connection) if len(config_params['execution_venues']) > 1 else None
+                try:
+                    get_falconx_token_pairs(self.falconx_connection)    # cheap signed GET, leaves a connection open in the pool
+                except Exception as e:
+                    print('FalconX connection not warmed: ' + str(e))
+
+            # Data and indicators up to the last closed bar
+            with tracing.span('data') as data_span:
+                self.price_store = ColumnStore(config_params['price_store_path'])
+                self.price_store.sync_csv(config_params['input_price_file_path'])
+                self.history_store = ColumnStore(config_params['log_store_path'])
+                self.journal = get_trade_journal()    # append-only log, None when not configured
+                if self.journal is not None:
+                    self.history_df = load_log_context(self.journal, self.read_log)    # last row only
+                else:
+                    self.history_df = self.read_log()
+                data_span.set(history_rows=len(self.history_df))
+            with tracing.span('indicators') as indicator_span:
+                self.engine = load_indicator_engine()
+                new_bars_df = new_indicator_bars(self.engine, self.price_store)
+                self.feature_row = update_indicator_engine(self.engine, new_bars_df if len(new_bars_df) else self.price_store.tail(1))    # nothing new, the latest row as it is
+                self.warmed_up_to = self.engine.last_unix
+                indicator_span.set(rows=len(new_bars_df))
+
+            # Models: load the scorers and run them once
+            with tracing.span('models'):
+                predictions, report = get_model_registry().score(self.feature_row)
+            for model_name, entry in report.items():
+                print('{} warmed: {} in {:.3f}s'.format(model_name, entry['status'], entry['latency']))
+
+        print('Pipeline warm in {:.3f}s, indicators up to unix {} [{}]'.format(prewarm_span.duration, self.warmed_up_to, datetime.datetime.utcnow()))
+
+    def read_log(self):
+        self.history_store.sync_csv(config_params['input_log_file_path'])
+        return self.history_store.read_all()
+
+    def wait_for_bar(self, deadline):
+        """ Syncs the price store until it holds the bar that closes at "deadline"
+        (stamped deadline - bar_interval_seconds or later). Returns the bars not yet
+        applied to the indicators, empty when prewarm already applied the closing bar
+        (deadline_offset_seconds >= prewarm_seconds, or a late wake-up). Raises
+        RuntimeError when none arrives within bar_wait_timeout_seconds. """
+
+        expected_unix = int((deadline - datetime.datetime(1970, 1, 1)).total_seconds()) - config_params['bar_interval_seconds']
+        give_up_at = time.monotonic() + config_params['bar_wait_timeout_seconds']
+        while True:
+            self.price_store.sync_csv(config_params['input_price_file_path'])
+            if len(self.price_store) and self.price_store.last_index() >= expected_unix:
+                return self.price_store.read_range(start_index=self.engine.last_unix + 1)
+            if time.monotonic() > give_up_at:
+                raise RuntimeError('No bar for unix {} after {}s.'.format(expected_unix, config_params['bar_wait_timeout_seconds']))
+            time.sleep(config_params['bar_poll_interval_seconds'])
+
+    def run_deadline(self, deadline):
+        """ New bar -> indicators -> one scoring call -> strategy (order), then the
+        performance upload. Returns the strategy result df. """
+
+        with tracing.trace('deadline_run') as run_span:
+            with tracing.span('wait_for_bar'):
+                new_bars_df = self.wait_for_bar(deadline)
+
+            with tracing.span('bar_to_order', rows=len(new_bars_df)) as order_span:
+                with tracing.span('indicators', rows=len(new_bars_df)):
+                    if len(new_bars_df):
+                        feature_row = update_indicator_engine(self.engine, new_bars_df)
+                    else:    # the closing bar was applied by prewarm, its row is the latest
+                        feature_row = self.feature_row
+                        new_bars_df = self.price_store.tail(1)
+                with tracing.span('model_predictions'):
+                    ml_dict = apply_online_machine_learning(feature_row)
+                with tracing.span('strategy'):
+                    strategy_result_df = apply_strategy(self.falconx_connection, new_bars_df, self.history_df, ml_dict, router=self.router)
+                order_span.set(bar_close_to_order_seconds=(datetime.datetime.utcnow() - deadline).total_seconds())
+
+            with tracing.span('performance', rows=len(strategy_result_df)):    # after the order, off the critical path
+                self.engine.save(config_params['indicator_state_path'])
+                evaluate_performance(strategy_result_df, journal=self.journal, uploader=get_journal_uploader())
+
+        print('\nRun complete! [' + str(datetime.datetime.utcnow()) + ']')
+        tracing.print_summary(run_span)
+        return strategy_result_df
+
+
+# SCHEDULER
+class EventScheduler:
+    """ Sleeps until "prewarm_seconds" before each deadline, pre-warms, then runs the
+    pipeline as soon as the closing bar is in. A multi pair universe is pre-warmed
+    with prewarm_universe (stores, indicators, models and session of every pair)
+    and run through run_universe at the deadline. """
+
+    def __init__(self, pipeline=None, prewarm_seconds=None):
+        self.pipeline = PrewarmedPipeline() if pipeline is None else pipeline
+        self.prewarm_seconds = config_params['prewarm_seconds'] if prewarm_seconds is None else prewarm_seconds
+
+    def run_once(self):
+        deadline = next_deadline()
+        sleep_until(deadline - datetime.timedelta(seconds=self.prewarm_seconds))
+        try:
+            if config_params['universe']:
+                engines = prewarm_universe()
+                sleep_until(deadline)
+                return run_universe(engines=engines)
+            self.pipeline.prewarm()
+            sleep_until(deadline)
+            return self.pipeline.run_deadline(deadline)
+        except Exception as e:
+            print('Run for ' + str(deadline) + ' failed: ' + str(e) + ' [' + str(datetime.datetime.utcnow()) + ']')
+
+    def run_forever(self):
+        while True:
+            self.run_once()
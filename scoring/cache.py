@@ -0,0 +1,200 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: cache.py
+# DESCRIPTION: Prediction cache for the ML stage. Keyed by a fingerprint of the
+#              feature row plus the identity of the model artifact, with an in
+#              memory LRU tier and an optional sqlite tier on disk.
+###############################################################################
+import os
+import time
+import hashlib
+import sqlite3
+import collections
+import numpy as np
+
+from config import config_params
+
+
+HASH_CHUNK_BYTES = 2 ** 20    # read size when hashing model artifacts
+DISK_EVICTION_FRACTION = 0.1    # share of max_disk_entries evicted at once, so the disk tier is only counted and trimmed every that many inserts
+
+
+# FINGERPRINTS
+_artifact_hashes = {}    # path -> ((size, mtime_ns), sha256), so unchanged files are hashed once
+
+
+def model_identity(model_path):
+    """ sha256 of a model artifact's contents. Only re-hashed when the file's size or
+    modification time changes, so the check is a stat call on every other run. """
+
+    stat = os.stat(model_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    if model_path not in _artifact_hashes or _artifact_hashes[model_path][0] != signature:
+        digest = hashlib.sha256()
+        with open(model_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                digest.update(chunk)
+        _artifact_hashes[model_path] = (signature, digest.hexdigest())
+    return _artifact_hashes[model_path][1]
+
+
+def scoring_identity(model_path):
+    """ Identity of the predictions a model produces: the artifact hash plus the
+    scorer settings that change them (mojo_scorer, mojo_missing_columns). """
+
+    return ':'.join([model_identity(model_path), config_params['mojo_scorer'], config_params['mojo_missing_columns']])
+
+
+def row_fingerprint(features_row):
+    """ Stable hash of a feature row (a pandas Series or a dict of name -> value). Built
+    from the column names and the float64 bytes of the values, with every NaN
+    written the same way. Timestamps (e.g. the Time column) hash as epoch seconds. """
+
+    names = list(features_row.keys())
+    values = np.array([features_row[name].timestamp() if hasattr(features_row[name], 'timestamp') else features_row[name] for name in names], dtype=np.float64)
+    values[np.isnan(values)] = np.nan    # one canonical NaN bit pattern
+    digest = hashlib.sha256('\x1f'.join(str(name) for name in names).encode('utf-8'))
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+# CACHE
+class PredictionCache:
+    """ LRU cache of model predictions. An entry is keyed by model name, scoring
+    identity (artifact hash and scorer settings) and feature row fingerprint, so a
+    retrained or replaced model file, or a switch of scorer, never serves stale
+    predictions; entries of the old identity are dropped the first time the change
+    is seen. The optional disk tier keeps up to "max_disk_entries" entries between
+    processes; once it is full the least recently used are evicted in batches. """
+
+    def __init__(self, max_entries=10000, disk_path=None, max_disk_entries=1000000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.memory = collections.OrderedDict()    # (model_name, identity, fingerprint) -> prediction
+        self.identities = {}    # model_name -> last seen artifact hash
+        self.scoring_times = {}    # model_name -> mean seconds per scored row, for the savings estimate
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'seconds_saved': 0.0}
+
+        self.disk = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self.disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self.disk.execute('CREATE TABLE IF NOT EXISTS predictions (model_name TEXT, identity TEXT, fingerprint TEXT, prediction REAL, last_used REAL, PRIMARY KEY (model_name, identity, fingerprint))')
+            self.disk.commit()
+            self.disk_entries = self.disk.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]    # running count, an upper bound between evictions
+
+    def __len__(self):
+        return len(self.memory)
+
+    def check_model(self, model_name, model_path):
+        """ Returns the current scoring identity of a model, dropping its cached
+        entries (in memory and on disk) if the artifact or the scorer settings
+        changed since it was last seen. """
+
+        identity = scoring_identity(model_path)
+        previous = self.identities.get(model_name)
+        if previous is not None and previous != identity:
+            print('Model ' + model_name + ' or its scorer changed, invalidating its cached predictions')
+            for key in [key for key in self.memory if key[0] == model_name]:
+                del self.memory[key]
+            if self.disk is not None:
+                self.disk_entries -= self.disk.execute('DELETE FROM predictions WHERE model_name = ? AND identity != ?', (model_name, identity)).rowcount
+                self.disk.commit()
+            self.counters['invalidations'] += 1
+        self.identities[model_name] = identity
+        return identity
+
+    def get(self, model_name, identity, fingerprint):
+        """ Cached prediction or None. """
+
+        key = (model_name, identity, fingerprint)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self._record_hit('memory_hits', model_name)
+            return self.memory[key]
+
+        if self.disk is not None:
+            row = self.disk.execute('SELECT prediction FROM predictions WHERE model_name = ? AND identity = ? AND fingerprint = ?', key).fetchone()
+            if row is not None:
+                self.disk.execute('UPDATE predictions SET last_used = ? WHERE model_name = ? AND identity = ? AND fingerprint = ?', (time.time(),) + key)
+                self.disk.commit()
+                self._remember(key, row[0])    # promote to the memory tier
+                self._record_hit('disk_hits', model_name)
+                return row[0]
+
+        self.counters['misses'] += 1
+        return None
+
+    def put(self, model_name, identity, fingerprint, prediction, scoring_time=None):
+        """ Stores a prediction. "scoring_time" (seconds it took to compute) feeds the
+        estimate of time saved by later hits. """
+
+        key = (model_name, identity, fingerprint)
+        self._remember(key, float(prediction))
+        if scoring_time is not None:
+            previous = self.scoring_times.get(model_name, scoring_time)
+            self.scoring_times[model_name] = 0.9 * previous + 0.1 * scoring_time
+
+        if self.disk is not None:
+            self.disk.execute('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)', key + (float(prediction), time.time()))
+            self.disk_entries += 1    # a replaced entry is counted twice until the next recount
+            if self.disk_entries > self.max_disk_entries:
+                self._evict_disk()
+            self.disk.commit()
+
+    def _remember(self, key, prediction):
+        self.memory[key] = prediction
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def _evict_disk(self):
+        """ Recounts the disk tier and, if it is over the eviction target, trims it
+        to the target (least recently used first). """
+
+        count = self.disk.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+        target = int(self.max_disk_entries * (1 - DISK_EVICTION_FRACTION))
+        if count > target:
+            self.disk.execute('DELETE FROM predictions WHERE rowid IN (SELECT rowid FROM predictions ORDER BY last_used LIMIT ?)', (count - target,))
+            self.counters['evictions'] += count - target
+            count = target
+        self.disk_entries = count
+
+    def _record_hit(self, counter, model_name):
+        self.counters[counter] += 1
+        self.counters['seconds_saved'] += self.scoring_times.get(model_name, 0.0)
+
+    def stats(self):
+        """ Hit / miss counters, hit rate and the estimated scoring time saved. """
+
+        hits = self.counters['memory_hits'] + self.counters['disk_hits']
+        lookups = hits + self.counters['misses']
+        return dict(self.counters, hits=hits, hit_rate=hits / lookups if lookups else 0.0, entries=len(self.memory))
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.execute('DELETE FROM predictions')
+            self.disk.commit()
+            self.disk_entries = 0
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+
+# SHARED INSTANCE
+_cache = None
+
+
+def get_prediction_cache():
+    """ Returns the process wide prediction cache configured in config.py. """
+
+    global _cache
+    if _cache is None:
+        _cache = PredictionCache(config_params['prediction_cache_size'], config_params['prediction_cache_path'] or None, config_params['prediction_cache_disk_size'])
+    return _cache
@@ -0,0 +1,162 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: mojo_service.py
+# DESCRIPTION: Long-lived H2O MOJO scoring service. Starts H2O and loads every
+#              configured model once, then scores in-memory feature rows.
+###############################################################################
+import time
+import datetime
+import pandas as pd
+
+from config import config_params
+from scoring.numpy_mojo import NumpyScoringService
+
+
+class MojoScoringService:
+    """ Keeps an H2O connection and every MOJO in "model_dict" loaded between runs so
+    each prediction is a single in-memory upload plus one predict call per model,
+    instead of an h2o.init(), a csv round trip and a model import every run. """
+
+    def __init__(self, model_dict, jar_dict=None):
+        self.model_dict = dict(model_dict)
+        self.jar_dict = dict(jar_dict or {})    # genmodel jars, only needed by the offline (h2o.mojo_predict_pandas) path
+        self.models = {}
+        self.load_runtimes = {}
+        self.started_at = None
+
+    # LIFECYCLE
+    def start(self):
+        """ Starts (or attaches to) the local H2O cluster and loads every model. """
+
+        if self.started_at is not None:
+            return self
+
+        import h2o    # imported here so numpy scorer deployments and non-scoring entry points never load it
+        print('Starting MOJO scoring service... [' + str(datetime.datetime.utcnow()) + ']')
+        h2o.init()
+        for model_name, model_path in self.model_dict.items():
+            start = time.perf_counter()
+            self.models[model_name] = h2o.import_mojo(model_path)
+            self.load_runtimes[model_name] = time.perf_counter() - start
+        self.started_at = datetime.datetime.utcnow()
+        return self
+
+    def shutdown(self):
+        """ Unloads the models and shuts the H2O cluster down. """
+
+        if self.started_at is None:
+            return
+        import h2o
+        print('Shutting down MOJO scoring service... [' + str(datetime.datetime.utcnow()) + ']')
+        try:
+            h2o.remove_all()
+            h2o.cluster().shutdown()
+        except Exception as e:    # cluster already gone, nothing left to release
+            print('H2O shutdown failed: ' + str(e))
+        self.models = {}
+        self.started_at = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    # SCORING
+    def predict(self, features_df):
+        """ Scores the rows of "features_df" with every loaded model. Returns a dict of
+        model name -> array of class 1 probabilities (or raw predictions for
+        regression models), one value per input row. """
+
+        if self.started_at is None:
+            raise RuntimeError('Scoring service is not started')
+
+        import h2o
+        observations = h2o.H2OFrame(features_df)    # uploaded once, shared by every model
+        predictions = {}
+        for model_name, model in self.models.items():
+            predictions[model_name] = self._predict_frame(model, observations)
+        h2o.remove(observations)
+        return predictions
+
+    def predict_model(self, model_name, features_df):
+        """ Scores the rows of "features_df" with a single model. """
+
+        if self.started_at is None:
+            raise RuntimeError('Scoring service is not started')
+
+        import h2o
+        observations = h2o.H2OFrame(features_df)
+        predictions = self._predict_frame(self.models[model_name], observations)
+        h2o.remove(observations)
+        return predictions
+
+    def _predict_frame(self, model, observations):
+        output = model.predict(observations).as_data_frame()
+        return output['p1'].to_numpy() if 'p1' in output.columns else output['predict'].to_numpy()
+
+    def predict_latest(self, features_df):
+        """ Scores only the last row of "features_df". Returns model name -> float. """
+
+        return {model_name: float(values[-1]) for model_name, values in self.predict(features_df.iloc[[-1]]).items()}
+
+    # HEALTH
+    def health_check(self):
+        """ Returns a dict describing whether the cluster is up and every model is loaded. """
+
+        cluster_up = False
+        if self.started_at is not None:
+            import h2o
+            try:
+                cluster_up = h2o.cluster().is_running()
+            except Exception as e:
+                print('H2O health check failed: ' + str(e))
+
+        missing_models = [model_name for model_name in self.model_dict if model_name not in self.models]
+        return {
+            'healthy': cluster_up and not missing_models,
+            'cluster_up': cluster_up,
+            'loaded_models': list(self.models),
+            'missing_models': missing_models,
+            'load_runtimes': dict(self.load_runtimes),
+            'started_at': self.started_at,
+        }
+
+
+# OFFLINE SCORING
+def predict_offline(model_path, features, genmodel_jar_path=None):
+    """ Scores "features" (a data frame, or a dict of column name -> array) with H2O's
+    MOJO runtime, without a cluster (h2o.mojo_predict_pandas, needs a Java runtime).
+    Returns the class 1 probabilities (or raw predictions for regression models). """
+
+    import h2o
+    output = h2o.mojo_predict_pandas(pd.DataFrame(features), mojo_zip_path=model_path, genmodel_jar_path=genmodel_jar_path)
+    return output['p1'].to_numpy(dtype=float) if 'p1' in output.columns else output['predict'].to_numpy(dtype=float)
+
+
+# SHARED INSTANCE
+_service = None
+
+
+def get_scoring_service():
+    """ Returns the process wide scoring service, starting it on first use and
+    restarting it if a health check fails. """
+
+    global _service
+    if _service is None and config_params['mojo_scorer'] == 'numpy':
+        _service = NumpyScoringService(config_params['h2o_model_dict'], missing=config_params['mojo_missing_columns'])
+    elif _service is None:
+        _service = MojoScoringService(config_params['h2o_model_dict'], config_params['h2o_jar_dict'])
+    if _service.started_at is not None and not _service.health_check()['healthy']:
+        print('MOJO scoring service unhealthy, restarting...')
+        _service.shutdown()
+    return _service.start()
+
+
+def shutdown_scoring_service():
+    global _service
+    if _service is not None:
+        _service.shutdown()
+        _service = None
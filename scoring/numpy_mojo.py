@@ -0,0 +1,517 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: numpy_mojo.py
+# DESCRIPTION: Pure NumPy scorer for the shipped H2O MOJO zips. Compiles GBM and
+#              XGBoost trees into flat node tables and scores whole batches of
+#              rows without H2O or a Java runtime. Stacked ensembles (with their
+#              deep learning / GLM members and GLM metalearner) are supported.
+#              EXPERIMENTAL: not yet validated against H2O's own predictions
+#              (no H2O fixture is committed for benchmarks/mojo_benchmark.py),
+#              so only code that asks for it explicitly scores with it.
+###############################################################################
+import io
+import json
+import time
+import datetime
+import struct
+import zipfile
+import warnings
+import numpy as np
+
+
+ROW_CHUNK = 2 ** 16    # rows scored per pass, bounds the (rows x trees) node index matrix
+LOGIT_FLOOR = -19    # H2O's stacked ensemble clamps logit transformed base predictions here
+
+
+# MODEL.INI
+def read_model_ini(archive, prefix=''):
+    """ Parses the model.ini of a MOJO (or of a sub model inside a stacked ensemble
+    MOJO). Returns the [info] section as a dict and the [columns] list. """
+
+    info = {}
+    columns = []
+    section = None
+    for line in archive.read(prefix + 'model.ini').decode('utf-8').splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            section = line[1:-1]
+        elif section == 'info':
+            key, value = line.split(' = ', 1)
+            info[key] = value
+        elif section == 'columns':
+            columns.append(line)
+    return info, columns
+
+
+def _ini_array(value):
+    return np.array(json.loads(value), dtype=np.float64)
+
+
+def _feature_names(info, columns):
+    return columns[:int(info['n_features'])]
+
+
+# SHARED HELPERS
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def logit(p):
+    """ H2O's stacked ensemble logit transform, log odds clamped at LOGIT_FLOOR. """
+
+    with np.errstate(divide='ignore'):
+        odds = p / (1 - p)
+        return np.where(odds == 0, LOGIT_FLOOR, np.maximum(LOGIT_FLOOR, np.log(odds)))
+
+
+def feature_matrix(features, feature_names, missing='warn'):
+    """ Orders the input columns the way a model expects them. "features" is a data
+    frame or a dict of column name -> array, or an already ordered 2D array. Model
+    columns absent from the input score as NaN; "missing" says what else happens
+    then: 'warn' (like H2O, which substitutes a NaN column with a warning), 'raise'
+    (ValueError) or 'ignore'. """
+
+    if isinstance(features, np.ndarray):
+        return np.asarray(features, dtype=np.float64)
+
+    absent = [name for name in feature_names if name not in features]
+    if absent and missing != 'ignore':
+        message = 'Input is missing {} of the {} model columns, they score as NaN: {}'.format(len(absent), len(feature_names), ', '.join(absent[:10]) + (', ...' if len(absent) > 10 else ''))
+        if missing == 'raise':
+            raise ValueError(message)
+        warnings.warn(message, stacklevel=3)
+
+    num_rows = len(features) if hasattr(features, 'columns') else len(next(iter(features.values())))
+    matrix = np.full((num_rows, len(feature_names)), np.nan)
+    for j, name in enumerate(feature_names):
+        if name in features:
+            matrix[:, j] = np.asarray(features[name], dtype=np.float64)
+    return matrix
+
+
+# TREE ENSEMBLES
+class TreeEnsembleScorer:
+    """ Tree ensemble flattened into node arrays. Every node has a feature, a
+    threshold and two children (leaves point at themselves), so a batch of rows is
+    scored by stepping a (rows x trees) matrix of node indices "max_depth" times,
+    then summing the leaf values tree by tree, in the order the MOJO runtime does.
+
+    A non missing value goes right when value >= threshold (unless the node is an
+    NA vs rest split, which sends every non missing value left). Missing values go
+    left when "na_left" is set. """
+
+    def __init__(self, name, feature_names, feature, threshold, left, right, value, na_left, na_vs_rest, roots, base_margin=0.0, link='logit', float32=False):
+        self.name = name
+        self.feature_names = feature_names
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float32 if float32 else np.float64)
+        self.na_left = np.asarray(na_left, dtype=bool)
+        self.na_vs_rest = np.asarray(na_vs_rest, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = base_margin
+        self.link = link
+        self.float32 = float32    # xgboost compares and accumulates in single precision
+        self.children = np.stack([self.left, self.right], axis=1)
+        self.split_right = ~self.na_vs_rest
+        self.na_right = ~self.na_left
+        self.max_depth = self._depth()
+
+    def _depth(self):
+        depth = np.zeros(len(self.feature), dtype=np.int32)
+        for node in range(len(self.feature) - 1, -1, -1):    # children are always stored after their parent
+            if self.left[node] != node:
+                depth[node] = 1 + max(depth[self.left[node]], depth[self.right[node]])
+        return int(depth[self.roots].max()) if len(self.roots) else 0
+
+    def leaf_values(self, matrix):
+        """ (rows x trees) matrix of the leaf value each row lands on in each tree. """
+
+        if self.float32:
+            matrix = matrix.astype(np.float32).astype(np.float64)
+        flat = np.ascontiguousarray(matrix).ravel()
+        row_offsets = (np.arange(len(matrix)) * matrix.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(matrix), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self.feature[nodes]]
+            go_right = (self.split_right[nodes] & (x >= self.threshold[nodes])) | (np.isnan(x) & self.na_right[nodes])    # NaN >= threshold is False
+            nodes = self.children[nodes, go_right.view(np.int8)]
+        return self.value[nodes]
+
+    def predict_margin(self, features, missing='warn'):
+        matrix = feature_matrix(features, self.feature_names, missing)
+        margin = np.empty(len(matrix))
+        for start in range(0, len(matrix), ROW_CHUNK):
+            leaves = self.leaf_values(matrix[start:start + ROW_CHUNK])
+            total = np.zeros(len(leaves), dtype=leaves.dtype)
+            for t in range(leaves.shape[1]):
+                total += leaves[:, t]
+            margin[start:start + ROW_CHUNK] = total.astype(np.float64) + self.base_margin
+        return margin
+
+    def predict(self, features, missing='warn'):
+        """ Class 1 probability (or the raw prediction for an identity link) per row. """
+
+        margin = self.predict_margin(features, missing)
+        return sigmoid(margin) if self.link == 'logit' else margin
+
+
+class _NodeTable:
+    """ Growable node table shared by the tree readers. """
+
+    def __init__(self):
+        self.columns = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'value': [], 'na_left': [], 'na_vs_rest': []}
+
+    def __len__(self):
+        return len(self.columns['feature'])
+
+    def add(self, feature=0, threshold=np.nan, value=0.0, na_left=False, na_vs_rest=False):
+        index = len(self)
+        for key, item in [('feature', feature), ('threshold', threshold), ('left', index), ('right', index), ('value', value), ('na_left', na_left), ('na_vs_rest', na_vs_rest)]:
+            self.columns[key].append(item)
+        return index
+
+    def link(self, node, left, right):
+        self.columns['left'][node] = left
+        self.columns['right'][node] = right
+
+
+def read_gbm_tree(data, table):
+    """ Decodes one H2O GBM tree (the compressed byte format of MOJO version 1.40)
+    into the node table. Returns the index of the root node. """
+
+    def f32(pos):
+        return struct.unpack_from('<f', data, pos)[0]
+
+    def read_node(pos):
+        node_type = data[pos]
+        column = struct.unpack_from('<H', data, pos + 1)[0]
+        if column == 0xFFFF:    # single leaf tree
+            return table.add(value=f32(pos + 3))
+
+        na_split_dir = data[pos + 3]
+        na_vs_rest = na_split_dir == 1
+        pos += 4
+        threshold = np.nan
+        if not na_vs_rest:
+            if node_type & 0x0C:
+                raise ValueError('Categorical (bitset) splits are not supported')
+            threshold = f32(pos)
+            pos += 4
+        node = table.add(feature=column, threshold=threshold, na_left=na_split_dir in (2, 4), na_vs_rest=na_vs_rest)
+
+        left_mask = node_type & 0x33
+        if left_mask <= 3:    # left child is a subtree, preceded by its size in bytes
+            left_size = int.from_bytes(data[pos:pos + left_mask + 1], 'little')
+            pos += left_mask + 1
+            left = read_node(pos)
+            right_pos = pos + left_size
+        elif left_mask == 0x30:    # left child is a leaf
+            left = table.add(value=f32(pos))
+            right_pos = pos + 4
+        else:
+            raise ValueError('Illegal left mask ' + str(left_mask) + ' in GBM tree')
+
+        right = table.add(value=f32(right_pos)) if ((node_type & 0xC0) >> 2) & 16 else read_node(right_pos)
+        table.link(node, left, right)
+        return node
+
+    return read_node(0)
+
+
+def load_gbm(archive, prefix, info, columns):
+    if info['distribution'] not in ('bernoulli', 'gaussian'):
+        raise ValueError('Unsupported GBM distribution: ' + info['distribution'])
+    if float(info['mojo_version']) < 1.4:
+        raise ValueError('GBM MOJO version ' + info['mojo_version'] + ' is not supported, re-export with H2O 3.26 or newer')
+
+    table = _NodeTable()
+    roots = [read_gbm_tree(archive.read(prefix + 'trees/t00_{:03d}.bin'.format(t)), table) for t in range(int(info['n_trees']))]
+    return TreeEnsembleScorer(
+        info.get('uuid'), _feature_names(info, columns), roots=roots, base_margin=float(info['init_f']),
+        link='logit' if info['distribution'] == 'bernoulli' else 'identity', **table.columns,
+    )
+
+
+def read_xgboost_booster(data, table):
+    """ Decodes an XGBoost (1.x) binary booster into the node table. Returns the
+    root node of every tree, the base score and the objective name. """
+
+    if data[:4] != b'binf':
+        raise ValueError('Unrecognised XGBoost booster header')
+    base_score, num_feature, num_class, extra_attrs, eval_metrics, major_version = struct.unpack_from('<fIiiii', data, 4)
+    pos = 4 + 136    # LearnerModelParam
+
+    strings = []
+    for _ in range(2):    # objective, booster name
+        length = struct.unpack_from('<Q', data, pos)[0]
+        strings.append(data[pos + 8:pos + 8 + length].decode('utf-8'))
+        pos += 8 + length
+    objective, booster = strings
+    if booster != 'gbtree':
+        raise ValueError('Unsupported XGBoost booster: ' + booster)
+
+    num_trees = struct.unpack_from('<i', data, pos)[0]
+    pos += 160    # GBTreeModelParam
+
+    roots = []
+    for _ in range(num_trees):
+        num_nodes = struct.unpack_from('<i', data, pos + 4)[0]
+        pos += 148    # TreeParam
+        nodes = np.frombuffer(data, dtype=np.dtype([('parent', '<i4'), ('left', '<i4'), ('right', '<i4'), ('index', '<u4'), ('value', '<f4')]), count=num_nodes, offset=pos)
+        pos += 20 * num_nodes + 16 * num_nodes    # nodes, then per node stats
+
+        offset = len(table)
+        for node in nodes:
+            if node['left'] == -1:
+                table.add(value=float(node['value']))
+            else:    # xgboost sends value < threshold left, the table sends value >= threshold right: same split
+                table.add(feature=int(node['index'] & 0x7FFFFFFF), threshold=float(node['value']), na_left=bool(node['index'] >> 31))
+        for i, node in enumerate(nodes):
+            if node['left'] != -1:
+                table.link(offset + i, offset + int(node['left']), offset + int(node['right']))
+        roots.append(offset)
+
+    return roots, base_score, objective, major_version
+
+
+def load_xgboost(archive, prefix, info, columns):
+    if info.get('booster', 'gbtree') != 'gbtree':
+        raise ValueError('Unsupported XGBoost booster: ' + info['booster'])
+
+    table = _NodeTable()
+    roots, base_score, objective, major_version = read_xgboost_booster(archive.read(prefix + 'boosterBytes'), table)
+    feature_names = [line.split(' ')[1] for line in archive.read(prefix + 'feature_map').decode('utf-8').splitlines() if line.strip()]
+
+    if objective == 'binary:logistic':
+        base_margin = float(np.log(base_score / (1 - base_score))) if major_version >= 1 else base_score    # 1.x stores the base score as a probability
+        link = 'logit'
+    elif objective.startswith('reg:'):
+        base_margin, link = base_score, 'identity'
+    else:
+        raise ValueError('Unsupported XGBoost objective: ' + objective)
+
+    return TreeEnsembleScorer(info.get('uuid'), feature_names, roots=roots, base_margin=base_margin, link=link, float32=True, **table.columns)
+
+
+# LINEAR AND NEURAL MODELS
+class GLMScorer:
+    """ Numeric only GLM with mean imputation (the stacked ensemble metalearner). """
+
+    def __init__(self, name, feature_names, beta, num_means, link):
+        self.name = name
+        self.feature_names = feature_names
+        self.beta = np.asarray(beta, dtype=np.float64)
+        self.num_means = np.asarray(num_means, dtype=np.float64)
+        self.link = link
+
+    def predict(self, features, missing='warn'):
+        matrix = feature_matrix(features, self.feature_names, missing)
+        matrix = np.where(np.isnan(matrix), self.num_means, matrix)
+        eta = matrix @ self.beta[:-1] + self.beta[-1]    # intercept is stored last
+        return sigmoid(eta) if self.link == 'logit' else eta
+
+
+def load_glm(archive, prefix, info, columns):
+    if int(info['cats']) != 0:
+        raise ValueError('GLM with categorical columns is not supported')
+    if info['link'] not in ('logit', 'identity'):
+        raise ValueError('Unsupported GLM link: ' + info['link'])
+    return GLMScorer(info.get('uuid'), _feature_names(info, columns), _ini_array(info['beta']), _ini_array(info['num_means']), info['link'])
+
+
+class DeepLearningScorer:
+    """ Numeric only H2O deep learning network: standardized inputs (missing values
+    imputed with the mean, i.e. 0 after standardizing), dense hidden layers and a
+    softmax output for classification. Hidden outputs are scaled by (1 - dropout
+    ratio) like the MOJO runtime does. """
+
+    def __init__(self, name, feature_names, norm_sub, norm_mul, weights, biases, activation, dropout_ratios, classification=True):
+        self.name = name
+        self.feature_names = feature_names
+        self.norm_sub = np.asarray(norm_sub, dtype=np.float64)
+        self.norm_mul = np.asarray(norm_mul, dtype=np.float64)
+        self.weights = weights
+        self.biases = biases
+        self.activation = activation
+        self.dropout_ratios = dropout_ratios
+        self.classification = classification
+
+    def predict(self, features, missing='warn'):
+        values = (feature_matrix(features, self.feature_names, missing) - self.norm_sub) * self.norm_mul
+        values = np.where(np.isnan(values), 0.0, values)
+        for layer, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            values = values @ weight.T + bias
+            if layer < len(self.weights) - 1:
+                values = np.maximum(values, 0) if self.activation.startswith('Rectifier') else np.tanh(values)
+                values = values * (1 - self.dropout_ratios[layer])
+        if not self.classification:
+            return values[:, 0]
+        values = np.exp(values - values.max(axis=1, keepdims=True))
+        return values[:, 1] / values.sum(axis=1)
+
+
+def load_deeplearning(archive, prefix, info, columns):
+    if int(info['cats']) != 0:
+        raise ValueError('Deep learning with categorical columns is not supported')
+    if info['activation'] not in ('Rectifier', 'RectifierWithDropout', 'Tanh', 'TanhWithDropout'):
+        raise ValueError('Unsupported activation: ' + info['activation'])
+    if info['norm_resp_mul'] != 'null':
+        raise ValueError('Deep learning with a standardized response is not supported')
+
+    sizes = [int(size) for size in json.loads(info['neural_network_sizes'])]
+    weights = [_ini_array(info['weight_layer' + str(layer)]).reshape(sizes[layer + 1], sizes[layer]) for layer in range(len(sizes) - 1)]
+    biases = [_ini_array(info['bias_layer' + str(layer)]) for layer in range(len(sizes) - 1)]
+    dropout = info.get('hidden_dropout_ratios', 'null')
+    dropout_ratios = list(_ini_array(dropout)) if dropout != 'null' else [0.0] * len(weights)
+    return DeepLearningScorer(
+        info.get('uuid'), _feature_names(info, columns), _ini_array(info['norm_sub']), _ini_array(info['norm_mul']),
+        weights, biases, info['activation'], dropout_ratios, classification=int(info['n_classes']) == 2,
+    )
+
+
+# STACKED ENSEMBLE
+class StackedEnsembleScorer:
+    """ Scores every base model, logit transforms their class 1 probabilities (when
+    the metalearner was trained that way) and feeds them, by position, to the
+    metalearner. Base models the MOJO does not ship score as 0, matching H2O. """
+
+    def __init__(self, name, feature_names, base_models, metalearner, logit_transform):
+        self.name = name
+        self.feature_names = feature_names
+        self.base_models = base_models
+        self.metalearner = metalearner
+        self.logit_transform = logit_transform
+
+    def predict(self, features, missing='warn'):
+        matrix = feature_matrix(features, self.feature_names, missing)    # checked once here, the base models get every column
+        features = {name: matrix[:, j] for j, name in enumerate(self.feature_names)}
+        base_predictions = np.zeros((len(matrix), len(self.base_models)))
+        for i, model in enumerate(self.base_models):
+            if model is not None:
+                prediction = model.predict(features)
+                base_predictions[:, i] = logit(prediction) if self.logit_transform else prediction
+        return self.metalearner.predict(base_predictions)
+
+
+def load_stacked_ensemble(archive, prefix, info, columns):
+    submodels = {}
+    for i in range(int(info['submodel_count'])):
+        submodels[info['submodel_key_' + str(i)]] = prefix + info['submodel_dir_' + str(i)]
+
+    base_models = []
+    for i in range(int(info['base_models_num'])):
+        key = info.get('base_model' + str(i))
+        base_models.append(_load(archive, submodels[key]) if key in submodels else None)
+    metalearner = _load(archive, submodels[info['metalearner']])
+    return StackedEnsembleScorer(info.get('uuid'), _feature_names(info, columns), base_models, metalearner, info.get('metalearner_transform') == 'Logit')
+
+
+# LOADING
+LOADERS = {
+    'gbm': load_gbm,
+    'xgboost': load_xgboost,
+    'glm': load_glm,
+    'deeplearning': load_deeplearning,
+    'stackedensemble': load_stacked_ensemble,
+}
+
+
+def _load(archive, prefix):
+    info, columns = read_model_ini(archive, prefix)
+    if info['algo'] not in LOADERS:
+        raise ValueError('Unsupported MOJO algorithm: ' + info['algo'])
+    if info.get('endianness', 'LITTLE_ENDIAN') != 'LITTLE_ENDIAN':
+        raise ValueError('Only little endian MOJOs are supported')
+    if info.get('category') not in ('Binomial', 'Regression'):
+        raise ValueError('Unsupported model category: ' + str(info.get('category')))
+    return LOADERS[info['algo']](archive, prefix, info, columns)
+
+
+def load_mojo(path):
+    """ Compiles a MOJO zip (path or bytes) into a NumPy scorer. The returned object
+    has a "feature_names" list and a predict(features) method returning one class 1
+    probability per row. """
+
+    with zipfile.ZipFile(io.BytesIO(path) if isinstance(path, bytes) else path) as archive:
+        return _load(archive, '')
+
+
+def compare_with_h2o(mojo_path, features_df, genmodel_jar_path=None):
+    """ Scores "features_df" with both the NumPy scorer and H2O's own MOJO runtime
+    (needs h2o and a Java runtime) and returns the max absolute difference in the
+    class 1 probability. """
+
+    import h2o    # only the validation path needs H2O
+    expected = h2o.mojo_predict_pandas(features_df, mojo_zip_path=mojo_path, genmodel_jar_path=genmodel_jar_path)['p1'].to_numpy(dtype=np.float64)
+    actual = load_mojo(mojo_path).predict(features_df)
+    return float(np.max(np.abs(expected - actual)))
+
+
+# SERVICE
+class NumpyScoringService:
+    """ Drop in replacement for MojoScoringService that compiles every MOJO in
+    "model_dict" once and scores in process, with no H2O cluster or JVM.
+    Experimental, used only with mojo_scorer = 'numpy'. """
+
+    def __init__(self, model_dict, missing='warn'):
+        self.model_dict = dict(model_dict)
+        self.missing = missing    # absent model columns, see feature_matrix
+        self.models = {}
+        self.load_runtimes = {}
+        self.started_at = None
+
+    def start(self):
+        if self.started_at is not None:
+            return self
+
+        print('Compiling MOJO models (experimental NumPy scorer, not validated against H2O)... [' + str(datetime.datetime.utcnow()) + ']')
+        for model_name, model_path in self.model_dict.items():
+            start = time.perf_counter()
+            self.models[model_name] = load_mojo(model_path)
+            self.load_runtimes[model_name] = time.perf_counter() - start
+        self.started_at = datetime.datetime.utcnow()
+        return self
+
+    def shutdown(self):
+        self.models = {}
+        self.started_at = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def predict(self, features_df):
+        """ Scores the rows of "features_df" with every model. Returns a dict of model
+        name -> array of class 1 probabilities, one value per input row. """
+
+        if self.started_at is None:
+            raise RuntimeError('Scoring service is not started')
+        return {model_name: model.predict(features_df, self.missing) for model_name, model in self.models.items()}
+
+    def predict_model(self, model_name, features_df):
+        if self.started_at is None:
+            raise RuntimeError('Scoring service is not started')
+        return self.models[model_name].predict(features_df, self.missing)
+
+    def predict_latest(self, features_df):
+        return {model_name: float(values[-1]) for model_name, values in self.predict(features_df.iloc[[-1]]).items()}
+
+    def health_check(self):
+        missing_models = [model_name for model_name in self.model_dict if model_name not in self.models]
+        return {
+            'healthy': self.started_at is not None and not missing_models,
+            'cluster_up': False,
+            'loaded_models': list(self.models),
+            'missing_models': missing_models,
+            'load_runtimes': dict(self.load_runtimes),
+            'started_at': self.started_at,
+        }
@@ -0,0 +1,174 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: registry.py
+# DESCRIPTION: Model registry for the prediction ensemble. Scores every
+#              registered model concurrently with per model timeouts, then
+#              combines the results into the ensemble aggregates.
+###############################################################################
+import time
+import functools
+import concurrent.futures
+import numpy as np
+
+from config import config_params
+from utils import tracing
+from scoring.mojo_service import get_scoring_service
+
+
+EXECUTORS = {
+    'thread': concurrent.futures.ThreadPoolExecutor,    # works with every scorer, numpy releases the GIL for most of the work
+    'process': concurrent.futures.ProcessPoolExecutor,    # numpy scorers only, each worker gets its own copy of the models
+}
+
+
+# PROCESS POOL WORKERS
+_worker_scorers = {}
+
+
+def _init_worker(scorers):
+    _worker_scorers.update(scorers)
+
+
+def _score_in_worker(model_name, features_df):
+    return _timed_score(_worker_scorers[model_name], features_df)
+
+
+def _timed_score(scorer, features_df):
+    start = time.perf_counter()
+    predictions = np.asarray(scorer(features_df), dtype=np.float64)
+    return predictions, time.perf_counter() - start
+
+
+# REGISTRY
+class ModelRegistry:
+    """ Named prediction models, each a callable taking a feature data frame and
+    returning one prediction per row, with an ensemble weight and a timeout. The
+    worker pool is created on first use and kept for later runs. """
+
+    def __init__(self, executor='thread', max_workers=None, default_timeout=10.0):
+        if executor not in EXECUTORS:
+            raise ValueError('Unknown executor: ' + str(executor) + ' (expected one of ' + str(list(EXECUTORS)) + ')')
+        self.executor = executor
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.entries = {}
+        self.pool = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def register(self, model_name, scorer, weight=1.0, timeout=None):
+        self.entries[model_name] = {'scorer': scorer, 'weight': weight, 'timeout': timeout or self.default_timeout}
+        self.close()    # process workers hold a copy of every scorer, rebuild on next use
+
+    def unregister(self, model_name):
+        del self.entries[model_name]
+        self.close()
+
+    @property
+    def weights(self):
+        return {model_name: entry['weight'] for model_name, entry in self.entries.items()}
+
+    def _get_pool(self):
+        if self.pool is None:
+            max_workers = self.max_workers or max(len(self.entries), 1)
+            if self.executor == 'process':
+                scorers = {model_name: entry['scorer'] for model_name, entry in self.entries.items()}
+                self.pool = EXECUTORS['process'](max_workers=max_workers, initializer=_init_worker, initargs=(scorers,))
+            else:
+                self.pool = EXECUTORS['thread'](max_workers=max_workers, thread_name_prefix='model')
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def score(self, features_df, model_names=None):
+        """ Scores "features_df" with every registered model (or only the ones in
+        "model_names") at once. Returns a dict of model name -> predictions for the
+        models that finished in time, and a report of model name -> {'status': 'ok' |
+        'timeout' | 'error', 'latency': seconds, 'error': message}. A model that times
+        out is left running in its worker but does not hold up the result. """
+
+        pool = self._get_pool()
+        submitted_at = time.perf_counter()
+        futures = {}
+        for model_name in (self.entries if model_names is None else model_names):
+            entry = self.entries[model_name]
+            if self.executor == 'process':
+                futures[model_name] = pool.submit(_score_in_worker, model_name, features_df)
+            else:
+                futures[model_name] = pool.submit(_timed_score, entry['scorer'], features_df)
+
+        predictions = {}
+        report = {}
+        for model_name, future in futures.items():
+            remaining = submitted_at + self.entries[model_name]['timeout'] - time.perf_counter()
+            try:
+                predictions[model_name], latency = future.result(timeout=max(remaining, 0))
+                report[model_name] = {'status': 'ok', 'latency': latency, 'error': None}
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                report[model_name] = {'status': 'timeout', 'latency': time.perf_counter() - submitted_at, 'error': 'no result after ' + str(self.entries[model_name]['timeout']) + 's'}
+            except Exception as e:
+                report[model_name] = {'status': 'error', 'latency': time.perf_counter() - submitted_at, 'error': str(e)}
+            tracing.record('model:' + model_name, report[model_name]['latency'], status=report[model_name]['status'], rows=len(features_df))
+        return predictions, report
+
+
+# AGGREGATES
+def trimmed_mean(values, trim_fraction):
+    """ Mean after dropping the lowest and highest "trim_fraction" of the values. """
+
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    cut = int(len(values) * trim_fraction)
+    return float(np.mean(values[cut:len(values) - cut]))
+
+
+def aggregate_predictions(prediction_dict, weights=None, trim_fraction=0.2):
+    """ Ensemble aggregates over the models that produced a prediction (NaN entries
+    are left out). Returns a dict with mean, median, weighted_mean and trimmed_mean. """
+
+    names = [model_name for model_name, value in prediction_dict.items() if not np.isnan(value)]
+    if not names:
+        raise ValueError('No model produced a prediction')
+
+    values = np.array([prediction_dict[model_name] for model_name in names])
+    model_weights = np.array([(weights or {}).get(model_name, 1.0) for model_name in names], dtype=np.float64)
+    return {
+        'mean': float(np.mean(values)),
+        'median': float(np.median(values)),
+        'weighted_mean': float(np.sum(model_weights * values) / np.sum(model_weights)),
+        'trimmed_mean': trimmed_mean(values, trim_fraction),
+    }
+
+
+# SHARED INSTANCE
+_registry = None
+
+
+def get_model_registry():
+    """ Returns the process wide registry of every model in h2o_model_dict, scored
+    through the shared scoring service (or, with the process executor, by copies
+    of the compiled numpy models in each worker). """
+
+    global _registry
+    if _registry is not None:
+        return _registry
+
+    service = get_scoring_service()
+    if config_params['ensemble_executor'] == 'process' and config_params['mojo_scorer'] != 'numpy':
+        raise ValueError('The process executor needs mojo_scorer = numpy (H2O models live in the H2O cluster, not the worker)')
+
+    registry = ModelRegistry(config_params['ensemble_executor'], default_timeout=config_params['model_timeout_seconds'])
+    for model_name in config_params['h2o_model_dict']:
+        if config_params['ensemble_executor'] == 'process':
+            scorer = functools.partial(service.models[model_name].predict, missing=service.missing)
+        else:
+            scorer = functools.partial(service.predict_model, model_name)
+        registry.register(model_name, scorer, weight=config_params['model_weights'].get(model_name, 1.0))
+    _registry = registry
+    return _registry
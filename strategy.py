@@ -8,12 +8,41 @@
 import pandas as pd
 import numpy as np
 
-from exchanges.falconx import get_falconx_btc_price_quote, get_all_falconx_accounts, get_single_falconx_account_balance, get_falconx_token_pairs, place_falconx_market_order
+from exchanges.falconx import FalconXAccountSnapshot, get_falconx_market_state, get_falconx_btc_price_quote, get_all_falconx_accounts, get_single_falconx_account_balance, get_falconx_token_pairs, place_falconx_market_order
 from config import config_params
 
 
-def apply_strategy(exchange_connection, input_df, log_file_df, ml_dict):
-    """ Apply the strategy logic. Returns df with relevant results. """
+def place_order(exchange_connection, side, amount, account_snapshot, btc_price_quote, router=None, token_pair=('BTC', 'USD')):
+    """ Places a market order on FalconX, or on the best venue when a router
+    (exchanges/router.py, BTC/USD only) is passed. "amount" is quote token (USD) for
+    a buy and base token (BTC) for a sell. Returns (usd_received, btc_received,
+    fill price). """
+
+    if router is not None:
+        if tuple(token_pair) != ('BTC', 'USD'):
+            raise ValueError('The best execution router only trades BTC/USD, got ' + '/'.join(token_pair))
+        fill = router.route_market_order(side, amount_usd=amount if side == 'buy' else None, amount_btc=amount if side == 'sell' else None)
+        account_snapshot.invalidate()    # the fill may have changed the FalconX balances
+        return fill['usd_received'], fill['btc_received'], fill['price']
+
+    if side == 'buy':
+        response = place_falconx_market_order(exchange_connection, amount, list(token_pair), 'buy', account_snapshot, btc_price_quote)
+        return 0, response['quantity_requested']['value'], response['buy_price']
+    response = place_falconx_market_order(exchange_connection, amount, list(token_pair), 'sell', account_snapshot)
+    return response['position_in']['value'], 0, response['sell_price']
+
+
+def apply_strategy(exchange_connection, input_df, log_file_df, ml_dict, account_snapshot=None, router=None, token_pair=('BTC', 'USD')):
+    """ Apply the strategy logic. Returns df with relevant results. Every balance
+    lookup of the cycle is served from one account snapshot, filled together with
+    the quote by one concurrent request round. Orders go through "router" when one
+    is passed, otherwise to FalconX. "token_pair" is the traded (base, quote) pair;
+    the falconx_btc_* / falconx_usd_* log columns then hold its base / quote token. """
+
+    if account_snapshot is None:
+        account_snapshot = FalconXAccountSnapshot(exchange_connection)
+    market_state = get_falconx_market_state(exchange_connection, account_snapshot, token_pair=tuple(token_pair))    # quote and balances fetched concurrently
+    current_btc_price_quote = market_state['quote'][0]
 
     # Get current trade status (i.e. are we in an open position or not)
     trade_status = log_file_df['action'].iloc[-1]    # get trade status
@@ -33,66 +62,48 @@ def apply_strategy(exchange_connection, input_df, log_file_df, ml_dict):
             action = 'Buy'
             if config_params['in_production']:
                 print('Buying ${} of BTC.'.format(config_params['bet']))
-                response = place_falconx_market_order(exchange_connection, config_params['bet'], ['BTC', 'USD'], 'buy')
-                usd_received = 0
-                btc_received = response['quantity_requested']['value']
-                falconx_btc_price_quote = response['buy_price']
+                usd_received, btc_received, falconx_btc_price_quote = place_order(exchange_connection, 'buy', config_params['bet'], account_snapshot, current_btc_price_quote, router, token_pair)
         elif trade_status == 'Buy':
             action = 'Sell'    
             if config_params['in_production']:
                 print('Selling BTC.')
-                response = place_falconx_market_order(exchange_connection, log_file_df['btc_received'].iloc[-1], ['BTC', 'USD'], 'sell')    # sell all the btc received for the original purchase
-                usd_received = response['position_in']['value']
-                btc_received = 0 
-                falconx_btc_price_quote = response['sell_price']
+                usd_received, btc_received, falconx_btc_price_quote = place_order(exchange_connection, 'sell', log_file_df['btc_received'].iloc[-1], account_snapshot, current_btc_price_quote, router, token_pair)    # sell all the btc received for the original purchase
         elif trade_status == 'Sell':
             action = 'Buy'
             if config_params['in_production']:
                 print('Buying ${} of BTC.'.format(config_params['bet']))
-                response = place_falconx_market_order(exchange_connection, config_params['bet'], ['BTC', 'USD'], 'buy')
-                usd_received = 0
-                btc_received = response['quantity_requested']['value']
-                falconx_btc_price_quote = response['buy_price']
+                usd_received, btc_received, falconx_btc_price_quote = place_order(exchange_connection, 'buy', config_params['bet'], account_snapshot, current_btc_price_quote, router, token_pair)
     else:    # not in trade zone
         if trade_status == 'No Action':
             action = 'No Action'
             usd_received = 0
             btc_received = 0
-            falconx_btc_price_quote = get_falconx_btc_price_quote(exchange_connection)[0]
+            falconx_btc_price_quote = current_btc_price_quote
         elif trade_status == 'Buy':
             action = 'Sell'
             if config_params['in_production']:
                 print('Selling BTC.')
-                response = place_falconx_market_order(exchange_connection, log_file_df['btc_received'].iloc[-1], ['BTC', 'USD'], 'sell')
-                usd_received = response['position_in']['value']
-                btc_received = 0 
-                falconx_btc_price_quote = response['sell_price']
+                usd_received, btc_received, falconx_btc_price_quote = place_order(exchange_connection, 'sell', log_file_df['btc_received'].iloc[-1], account_snapshot, current_btc_price_quote, router, token_pair)
         elif trade_status == 'Sell':
             action = 'No Action'
             usd_received = 0
             btc_received = 0
-            falconx_btc_price_quote = get_falconx_btc_price_quote(exchange_connection)[0]
+            falconx_btc_price_quote = current_btc_price_quote
 
     # Create new results row to append to log file
     input_df.columns = ["Open", "High", "Low", "Close", "Volume", "Unix", "Time"]
     new_entry = input_df.loc[input_df.index[-1], ["Open", "High", "Low", "Close", "Volume", "Unix", "Time"]].to_list()    # add ohlc
-    new_entry = new_entry + [ml_dict['model1']]
-    new_entry = new_entry + [ml_dict['model2']]
-    new_entry = new_entry + [ml_dict['model3']]
-    new_entry = new_entry + [ml_dict['model4']]
-    new_entry = new_entry + [ml_dict['model5']]
-    new_entry = new_entry + [ml_dict['model6']]
-    new_entry = new_entry + [ml_dict['model7']]
+    new_entry = new_entry + [ml_dict[model_name] for model_name in config_params['h2o_model_dict']]    # one column per registered model
     new_entry = new_entry + [ml_dict['mean']]
     new_entry = new_entry + [ml_dict['median']]
     new_entry = new_entry + [action]    # add action
-    falconx_usd_balance = get_single_falconx_account_balance(exchange_connection, 'USD')    # add exchange state  
-    falconx_btc_balance = get_single_falconx_account_balance(exchange_connection, 'BTC') 
+    falconx_usd_balance = get_single_falconx_account_balance(exchange_connection, token_pair[1], account_snapshot)    # add exchange state  
+    falconx_btc_balance = get_single_falconx_account_balance(exchange_connection, token_pair[0], account_snapshot) 
     new_entry = new_entry + [falconx_usd_balance, falconx_btc_balance, falconx_btc_price_quote, usd_received, btc_received]
     new_entry = new_entry + [0, 0, np.nan]    # add placeholders for performance stats
 
-    df = log_file_df.copy()    # append and return resulting df
-    df.loc[len(df)] = new_entry
+    df = log_file_df.copy()    # append and return resulting df (just the last row and the new one when the log is kept in a trade journal)
+    df.loc[df.index[-1] + 1 if len(df) else 0] = new_entry    # next row number of the log, also when log_file_df is only its tail
     print(df)
 
     return df
@@ -0,0 +1,239 @@
+###############################################################################
+# PROJECT: EOC CEFI Trading Bot Template
+# AUTHOR: Matt Hartigan
+# DATE: 18-Oct-2026
+# FILENAME: sweep.py
+# DESCRIPTION: Parallel parameter sweep over the strategy config (threshold,
+#              lookback periods, execution hours, standard deviation and data
+#              reduction factor), backtested on the historical price file.
+#              Run from the repo root with: python sweep.py
+###############################################################################
+import os
+import json
+import random
+import hashlib
+import datetime
+import functools
+import itertools
+import concurrent.futures
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+import backtest
+import utils.features
+from scoring import numpy_mojo
+from scoring import mojo_service
+from utils.storage import ColumnStore
+from config import config_params
+
+
+SWEEP_PARAMS = ['threshold', 'lookback_periods', 'execution_hours', 'standard_deviation', 'data_reduction_factor']
+FEATURE_PARAMS = ['lookback_periods', 'standard_deviation', 'data_reduction_factor']    # trials sharing these share features and predictions
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Unix']
+RANK_BY = 'net_profit'
+
+
+# TRIALS
+def trial_id(params):
+    """ Stable id of a parameter combination, used to skip finished trials on resume. """
+
+    return hashlib.sha1(json.dumps({key: params[key] for key in SWEEP_PARAMS}, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def build_trials(grid, num_samples=None, seed=0):
+    """ Every combination of the values in "grid" (a dict of parameter -> list of
+    values), or "num_samples" of them drawn at random. Parameters missing from the
+    grid keep their config.py value. The same seed always draws the same trials, so
+    an interrupted random search resumes where it stopped. """
+
+    values = [grid.get(param, [config_params[param]]) for param in SWEEP_PARAMS]
+    trials = [dict(zip(SWEEP_PARAMS, combination)) for combination in itertools.product(*values)]
+    if num_samples is not None and num_samples < len(trials):
+        trials = random.Random(seed).sample(trials, num_samples)
+    for trial in trials:
+        trial['trial_id'] = trial_id(trial)
+    return trials
+
+
+def group_trials(trials):
+    """ Groups trials by their feature parameters. Each group is one worker task:
+    features and model predictions are computed once, then every threshold /
+    execution hours combination is backtested against them. """
+
+    groups = {}
+    for trial in trials:
+        key = json.dumps([trial[param] for param in FEATURE_PARAMS])
+        groups.setdefault(key, []).append(trial)
+    return list(groups.values())
+
+
+# DATA
+def reduce_bars(prices, data_reduction_factor):
+    """ Merges every "data_reduction_factor" consecutive bars into one (first open,
+    max high, min low, last close, summed volume, last unix). A partial group at the
+    start is dropped so the latest bar always closes a full group. """
+
+    if data_reduction_factor <= 1:
+        return prices
+    num_groups = len(prices) // data_reduction_factor
+    grouped = prices[len(prices) - num_groups * data_reduction_factor:].reshape(num_groups, data_reduction_factor, len(PRICE_COLUMNS))
+    return np.column_stack([
+        grouped[:, 0, 0],
+        grouped[:, :, 1].max(axis=1),
+        grouped[:, :, 2].min(axis=1),
+        grouped[:, -1, 3],
+        grouped[:, :, 4].sum(axis=1),
+        grouped[:, -1, 5],
+    ])
+
+
+def decision_bars(unix, execution_hours, bar_interval_seconds, deadline_offset_seconds=0):
+    """ Mask of the bars the live bot trades on: for every execution hour HH (UTC),
+    the last bar closed (unix + bar_interval_seconds) by HH:00 plus the deadline
+    offset, as in run() and the event scheduler. One decision per execution hour,
+    whatever the bar size. The last bar only counts when it closes on a deadline. """
+
+    close = unix.astype(np.int64) + bar_interval_seconds - deadline_offset_seconds
+    deadline = -(-close // 3600) * 3600    # top of the hour at or after the close
+    is_last = np.append(deadline[1:] != deadline[:-1], len(close) > 0 and close[-1] == deadline[-1])[:len(close)]
+    return is_last & np.isin((deadline // 3600) % 24, execution_hours)
+
+
+def load_prices(price_store_path, price_file_path):
+    """ The whole price history, read as run() reads it: synced from the csv into the
+    columnar store, with the columns named by ohlc_file_column_list whatever the
+    csv header says. """
+
+    price_store = ColumnStore(price_store_path)
+    price_store.sync_csv(price_file_path)
+    return price_store.read_all().set_axis(config_params['ohlc_file_column_list'], axis=1)
+
+
+# WORKERS
+_worker = {}
+
+
+def load_scorer(scorer, model_path, genmodel_jar_path=None):
+    """ Function scoring a dict of feature columns with one model: H2O's MOJO
+    runtime for 'h2o', the experimental NumPy scorer for 'numpy'. """
+
+    if scorer == 'h2o':
+        return functools.partial(mojo_service.predict_offline, model_path, genmodel_jar_path=genmodel_jar_path or None)
+    if scorer == 'numpy':
+        return functools.partial(numpy_mojo.load_mojo(model_path).predict, missing=config_params['mojo_missing_columns'])
+    raise ValueError('Unknown sweep scorer: ' + str(scorer))
+
+
+def _init_worker(shared_name, shape, scorer, model_paths, jar_paths, indicator_list, bet, bar_interval_seconds, deadline_offset_seconds):
+    """ Attaches the shared price array (no copy) and loads the models once per
+    worker process. """
+
+    _worker['memory'] = shared_memory.SharedMemory(name=shared_name)    # keep a reference, the view below needs the buffer alive
+    _worker['prices'] = np.ndarray(shape, dtype=np.float64, buffer=_worker['memory'].buf)
+    _worker['models'] = [load_scorer(scorer, model_path, jar_path) for model_path, jar_path in zip(model_paths, jar_paths)]
+    _worker['indicator_list'] = indicator_list
+    _worker['bet'] = bet
+    _worker['bar_interval_seconds'] = bar_interval_seconds
+    _worker['deadline_offset_seconds'] = deadline_offset_seconds
+
+
+def _run_group(trials):
+    first = trials[0]
+    prices = reduce_bars(_worker['prices'], first['data_reduction_factor'])
+    ohlcv = {key: np.ascontiguousarray(prices[:, i]) for i, key in enumerate(utils.features.OHLCV_KEYS)}
+    feature_matrix, column_names = utils.features.calculate_features(ohlcv, first['lookback_periods'], _worker['indicator_list'], first['standard_deviation'])
+
+    features = {name: feature_matrix[:, j] for j, name in enumerate(column_names)}
+    features['C1'] = np.arange(len(prices), dtype=np.float64)    # row number column of the training exports
+    median = np.median(np.vstack([predict(features) for predict in _worker['models']]), axis=0)
+
+    results = []
+    for trial in trials:
+        in_hours = decision_bars(prices[:, 5], trial['execution_hours'], _worker['bar_interval_seconds'], _worker['deadline_offset_seconds'])
+        summary = backtest.summarize_backtest(backtest.backtest_arrays(prices[in_hours, 3], median[in_hours], trial['threshold'], _worker['bet']))
+        results.append(dict(trial, **summary))
+    return results
+
+
+# RUNNER
+def load_results(results_path):
+    """ Results already streamed to "results_path" (json lines), skipping a last line
+    cut short by an interruption. """
+
+    results = []
+    if os.path.exists(results_path):
+        with open(results_path) as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print('Skipping truncated result line in ' + results_path)
+    return results
+
+
+def write_summary(results, summary_path):
+    """ Rewrites the ranked summary csv (best first). """
+
+    summary_df = pd.DataFrame(results).sort_values(RANK_BY, ascending=False)
+    summary_df.to_csv(summary_path + '.tmp', index=False)
+    os.replace(summary_path + '.tmp', summary_path)
+
+
+def run_sweep(price_df, grid, results_path, summary_path, num_samples=None, seed=0, max_workers=None, model_paths=None, scorer=None):
+    """ Backtests every trial of the grid (or a random sample of it) across a process
+    pool, scoring with "scorer" (config sweep_scorer by default, see load_scorer).
+    The price history is placed in shared memory once and every worker reads
+    it from there. Each finished group of trials is appended to "results_path" and
+    the ranked "summary_path" csv is rewritten, so an interrupted sweep loses at
+    most the groups that were in flight; trials already in "results_path" are
+    skipped on the next run. Returns the ranked results as a data frame. """
+
+    results = load_results(results_path)
+    done = {result['trial_id'] for result in results}
+    trials = [trial for trial in build_trials(grid, num_samples, seed) if trial['trial_id'] not in done]
+    groups = group_trials(trials)
+    print('Sweeping {} trials in {} groups ({} already done)... [{}]'.format(len(trials), len(groups), len(done), datetime.datetime.utcnow()))
+
+    scorer = config_params['sweep_scorer'] if scorer is None else scorer
+    if model_paths is None:
+        model_paths = list(config_params['h2o_model_dict'].values())
+        jar_paths = [config_params['h2o_jar_dict'].get(model_name) for model_name in config_params['h2o_model_dict']]
+    else:
+        jar_paths = [None] * len(model_paths)
+    prices = np.ascontiguousarray(price_df[PRICE_COLUMNS].to_numpy(dtype=np.float64))
+    memory = shared_memory.SharedMemory(create=True, size=prices.nbytes)
+    try:
+        np.ndarray(prices.shape, dtype=np.float64, buffer=memory.buf)[:] = prices
+        initargs = (memory.name, prices.shape, scorer, model_paths, jar_paths, config_params['indicator_list'], config_params['bet'], config_params['bar_interval_seconds'], config_params['deadline_offset_seconds'])
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_worker, initargs=initargs) as pool:
+            futures = [pool.submit(_run_group, group) for group in groups]
+            with open(results_path, 'a') as f:
+                for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                    for result in future.result():
+                        f.write(json.dumps(result) + '\n')
+                        results.append(result)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    write_summary(results, summary_path)
+                    print('Finished group {} of {} [{}]'.format(i + 1, len(groups), datetime.datetime.utcnow()))
+    finally:
+        memory.close()
+        memory.unlink()
+
+    if not results:
+        return pd.DataFrame()
+    write_summary(results, summary_path)
+    return pd.read_csv(summary_path)
+
+
+# ENTRY POINT
+if __name__ == '__main__':
+    ranked_df = run_sweep(
+        load_prices(config_params['price_store_path'], config_params['input_price_file_path']),
+        config_params['sweep_grid'],
+        config_params['sweep_results_path'],
+        config_params['sweep_summary_path'],
+        num_samples=config_params['sweep_num_samples'],
+    )
+    print(ranked_df.head(20))
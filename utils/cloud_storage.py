@@ -0,0 +1,150 @@
+###############################################################################
+# FILENAME: cloud_storage.py
+# CLIENT: Chainview Capital
+# AUTHOR: Matt Hartigan
+# DATE CREATED: 18-Oct-2026
+# DESCRIPTION: Storage client factory plus a local stand-in for the parts of the
+#              google-cloud-storage API the bot uses (upload, download, exists,
+#              delete, compose, metadata), backed by a directory per bucket, so
+#              uploads can be run and tested without a cloud project.
+###############################################################################
+import os
+import json
+import shutil
+import tempfile
+
+from config import config_params
+
+
+MAX_COMPOSE_SOURCES = 32    # GCS limit on source objects per compose request
+METADATA_DIR = '.metadata'    # stand-in object metadata, kept out of the bucket directories
+
+
+class NotFound(Exception):
+    """ Raised by the stand-in where google.api_core.exceptions.NotFound would be. """
+
+
+# LOCAL STAND-IN
+class LocalBlob:
+    """ One object, stored as the file <root>/<bucket>/<name>. Like a GCS blob,
+    "metadata" is only filled in by reload() and is sent along with compose(). """
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.metadata = None
+
+    @property
+    def path(self):
+        return os.path.join(self.bucket.path, self.name)
+
+    @property
+    def _metadata_path(self):
+        return os.path.join(self.bucket.client.root, METADATA_DIR, self.bucket.name, self.name + '.json')
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path) if self.exists() else None
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def reload(self):
+        if not self.exists():
+            raise NotFound('No such object: ' + self.bucket.name + '/' + self.name)
+        if os.path.exists(self._metadata_path):
+            with open(self._metadata_path) as f:
+                self.metadata = json.load(f)
+        else:
+            self.metadata = None
+
+    def _write(self, write_function):
+        """ Writes the object through a temp file, so readers never see a partial
+        object (GCS objects are replaced atomically too). """
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.upload-')
+        with os.fdopen(fd, 'wb') as f:
+            write_function(f)
+        os.replace(temp_path, self.path)
+        os.makedirs(os.path.dirname(self._metadata_path), exist_ok=True)
+        with open(self._metadata_path, 'w') as f:
+            json.dump(self.metadata, f)
+
+    def upload_from_filename(self, filename):
+        with open(filename, 'rb') as source:
+            self._write(lambda f: shutil.copyfileobj(source, f))
+
+    def upload_from_string(self, data):
+        self._write(lambda f: f.write(data.encode('utf-8') if isinstance(data, str) else data))
+
+    def download_to_filename(self, filename):
+        if not self.exists():
+            raise NotFound('No such object: ' + self.bucket.name + '/' + self.name)
+        shutil.copyfile(self.path, filename)
+
+    def download_as_bytes(self):
+        if not self.exists():
+            raise NotFound('No such object: ' + self.bucket.name + '/' + self.name)
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def delete(self):
+        if not self.exists():
+            raise NotFound('No such object: ' + self.bucket.name + '/' + self.name)
+        os.remove(self.path)
+        if os.path.exists(self._metadata_path):
+            os.remove(self._metadata_path)
+
+    def compose(self, sources):
+        """ Replaces this object with the concatenation of "sources" (this object may
+        be one of them), with this blob's metadata. """
+
+        if not sources or len(sources) > MAX_COMPOSE_SOURCES:
+            raise ValueError('Compose takes 1 to ' + str(MAX_COMPOSE_SOURCES) + ' sources, got ' + str(len(sources)))
+        for source in sources:
+            if not source.exists():
+                raise NotFound('No such object: ' + source.bucket.name + '/' + source.name)
+
+        def concatenate(f):
+            for source in sources:
+                with open(source.path, 'rb') as part:
+                    shutil.copyfileobj(part, f)
+        self._write(concatenate)
+
+
+class LocalBucket:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.path = os.path.join(client.root, name)
+
+    def blob(self, blob_name):
+        return LocalBlob(self, blob_name)
+
+
+class LocalStorageClient:
+    """ Stand-in for google.cloud.storage.Client: bucket "name" is the directory
+    <root>/<name>. """
+
+    def __init__(self, root=None):
+        self.root = config_params['local_storage_path'] if root is None else root
+        if not self.root:
+            raise ValueError('The local storage client needs a root directory, set config_params["local_storage_path"].')
+
+    def bucket(self, bucket_name):
+        return LocalBucket(self, bucket_name)
+
+
+# CLIENT
+def get_storage_client():
+    """ A google.cloud.storage client, or the local stand-in when cloud_storage is
+    'local'. google-cloud-storage is only imported when it is used. """
+
+    if config_params['cloud_storage'] == 'local':
+        return LocalStorageClient()
+    if config_params['cloud_storage'] != 'gcs':
+        raise ValueError('Unknown cloud_storage: ' + str(config_params['cloud_storage']) + " (expected 'gcs' or 'local')")
+    from google.cloud import storage
+    return storage.Client()
+
@@ -0,0 +1,160 @@
+###############################################################################
+# FILENAME: features.py
+# CLIENT: Chainview Capital
+# AUTHOR: Matt Hartigan
+# DATE CREATED: 18-Oct-2026
+# DESCRIPTION: Pandas-free feature engine. Computes every configured indicator
+#              for every lookback period into a single preallocated matrix.
+###############################################################################
+import numpy as np
+
+from utils import kernels
+from utils import tracing
+
+
+OHLCV_KEYS = ['open', 'high', 'low', 'close', 'volume']
+
+
+# INTERMEDIATE REGISTRY
+# Values shared between indicators. Each one is computed at most once per run
+# (or once per lookback period for windowed intermediates) and reused by every
+# indicator that depends on it.
+# name: (windowed, dependencies, function(*dependency_values[, rolling_window]) -> float64 array)
+INTERMEDIATES = {
+    # per bar
+    'typical_price': (False, ['high', 'low', 'close'], kernels.typical_price),
+    'typical_price_change': (False, ['typical_price'], kernels.diff),
+    'raw_money_flow': (False, ['volume', 'typical_price'], lambda volume, price: volume * price),
+    'positive_money_flow': (False, ['typical_price_change', 'raw_money_flow'], lambda change, flow: kernels.split_by_direction(change, flow)[0]),
+    'negative_money_flow': (False, ['typical_price_change', 'raw_money_flow'], lambda change, flow: kernels.split_by_direction(change, flow)[1]),
+    'close_change': (False, ['close'], kernels.diff),
+    'gain': (False, ['close_change'], kernels.gains),
+    'loss': (False, ['close_change'], kernels.losses),
+    'higher_closes': (False, ['close_change'], lambda change: kernels.split_by_direction(change, np.abs(change))[0]),
+    'lower_closes': (False, ['close_change'], lambda change: kernels.split_by_direction(change, np.abs(change))[1]),
+    'log_returns': (False, ['close'], kernels.log_returns),
+    'garman_klass_terms': (False, ['open', 'high', 'low', 'close'], kernels.garman_klass_terms),
+
+    # per lookback period
+    'close_mean': (True, ['close'], kernels.rolling_mean),
+    'close_std': (True, ['close'], kernels.rolling_std),
+    'close_lagged': (True, ['close'], lambda close, n: kernels.shift(close, n - 1)),
+    'avg_gain': (True, ['gain'], kernels.wilder_smoothing),
+    'avg_loss': (True, ['loss'], kernels.wilder_smoothing),
+    'sum_higher_closes': (True, ['higher_closes'], kernels.rolling_sum),
+    'sum_lower_closes': (True, ['lower_closes'], kernels.rolling_sum),
+    'typical_price_mean': (True, ['typical_price'], kernels.rolling_mean),
+    'typical_price_mean_deviation': (True, ['typical_price'], kernels.rolling_mean_absolute_deviation),
+    'sum_positive_money_flow': (True, ['positive_money_flow'], kernels.rolling_sum),
+    'sum_negative_money_flow': (True, ['negative_money_flow'], kernels.rolling_sum),
+    'volume_sum': (True, ['volume'], kernels.rolling_sum),
+    'log_returns_std': (True, ['log_returns'], kernels.rolling_std),
+    'garman_klass_mean': (True, ['garman_klass_terms'], kernels.rolling_mean),
+}
+
+
+# INDICATOR REGISTRY
+# name: (output column suffix, dependencies, function(*dependency_values, rolling_window, standard_deviation) -> float64 array)
+INDICATORS = {
+    'bollinger_band': ('__BBands2', ['close_mean', 'close_std'], lambda mean, std, n, sd: kernels.bollinger_band_width(mean, std, sd)),
+    'roc': ('._ROC', ['close', 'close_lagged'], lambda close, lagged, n, sd: kernels.ratio(close - lagged, lagged)),
+    'sma': ('._SMA', ['close_mean'], lambda mean, n, sd: mean),
+    'zlema': ('.__ZLEMA', ['close'], lambda close, n, sd: kernels.zlema(close, n)),
+    'momentum': ('._momentum', ['close', 'close_lagged'], lambda close, lagged, n, sd: close - lagged),
+    'cci': ('.__CCI', ['typical_price', 'typical_price_mean', 'typical_price_mean_deviation'], lambda price, mean, deviation, n, sd: kernels.commodity_channel_index(price, mean, deviation)),
+    'rsi': ('._RSI', ['avg_gain', 'avg_loss'], lambda gain, loss, n, sd: kernels.relative_strength_index(gain, loss)),
+    'money_flow_index': ('.__MFI', ['sum_positive_money_flow', 'sum_negative_money_flow'], lambda positive, negative, n, sd: kernels.relative_strength_index(positive, negative)),
+    'chande_momentum_oscillator': ('._CMO', ['sum_higher_closes', 'sum_lower_closes'], lambda higher, lower, n, sd: kernels.chande_momentum_oscillator(higher, lower)),
+    'annualized_historical_volatility': ('.__volatility', ['log_returns_std'], lambda std, n, sd: np.sqrt(252) * std),    # FIXME: 252 periods per year (tradfi), use 365 for crypto
+    'garman_klass_volatility': ('.__garman.klass', ['garman_klass_mean'], lambda mean, n, sd: np.sqrt(mean)),
+    'vwap': ('.__VWAP', ['raw_money_flow', 'volume_sum'], lambda flow, volume_sum, n, sd: kernels.ratio(flow, volume_sum)),
+}
+
+
+# FUNCTIONS
+def ohlcv_arrays(df, open_label='Open', high_label='High', low_label='Low', close_label='Close', volume_label='Volume'):
+    """ Pulls the OHLCV columns out of a data frame as contiguous float64 arrays,
+    keyed the way the feature engine expects. """
+
+    labels = [open_label, high_label, low_label, close_label, volume_label]
+    return {key: np.ascontiguousarray(df[label].to_numpy(dtype=np.float64)) for key, label in zip(OHLCV_KEYS, labels)}
+
+
+def column_name(indicator, rolling_window):
+    """ Output column name for an indicator at a lookback period, e.g. X30._RSI """
+
+    return 'X' + str(rolling_window) + INDICATORS[indicator][0]
+
+
+def plan_features(indicator_list):
+    """ Walks the dependency graph of the requested indicators and returns the
+    intermediates they need in evaluation order, split into the ones computed once
+    per run and the ones computed once per lookback period. """
+
+    order = []
+
+    def visit(name, path):
+        if name in OHLCV_KEYS or name in order:
+            return
+        if name in path:
+            raise ValueError('Circular intermediate dependency: ' + ' -> '.join(path + [name]))
+        windowed, dependencies, function = INTERMEDIATES[name]
+        for dependency in dependencies:
+            if not windowed and INTERMEDIATES.get(dependency, (False,))[0]:
+                raise ValueError('Per bar intermediate ' + name + ' cannot depend on windowed intermediate ' + dependency)
+            visit(dependency, path + [name])
+        order.append(name)
+
+    for indicator in indicator_list:
+        for dependency in INDICATORS[indicator][1]:
+            visit(dependency, [])
+
+    shared = [name for name in order if not INTERMEDIATES[name][0]]
+    windowed = [name for name in order if INTERMEDIATES[name][0]]
+    return shared, windowed
+
+
+def calculate_features(ohlcv, lookback_periods, indicator_list, standard_deviation=2):
+    """ Computes every indicator in "indicator_list" at every lookback period into one
+    preallocated (rows x features) float64 matrix. Returns the matrix and the list
+    of column names, ordered indicator by indicator, lookback by lookback.
+
+    Intermediates are planned up front: per bar ones are computed once and reused
+    by every lookback period, windowed ones once per lookback period and dropped
+    before the next period starts. Only the arrays the requested indicators use
+    need to be present in the ohlcv dict. """
+
+    shared, windowed = plan_features(indicator_list)
+    num_rows = len(next(iter(ohlcv.values())))
+    column_names = [column_name(indicator, rolling_window) for indicator in indicator_list for rolling_window in lookback_periods]
+    feature_matrix = np.empty((num_rows, len(column_names)), order='F')    # column major so each feature is written contiguously
+
+    values = dict(ohlcv)
+    for name in shared:
+        values[name] = INTERMEDIATES[name][2](*[values[dependency] for dependency in INTERMEDIATES[name][1]])
+
+    for j, rolling_window in enumerate(lookback_periods):
+        window_values = dict(values)
+        for name in windowed:
+            window_values[name] = INTERMEDIATES[name][2](*[window_values[dependency] for dependency in INTERMEDIATES[name][1]], rolling_window)
+
+        for i, indicator in enumerate(indicator_list):
+            suffix, dependencies, function = INDICATORS[indicator]
+            with tracing.span('indicator:' + column_names[(i * len(lookback_periods)) + j], rows=num_rows):    # no-op outside a traced run
+                feature_matrix[:, (i * len(lookback_periods)) + j] = function(*[window_values[dependency] for dependency in dependencies], rolling_window, standard_deviation)
+
+    return feature_matrix, column_names
+
+
+def calculate_indicator(indicator, ohlcv, rolling_window, standard_deviation=2):
+    """ Computes a single indicator at a single lookback period. """
+
+    return calculate_features(ohlcv, [rolling_window], [indicator], standard_deviation)[0][:, 0]
+
+
+def features_to_df(feature_matrix, column_names, index=None):
+    """ Wraps a feature matrix in a pandas data frame. pandas is only imported when
+    a caller actually asks for a data frame. """
+
+    import pandas as pd
+    return pd.DataFrame(feature_matrix, columns=column_names, index=index)
@@ -0,0 +1,476 @@
+###############################################################################
+# FILENAME: incremental.py
+# CLIENT: Chainview Capital
+# AUTHOR: Matt Hartigan
+# DATE CREATED: 18-Oct-2026
+# DESCRIPTION: Stateful, bar by bar counterparts of the indicator library for
+#              live runs. Each update costs O(1) (O(window) for cci) no matter
+#              how long the history is, and all state serializes to json.
+###############################################################################
+import os
+import json
+import math
+import collections
+import numpy as np
+
+from utils import kernels
+from utils import features
+
+
+# BUILDING BLOCKS
+class RollingWindow:
+    """ The last "rolling_window" values with running sums. Sums are kept relative to
+    a reference value and rebuilt from the buffer once per window of pushes, so they
+    neither drift nor lose precision over long live runs. Statistics are NaN until
+    the window is full, or while it holds a NaN, same as the batch kernels. """
+
+    def __init__(self, rolling_window, values=()):
+        self.rolling_window = rolling_window
+        self.values = collections.deque(values, maxlen=rolling_window)
+        self._refresh()
+
+    def _refresh(self):
+        observed = [value for value in self.values if not math.isnan(value)]
+        self.reference = observed[0] if observed else 0.0
+        self.total = sum(value - self.reference for value in observed)
+        self.total_squares = sum((value - self.reference) ** 2 for value in observed)
+        self.missing = len(self.values) - len(observed)
+        self.pushes_since_refresh = 0
+
+    def push(self, value):
+        value = float(value)
+        if len(self.values) == self.rolling_window:    # drop the oldest value from the running sums
+            oldest = self.values[0]
+            if math.isnan(oldest):
+                self.missing -= 1
+            else:
+                self.total -= oldest - self.reference
+                self.total_squares -= (oldest - self.reference) ** 2
+        self.values.append(value)
+        if math.isnan(value):
+            self.missing += 1
+        else:
+            self.total += value - self.reference
+            self.total_squares += (value - self.reference) ** 2
+
+        self.pushes_since_refresh += 1
+        if self.pushes_since_refresh >= self.rolling_window:
+            self._refresh()
+
+    def is_ready(self):
+        return len(self.values) == self.rolling_window and self.missing == 0
+
+    def oldest(self):
+        """ Value rolling_window - 1 rows before the latest one. """
+        return self.values[0] if len(self.values) == self.rolling_window else math.nan
+
+    def sum(self):
+        return self.total + (self.rolling_window * self.reference) if self.is_ready() else math.nan
+
+    def mean(self):
+        return self.sum() / self.rolling_window
+
+    def std(self, ddof=1):
+        if not self.is_ready() or self.rolling_window <= ddof:
+            return math.nan
+        variance = (self.total_squares - (self.total ** 2 / self.rolling_window)) / (self.rolling_window - ddof)
+        return math.sqrt(max(variance, 0.0))
+
+    def mean_absolute_deviation(self):
+        """ O(rolling_window): there is no running form of the deviation around a moving mean. """
+        if not self.is_ready():
+            return math.nan
+        mean = self.mean()
+        return sum(abs(value - mean) for value in self.values) / self.rolling_window
+
+    def get_state(self):
+        return {'rolling_window': self.rolling_window, 'values': list(self.values)}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state['rolling_window'], state['values'])
+
+
+class ExponentialAverage:
+    """ Bar by bar version of kernels.exponential_filter, with the same seeding and
+    the same handling of missing values (skipped before the seed, fatal after). """
+
+    def __init__(self, rolling_window, method='ema', seed='sma', value=math.nan, seed_values=(), halted=False):
+        self.rolling_window = rolling_window
+        self.method = method
+        self.seed = seed
+        self.alpha = 2 / (rolling_window + 1) if method == 'ema' else 1 / rolling_window
+        self.value = value
+        self.seed_values = list(seed_values)
+        self.halted = halted
+
+    def update(self, observation):
+        observation = float(observation)
+        if self.halted:
+            return math.nan
+
+        if math.isnan(self.value):    # still seeding
+            if math.isnan(observation):
+                if self.seed_values:    # a gap inside the seed window makes the seed (and everything after) NaN
+                    self.halted = True
+                return math.nan
+            if self.seed == 'first':
+                self.value = observation
+            else:
+                self.seed_values.append(observation)
+                if len(self.seed_values) == self.rolling_window:
+                    self.value = float(np.mean(self.seed_values))
+                    self.seed_values = []
+            return self.value
+
+        if math.isnan(observation):
+            self.halted = True
+            self.value = math.nan
+            return math.nan
+
+        self.value = ((1 - self.alpha) * self.value) + (self.alpha * observation)
+        return self.value
+
+    def get_state(self):
+        return {
+            'rolling_window': self.rolling_window,
+            'method': self.method,
+            'seed': self.seed,
+            'value': self.value,
+            'seed_values': self.seed_values,
+            'halted': self.halted,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(**state)
+
+
+# INDICATORS
+class IncrementalIndicator:
+    """ Base class for the stateful indicators. Subclasses list their components in
+    COMPONENTS (attribute name: component class) and any scalar state in SCALARS,
+    which is all get_state / from_state need to round trip them. """
+
+    COMPONENTS = {}
+    SCALARS = []
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        self.rolling_window = rolling_window
+        self.standard_deviation = standard_deviation
+
+    def update(self, bar):
+        """ Takes one OHLCV bar (dict with open, high, low, close, volume) and returns
+        the updated indicator value. """
+        raise NotImplementedError
+
+    def get_state(self):
+        state = {'rolling_window': self.rolling_window, 'standard_deviation': self.standard_deviation}
+        for name in self.COMPONENTS:
+            state[name] = getattr(self, name).get_state()
+        for name in self.SCALARS:
+            state[name] = getattr(self, name)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = cls(state['rolling_window'], state['standard_deviation'])
+        for name, component in cls.COMPONENTS.items():
+            setattr(indicator, name, component.from_state(state[name]))
+        for name in cls.SCALARS:
+            setattr(indicator, name, state[name])
+        return indicator
+
+
+class IncrementalBollingerBand(IncrementalIndicator):
+    COMPONENTS = {'closes': RollingWindow}
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.closes = RollingWindow(rolling_window)
+
+    def update(self, bar):
+        self.closes.push(bar['close'])
+        return float(kernels.bollinger_band_width(self.closes.mean(), self.closes.std(), self.standard_deviation))
+
+
+class IncrementalROC(IncrementalIndicator):
+    COMPONENTS = {'closes': RollingWindow}
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.closes = RollingWindow(rolling_window)
+
+    def update(self, bar):
+        self.closes.push(bar['close'])
+        return float(kernels.ratio(bar['close'] - self.closes.oldest(), self.closes.oldest()))
+
+
+class IncrementalSMA(IncrementalIndicator):
+    COMPONENTS = {'closes': RollingWindow}
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.closes = RollingWindow(rolling_window)
+
+    def update(self, bar):
+        self.closes.push(bar['close'])
+        return self.closes.mean()
+
+
+class IncrementalZLEMA(IncrementalIndicator):
+    COMPONENTS = {'closes': RollingWindow, 'average': ExponentialAverage}
+    SCALARS = ['bars_seen']
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.lag = (rolling_window - 1) // 2
+        self.closes = RollingWindow(self.lag + 1)    # oldest value is the close "lag" rows ago
+        self.average = ExponentialAverage(rolling_window, method='ema', seed='first')
+        self.bars_seen = 0
+
+    def update(self, bar):
+        self.closes.push(bar['close'])
+        if self.bars_seen >= self.lag:
+            value = self.average.update(bar['close'] + (bar['close'] - self.closes.oldest()))    # de-lagged close
+        elif self.bars_seen == max(self.lag - 1, 0):
+            value = self.average.update(bar['close'])    # seed with the close of the lagged row
+        else:
+            value = math.nan
+        self.bars_seen += 1
+        return value
+
+
+class IncrementalMomentum(IncrementalIndicator):
+    COMPONENTS = {'closes': RollingWindow}
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.closes = RollingWindow(rolling_window)
+
+    def update(self, bar):
+        self.closes.push(bar['close'])
+        return bar['close'] - self.closes.oldest()
+
+
+class IncrementalCCI(IncrementalIndicator):
+    COMPONENTS = {'prices': RollingWindow}
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.prices = RollingWindow(rolling_window)
+
+    def update(self, bar):
+        price = float(kernels.typical_price(bar['high'], bar['low'], bar['close']))
+        self.prices.push(price)
+        return float(kernels.commodity_channel_index(price, self.prices.mean(), self.prices.mean_absolute_deviation()))
+
+
+class IncrementalRSI(IncrementalIndicator):
+    COMPONENTS = {'avg_gain': ExponentialAverage, 'avg_loss': ExponentialAverage}
+    SCALARS = ['previous_close']
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.avg_gain = ExponentialAverage(rolling_window, method='wilder')
+        self.avg_loss = ExponentialAverage(rolling_window, method='wilder')
+        self.previous_close = math.nan
+
+    def update(self, bar):
+        change = bar['close'] - self.previous_close
+        self.previous_close = float(bar['close'])
+        gain = self.avg_gain.update(kernels.gains(change))
+        loss = self.avg_loss.update(kernels.losses(change))
+        return float(kernels.relative_strength_index(gain, loss))
+
+
+class IncrementalMoneyFlowIndex(IncrementalIndicator):
+    COMPONENTS = {'positive_flows': RollingWindow, 'negative_flows': RollingWindow}
+    SCALARS = ['previous_price']
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.positive_flows = RollingWindow(rolling_window)
+        self.negative_flows = RollingWindow(rolling_window)
+        self.previous_price = math.nan
+
+    def update(self, bar):
+        price = float(kernels.typical_price(bar['high'], bar['low'], bar['close']))
+        positive, negative = kernels.split_by_direction(price - self.previous_price, bar['volume'] * price)
+        self.previous_price = price
+        self.positive_flows.push(positive)
+        self.negative_flows.push(negative)
+        return float(kernels.relative_strength_index(self.positive_flows.sum(), self.negative_flows.sum()))
+
+
+class IncrementalChandeMomentumOscillator(IncrementalIndicator):
+    COMPONENTS = {'higher_closes': RollingWindow, 'lower_closes': RollingWindow}
+    SCALARS = ['previous_close']
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.higher_closes = RollingWindow(rolling_window)
+        self.lower_closes = RollingWindow(rolling_window)
+        self.previous_close = math.nan
+
+    def update(self, bar):
+        change = bar['close'] - self.previous_close
+        self.previous_close = float(bar['close'])
+        higher, lower = kernels.split_by_direction(change, abs(change))
+        self.higher_closes.push(higher)
+        self.lower_closes.push(lower)
+        return float(kernels.chande_momentum_oscillator(self.higher_closes.sum(), self.lower_closes.sum()))
+
+
+class IncrementalAnnualizedHistoricalVolatility(IncrementalIndicator):
+    COMPONENTS = {'returns': RollingWindow}
+    SCALARS = ['previous_close']
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.returns = RollingWindow(rolling_window)
+        self.previous_close = math.nan
+
+    def update(self, bar):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.returns.push(np.log(bar['close'] / self.previous_close))
+        self.previous_close = float(bar['close'])
+        return math.sqrt(252) * self.returns.std()    # FIXME: 252 periods per year (tradfi), use 365 for crypto
+
+
+class IncrementalGarmanKlassVolatility(IncrementalIndicator):
+    COMPONENTS = {'terms': RollingWindow}
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.terms = RollingWindow(rolling_window)
+
+    def update(self, bar):
+        self.terms.push(kernels.garman_klass_terms(bar['open'], bar['high'], bar['low'], bar['close']))
+        return float(np.sqrt(self.terms.mean()))
+
+
+class IncrementalVWAP(IncrementalIndicator):
+    COMPONENTS = {'volumes': RollingWindow}
+
+    def __init__(self, rolling_window, standard_deviation=2):
+        super().__init__(rolling_window, standard_deviation)
+        self.volumes = RollingWindow(rolling_window)
+
+    def update(self, bar):
+        self.volumes.push(bar['volume'])
+        price = kernels.typical_price(bar['high'], bar['low'], bar['close'])
+        return float(kernels.ratio(bar['volume'] * price, self.volumes.sum()))
+
+
+INCREMENTAL_INDICATORS = {    # same names as the feature engine registry
+    'bollinger_band': IncrementalBollingerBand,
+    'roc': IncrementalROC,
+    'sma': IncrementalSMA,
+    'zlema': IncrementalZLEMA,
+    'momentum': IncrementalMomentum,
+    'cci': IncrementalCCI,
+    'rsi': IncrementalRSI,
+    'money_flow_index': IncrementalMoneyFlowIndex,
+    'chande_momentum_oscillator': IncrementalChandeMomentumOscillator,
+    'annualized_historical_volatility': IncrementalAnnualizedHistoricalVolatility,
+    'garman_klass_volatility': IncrementalGarmanKlassVolatility,
+    'vwap': IncrementalVWAP,
+}
+
+
+# ENGINE
+class IncrementalFeatureEngine:
+    """ Keeps one stateful indicator per configured indicator x lookback period and
+    returns the latest feature row for every new bar. """
+
+    def __init__(self, lookback_periods, indicator_list, standard_deviation=2, last_unix=None, latest=None):
+        self.lookback_periods = list(lookback_periods)
+        self.indicator_list = list(indicator_list)
+        self.standard_deviation = standard_deviation
+        self.last_unix = last_unix    # timestamp of the last bar applied, used to skip bars already seen
+        self.latest = latest or {}    # feature row of the last bar applied
+        self.indicators = {
+            features.column_name(indicator, rolling_window): INCREMENTAL_INDICATORS[indicator](rolling_window, standard_deviation)
+            for indicator in self.indicator_list for rolling_window in self.lookback_periods
+        }
+
+    def update(self, bar, unix=None):
+        """ Applies one OHLCV bar and returns {column name: value} for every feature. """
+
+        if unix is not None:
+            self.last_unix = unix
+        self.latest = {column: indicator.update(bar) for column, indicator in self.indicators.items()}
+        return self.latest
+
+    def warm_up(self, ohlcv, unix=None):
+        """ Feeds a history of bars (ohlcv dict of arrays) one at a time. Returns the
+        feature row of the last bar. """
+
+        for i in range(len(ohlcv['close'])):
+            self.update({key: ohlcv[key][i] for key in features.OHLCV_KEYS}, None if unix is None else int(unix[i]))
+        return self.latest
+
+    def matches_config(self, lookback_periods, indicator_list, standard_deviation):
+        return self.lookback_periods == list(lookback_periods) and self.indicator_list == list(indicator_list) and self.standard_deviation == standard_deviation
+
+    def get_state(self):
+        return {
+            'lookback_periods': self.lookback_periods,
+            'indicator_list': self.indicator_list,
+            'standard_deviation': self.standard_deviation,
+            'last_unix': self.last_unix,
+            'latest': self.latest,
+            'indicators': {column: indicator.get_state() for column, indicator in self.indicators.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(state['lookback_periods'], state['indicator_list'], state['standard_deviation'], state['last_unix'], state['latest'])
+        for indicator in engine.indicator_list:
+            for rolling_window in engine.lookback_periods:
+                column = features.column_name(indicator, rolling_window)
+                engine.indicators[column] = INCREMENTAL_INDICATORS[indicator].from_state(state['indicators'][column])
+        return engine
+
+    def save(self, path):
+        """ Writes the state through a synced temp file and an atomic rename, so a crash
+        mid-write leaves the previous state in place. """
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.get_state(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)    # commit
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_state(json.load(f))
+
+
+# CONSISTENCY CHECK
+def compare_with_batch(ohlcv, lookback_periods, indicator_list, standard_deviation=2):
+    """ Runs the incremental engine bar by bar over a history and returns the max
+    relative difference from the batch feature engine for every column. NaN layouts
+    that disagree count as an infinite difference. """
+
+    feature_matrix, column_names = features.calculate_features(ohlcv, lookback_periods, indicator_list, standard_deviation)
+    engine = IncrementalFeatureEngine(lookback_periods, indicator_list, standard_deviation)
+
+    incremental_matrix = np.empty_like(feature_matrix)
+    for i in range(feature_matrix.shape[0]):
+        row = engine.update({key: ohlcv[key][i] for key in features.OHLCV_KEYS})
+        incremental_matrix[i] = [row[column] for column in column_names]
+
+    errors = {}
+    for j, column in enumerate(column_names):
+        batch, incremental = feature_matrix[:, j], incremental_matrix[:, j]
+        if not np.array_equal(np.isnan(batch), np.isnan(incremental)):
+            errors[column] = math.inf
+        elif np.isnan(batch).all():
+            errors[column] = 0.0
+        else:
+            errors[column] = float(np.nanmax(np.abs(batch - incremental) / np.maximum(np.abs(batch), 1)))
+    return errors
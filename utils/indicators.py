@@ -12,6 +12,15 @@ import statistics
 import pandas as pd
 import numpy as np
 
+from utils import features
+
+
+def _arrays(df, **labels):
+    """ Maps feature engine input names (open, high, low, close, volume) to float64
+    arrays pulled from the given data frame columns. """
+
+    return {key: df[label].to_numpy(dtype=np.float64) for key, label in labels.items()}
+
 
 # GENERAL INDICATORS
 def bollinger_band(input_df, column_label, rolling_window, standard_deviation):
@@ -22,20 +31,9 @@ def bollinger_band(input_df, column_label, rolling_window, standard_deviation):
 
     df = input_df.copy()    # make copy of input df
 
-    df['std'] = df[column_label].rolling(rolling_window).std()    # calc rolling standard deviation
-
-    col_name = 'X' + str(rolling_window) + '__BBands2'    # define output column name
+    col_name = features.column_name('bollinger_band', rolling_window)    # define output column name
+    df[col_name] = features.calculate_indicator('bollinger_band', _arrays(df, close=column_label), rolling_window, standard_deviation)
 
-    df['bb_mid'] = df[column_label].rolling(rolling_window).mean()    # calculate rolling mean (BB midpoint)
-    df['bb_top'] = df['bb_mid'] + (standard_deviation * df['std'])    # create top band    
-    df['bb_bot'] = df['bb_mid'] - (standard_deviation * df['std'])    # create bottom band
-    df[col_name] = (df['bb_top'] - df['bb_bot']) / df['bb_mid']    # calculate (normalized) width
-
-    df.drop('std', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('bb_mid', axis=1, inplace=True)    
-    df.drop('bb_top', axis=1, inplace=True)    
-    df.drop('bb_bot', axis=1, inplace=True)    
-    
     return df
 
 
@@ -49,13 +47,8 @@ def roc(input_df, close_label, rolling_window):
 
     df = input_df.copy()
 
-    df['previous_price'] = df[close_label].shift(rolling_window - 1)
-    df['price_change'] = df[close_label] - df['previous_price']    # price change over specified lookback period
-    col_name = 'X' + str(rolling_window) + '._ROC'
-    df[col_name] = df['price_change'] / df['previous_price']    # raw price change (positive or negative)
-
-    df.drop('price_change', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('previous_price', axis=1, inplace=True)
+    col_name = features.column_name('roc', rolling_window)
+    df[col_name] = features.calculate_indicator('roc', _arrays(df, close=close_label), rolling_window)
 
     return df
 
@@ -68,8 +61,8 @@ def sma(input_df, close_label, rolling_window):
 
     df = input_df.copy()
 
-    col_name = 'X' + str(rolling_window) + '._SMA'
-    df[col_name] = df[close_label].rolling(rolling_window).mean()
+    col_name = features.column_name('sma', rolling_window)
+    df[col_name] = features.calculate_indicator('sma', _arrays(df, close=close_label), rolling_window)
 
     return df
 
@@ -83,22 +76,8 @@ def zlema(input_df, close_label, rolling_window):
 
     df = input_df.copy()
 
-    lag = int(math.floor((rolling_window - 1) / 2))    # calc lag factor
-    smoothing_factor = 2 / (rolling_window + 1)    # calc smoothing factor
-
-    # calc ema
-    df['ema'] = df[close_label].rolling(window=rolling_window, min_periods=rolling_window).mean()[:rolling_window+1]    # get regular sma to start
-    for i, row in enumerate(df['ema'].iloc[rolling_window+1:]):    # calculate ema based on first cell with sma
-        df['ema'].iloc[i + rolling_window + 1] = ((df[close_label].iloc[i + rolling_window + 1] - df['ema'].iloc[i + rolling_window]) * smoothing_factor) + df['ema'].iloc[i + rolling_window]
-
-    # calc zlema
-    col_name = 'X' + str(rolling_window) + '.__ZLEMA'
-    df[col_name] = None
-    df[col_name].iloc[lag - 1] = df[close_label].iloc[lag - 1]    # get close price of the lagged day to start the zlema column calc from
-    for i, row in enumerate(df[col_name].iloc[lag:]):    
-        df[col_name].iloc[i + lag] = ((1- smoothing_factor) * df[col_name].iloc[i + lag - 1]) + smoothing_factor * (df[close_label].iloc[i + lag] + (df[close_label].iloc[i + lag] - df[close_label].iloc[i + lag - lag]))    # apply formula
-
-    df.drop('ema', axis=1, inplace=True)    # drop unnecessary columns from output
+    col_name = features.column_name('zlema', rolling_window)
+    df[col_name] = features.calculate_indicator('zlema', _arrays(df, close=close_label), rolling_window)    # float64 column from the numpy ema engine
 
     return df
 
@@ -115,8 +94,8 @@ def momentum(input_df, close_label, rolling_window):
 
     df = input_df.copy()
 
-    col_name = 'X' + str(rolling_window) + '._momentum'
-    df[col_name] = df[close_label] - df[close_label].shift(periods=rolling_window-1)
+    col_name = features.column_name('momentum', rolling_window)
+    df[col_name] = features.calculate_indicator('momentum', _arrays(df, close=close_label), rolling_window)
 
     return df
 
@@ -136,33 +115,8 @@ def cci(input_df, high_label, low_label, close_label, rolling_window):
 
     df = input_df.copy()    # make copy of input df
 
-    lambert_constant = 0.015
-
-    df['typical_price'] = (df[high_label] + df[low_label] + df[close_label]) / 3    # calculate typical price
-    df['typical_price_sma'] = df['typical_price'].rolling(rolling_window).mean()    # calculate typical price rolling sma
-
-    for x in range(0, rolling_window):    # add a shifted typical price column for each sma period
-        col_name = 'tp_shift_' + str(x)
-        df[col_name] = df['typical_price'].shift(periods=x) 
-        df = df.copy()    # avoid fragmentation
-
-    df['mean_deviation'] = 0    # initialize mean_deviation col
-    for x in range(0, rolling_window):    # sum the abs difference between sma and prev [rolling window] typical prices
-        col_name = 'tp_shift_' + str(x)
-        df['mean_deviation'] = df['mean_deviation'] + abs(df['typical_price_sma'] - df[col_name])
-
-    df['mean_deviation_adj'] = df['mean_deviation'] / rolling_window    # normalize by size of rolling window
-
-    col_name = 'X' + str(rolling_window) + '.__CCI'
-    df[col_name] = (df['typical_price'] - df['typical_price_sma']) / (lambert_constant * df['mean_deviation_adj'])    # calculate cci
-
-    df.drop('typical_price', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('typical_price_sma', axis=1, inplace=True)
-    df.drop('mean_deviation', axis=1, inplace=True)
-    df.drop('mean_deviation_adj', axis=1, inplace=True)
-    for x in range(0, rolling_window):    
-        col_name = 'tp_shift_' + str(x)
-        df.drop(col_name, axis=1, inplace=True) 
+    col_name = features.column_name('cci', rolling_window)
+    df[col_name] = features.calculate_indicator('cci', _arrays(df, high=high_label, low=low_label, close=close_label), rolling_window)    # rolling mean deviation kernel, no per-shift columns
 
     return df
 
@@ -175,35 +129,11 @@ def rsi(input_df, close_label, rolling_window):
         source: https://www.alpharithms.com/relative-strength-index-rsi-in-python-470209/
         source: https://school.stockcharts.com/doku.php?id=technical_indicators:relative_strength_index_rsi
     """
-    df = input_df.copy()
 
-    df['previous_close'] = df[close_label].shift(periods=1)    # calcluate price change
-    df['change'] = df[close_label] - df['previous_close']
-
-    df['gain'] = df['change'].clip(lower=0)
-    df['loss'] = abs(df['change'].clip(upper=0))
-
-    df['avg_gain'] = df['gain'].rolling(window=rolling_window, min_periods=rolling_window).mean()[:rolling_window+1]    # get regular sma for gains
-    df['avg_loss'] = df['loss'].rolling(window=rolling_window, min_periods=rolling_window).mean()[:rolling_window+1]    # get regular sma for losses
-
-    for i, row in enumerate(df['avg_gain'].iloc[rolling_window+1:]):    # calculate Wilder-method-specific moving averages
-        df['avg_gain'].iloc[i + rolling_window + 1] = (df['avg_gain'].iloc[i + rolling_window] * (rolling_window - 1) + df['gain'].iloc[i + rolling_window + 1]) / rolling_window
-
-    for i, row in enumerate(df['avg_loss'].iloc[rolling_window+1:]):    # calculate Wilder-method-specific moving averages
-        df['avg_loss'].iloc[i + rolling_window + 1] = (df['avg_loss'].iloc[i + rolling_window] * (rolling_window - 1) + df['loss'].iloc[i + rolling_window + 1]) / rolling_window
-
-    df['rs'] = df['avg_gain'] / df['avg_loss']    # calculate rs
-
-    col_name = 'X' + str(rolling_window) + '._RSI'
-    df[col_name] = 100 - (100 / (1 + df['rs']))    # calculate rsi
+    df = input_df.copy()
 
-    df.drop('previous_close', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('change', axis=1, inplace=True)
-    df.drop('gain', axis=1, inplace=True)
-    df.drop('loss', axis=1, inplace=True)
-    df.drop('avg_gain', axis=1, inplace=True)
-    df.drop('avg_loss', axis=1, inplace=True)
-    df.drop('rs', axis=1, inplace=True)
+    col_name = features.column_name('rsi', rolling_window)
+    df[col_name] = features.calculate_indicator('rsi', _arrays(df, close=close_label), rolling_window)    # gains / losses smoothed with the numpy wilder kernel
 
     return df
 
@@ -219,29 +149,8 @@ def money_flow_index(input_df, close_label, high_label, low_label, volume_label,
 
     df = input_df.copy()
 
-    df['typical_price'] = ((df[close_label] + df[high_label] + df[low_label]) / 3)
-
-    df['change'] = df['typical_price'] - df['typical_price'].shift(periods=1)
-    df['raw_money_flow'] = df[volume_label] * df['typical_price']
-    df['positive_flow'] = 0
-    df['negative_flow'] = 0
-    df.loc[df['change'] >= 0, 'positive_flow'] = df['raw_money_flow']
-    df.loc[df['change'] < 0, 'negative_flow'] = df['raw_money_flow']
-    df['sum_positive_money_flows'] = df['positive_flow'].rolling(rolling_window).sum()    
-    df['sum_negative_money_flows'] = df['negative_flow'].rolling(rolling_window).sum()
-    df['money_flow_ratio'] = df['sum_positive_money_flows'] / df['sum_negative_money_flows']
-
-    col_name = 'X' + str(rolling_window) + '.__MFI'   
-    df[col_name] = 100 - (100 / (1 + df['money_flow_ratio']))
-
-    df.drop('typical_price', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('change', axis=1, inplace=True)    
-    df.drop('raw_money_flow', axis=1, inplace=True)    
-    df.drop('positive_flow', axis=1, inplace=True)    
-    df.drop('negative_flow', axis=1, inplace=True)    
-    df.drop('sum_positive_money_flows', axis=1, inplace=True)    
-    df.drop('sum_negative_money_flows', axis=1, inplace=True)    
-    df.drop('money_flow_ratio', axis=1, inplace=True)    
+    col_name = features.column_name('money_flow_index', rolling_window)
+    df[col_name] = features.calculate_indicator('money_flow_index', _arrays(df, high=high_label, low=low_label, close=close_label, volume=volume_label), rolling_window)
 
     return df
 
@@ -262,24 +171,8 @@ def chande_momentum_oscillator(input_df, close_label, rolling_window):
 
     df = input_df.copy()
 
-    # sum when closes are higher and when they are lower
-    df['change'] = df[close_label] - df[close_label].shift(periods=1)
-    df['higher_closes'] = 0
-    df['lower_closes'] = 0
-    df.loc[df['change'] >= 0, 'higher_closes'] = abs(df['change'])
-    df.loc[df['change'] < 0, 'lower_closes'] = abs(df['change'])
-    df['sum_higher_closes'] = df['higher_closes'].rolling(rolling_window).sum()    
-    df['sum_lower_closes'] = df['lower_closes'].rolling(rolling_window).sum()
-
-    # calculate rolling metric
-    col_name = 'X' + str(rolling_window) + '._CMO'   
-    df[col_name] = ((df['sum_higher_closes'] - df['sum_lower_closes']) / (df['sum_higher_closes'] + df['sum_lower_closes'])) * 100
-
-    df.drop('change', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('higher_closes', axis=1, inplace=True)    
-    df.drop('lower_closes', axis=1, inplace=True)    
-    df.drop('sum_higher_closes', axis=1, inplace=True)    
-    df.drop('sum_lower_closes', axis=1, inplace=True)    
+    col_name = features.column_name('chande_momentum_oscillator', rolling_window)
+    df[col_name] = features.calculate_indicator('chande_momentum_oscillator', _arrays(df, close=close_label), rolling_window)
 
     return df
 
@@ -295,19 +188,8 @@ def annualized_historical_volatility(input_df, close_label, rolling_window):
 
     df = input_df.copy()
 
-    # annualized_factor = 365    # num periods in a year (crypto)
-    annualized_factor = 252    # FIXME: num periods in a year (tradfi)
-
-    df['close_shift'] = df[close_label].shift(periods=1)    # shift close periods by 1 for calc on following line 
-    # df['interday_returns'] = (df[close_label] / df['close_shift']) - 1    # FIXME: traditional way to find inter-period percent return (can switch with ln method)
-    df['interday_returns'] = np.log(df[close_label] / df['close_shift'])
-    df['std'] = df['interday_returns'].rolling(rolling_window).std()    # calc standard dev
-    col_name = 'X' + str(rolling_window) + '.__volatility'   
-    df[col_name] = math.sqrt(annualized_factor) * df['std']    # annualize to get result
-
-    df.drop('std', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('interday_returns', axis=1, inplace=True)    
-    df.drop('close_shift', axis=1, inplace=True)    
+    col_name = features.column_name('annualized_historical_volatility', rolling_window)
+    df[col_name] = features.calculate_indicator('annualized_historical_volatility', _arrays(df, close=close_label), rolling_window)
 
     return df
 
@@ -318,26 +200,11 @@ def garman_klass_volatility(input_df, open_label, high_label, low_label, close_l
     
     Source: https://www.youtube.com/watch?v=_v1UHy7OpjU
     """
-    
-    df = input_df.copy()
-
-    constant = (2 * np.log(2)) - 1    # the constant for the second term in the equation
-
-    # calculate component terms
-    df['ln(h/l)_squared'] = ((np.log(df[high_label] / df[low_label])) ** 2)    # first term in equation
-    df['ln(c/o)_squared'] = (np.log(df[close_label] / df[open_label])) ** 2    # second term in equation
 
-    # weight component terms
-    df['combined_terms'] = (0.5 * df['ln(h/l)_squared']) + (constant * df['ln(c/o)_squared'])
-    
-    # calc rolling indicator
-    col_name = 'X' + str(rolling_window) + '.__garman.klass'   
-    df[col_name] = df['combined_terms'].rolling(rolling_window).mean()    # sum gk terms
-    df[col_name] = np.sqrt(df[col_name])    # take sqrt
+    df = input_df.copy()
 
-    df.drop('ln(h/l)_squared', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('ln(c/o)_squared', axis=1, inplace=True)    
-    df.drop('combined_terms', axis=1, inplace=True)    
+    col_name = features.column_name('garman_klass_volatility', rolling_window)
+    df[col_name] = features.calculate_indicator('garman_klass_volatility', _arrays(df, open=open_label, high=high_label, low=low_label, close=close_label), rolling_window)
 
     return df
 
@@ -355,19 +222,11 @@ def vwap(input_df, close_label, high_label, low_label, volume_label, rolling_win
 
     df = input_df.copy()
 
-    df['typical_price'] = ((df[close_label] + df[high_label] + df[low_label]) / 3)
-    df['volume_times_price'] = df[volume_label] * df['typical_price']
-    df['cumulative_volume'] = df[volume_label].rolling(rolling_window).sum()
-    col_name = 'X' + str(rolling_window) + '.__VWAP'
-    df[col_name] = df['volume_times_price'] / df['cumulative_volume']
-
-    df.drop('typical_price', axis=1, inplace=True)    # drop unnecessary columns from output
-    df.drop('volume_times_price', axis=1, inplace=True)    
-    df.drop('cumulative_volume', axis=1, inplace=True)    
+    col_name = features.column_name('vwap', rolling_window)
+    df[col_name] = features.calculate_indicator('vwap', _arrays(df, high=high_label, low=low_label, close=close_label, volume=volume_label), rolling_window)
 
     return df
 
 
-
 # TODO:
 #
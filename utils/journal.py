@@ -0,0 +1,323 @@
+###############################################################################
+# FILENAME: journal.py
+# CLIENT: Chainview Capital
+# AUTHOR: Matt Hartigan
+# DATE CREATED: 18-Oct-2026
+# DESCRIPTION: Append-only trade journal for the bot log. Rows are appended as
+#              csv lines to fsync'd local segment files; a background uploader
+#              ships only the segments not yet uploaded and composes them onto
+#              the cloud log object, so each run costs the same whatever the
+#              age of the bot.
+###############################################################################
+import os
+import io
+import json
+import atexit
+import datetime
+import threading
+import pandas as pd
+
+from utils import cloud_storage
+from config import config_params
+
+
+MANIFEST_FILE = 'manifest.json'
+SEGMENT_FILE = 'segment-{:08d}.csv'
+PART_SUFFIX = '.parts/{:08d}.csv'    # upload name of a segment, next to the log object until composed
+SEQ_METADATA_KEY = 'journal_seq'    # last segment composed into the log object
+
+
+def fsync_directory(path):
+    """ Makes a new or renamed file in "path" survive a crash. """
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# JOURNAL
+class TradeJournal:
+    """ The bot log as numbered segment files of csv lines in a directory. Only the
+    active (last) segment is appended to; seal() closes it so the uploader can ship
+    it. The manifest is the commit point, as in ColumnStore: it is replaced
+    atomically after the rows are synced and holds the column names, the row count,
+    the last row (all the strategy needs of the history), the committed size of the
+    active segment and the last uploaded segment. Rows written past the committed
+    size by an append that crashed before its manifest update are cut off when the
+    journal is opened. The first segment starts with the csv header, so the
+    segments concatenated in order are the full log csv. """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            with open(os.path.join(path, MANIFEST_FILE)) as f:
+                self.manifest = json.load(f)
+            self._truncate_uncommitted()
+        else:
+            self.manifest = {'columns': [], 'num_rows': 0, 'last_row': None, 'active_seq': 1, 'active_bytes': 0, 'uploaded_seq': 0}
+
+    def __len__(self):
+        return self.manifest['num_rows']
+
+    @property
+    def columns(self):
+        return self.manifest['columns']
+
+    def segment_path(self, seq):
+        return os.path.join(self.path, SEGMENT_FILE.format(seq))
+
+    def _truncate_uncommitted(self):
+        """ Cuts the active segment back to its committed size. """
+
+        segment_path = self.segment_path(self.manifest['active_seq'])
+        size = os.path.getsize(segment_path) if os.path.exists(segment_path) else 0
+        committed = self.manifest.setdefault('active_bytes', size)    # manifests written before the size was kept
+        if size > committed:
+            print('Dropping {} uncommitted bytes from trade journal segment {}'.format(os.path.getsize(segment_path) - committed, segment_path))
+            with open(segment_path, 'r+b') as f:
+                f.truncate(committed)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _save_manifest(self):
+        temp_path = os.path.join(self.path, MANIFEST_FILE + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.manifest, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, os.path.join(self.path, MANIFEST_FILE))    # commit
+        fsync_directory(self.path)
+
+    # WRITES
+    def append(self, df):
+        """ Appends the rows of "df" (the log columns, in order) to the active segment.
+        Returns the number of rows written. """
+
+        if len(df) == 0:
+            return 0
+        with self._lock:
+            if not self.columns:
+                os.makedirs(self.path, exist_ok=True)
+                self.manifest['columns'] = list(df.columns)
+            elif list(df.columns) != self.columns:
+                raise ValueError('Column mismatch: journal has ' + str(self.columns) + ', got ' + str(list(df.columns)))
+
+            data = df.to_csv(index=False, header=len(self) == 0, lineterminator='\n')
+            segment_path = self.segment_path(self.manifest['active_seq'])
+            is_new_segment = not os.path.exists(segment_path)
+            with open(segment_path, 'ab') as f:
+                f.truncate(self.manifest['active_bytes'] if not is_new_segment else 0)    # drop bytes of an append that never committed
+                f.write(data.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+                active_bytes = f.tell()
+            if is_new_segment:
+                fsync_directory(self.path)
+
+            self.manifest['active_bytes'] = active_bytes
+            self.manifest['num_rows'] += len(df)
+            self.manifest['last_row'] = json.loads(df.iloc[[-1]].to_json(orient='records', date_format='iso'))[0]
+            self._save_manifest()
+        return len(df)
+
+    def seed(self, df, uploaded=False):
+        """ Starts an empty journal from an existing log (e.g. the log csv the bot used
+        before the journal). With "uploaded" the seeded rows are taken to be in the
+        cloud log already and are not shipped again. """
+
+        with self._lock:
+            if len(self):
+                raise RuntimeError('Only an empty journal can be seeded.')
+            print('Seeding trade journal with {} log rows... [{}]'.format(len(df), datetime.datetime.utcnow()))
+            self.append(df)
+            sealed = self.seal()
+            if uploaded and sealed:
+                self.mark_uploaded(sealed[-1][0])
+
+    def seal(self):
+        """ Closes the active segment (when it holds rows) and returns (seq, path) of
+        every closed segment not uploaded yet, oldest first. """
+
+        with self._lock:
+            if os.path.exists(self.segment_path(self.manifest['active_seq'])):
+                self.manifest['active_seq'] += 1
+                self.manifest['active_bytes'] = 0
+                self._save_manifest()
+            return [(seq, self.segment_path(seq)) for seq in range(self.manifest['uploaded_seq'] + 1, self.manifest['active_seq']) if os.path.exists(self.segment_path(seq))]
+
+    def mark_uploaded(self, seq):
+        with self._lock:
+            if seq > self.manifest['uploaded_seq']:
+                self.manifest['uploaded_seq'] = seq
+                self._save_manifest()
+
+    # READS
+    def tail(self):
+        """ The last row as a one row data frame, indexed by its row number in the log
+        (so rows appended to it get the next row numbers), or an empty data frame. """
+
+        with self._lock:
+            if self.manifest['last_row'] is None:
+                return pd.DataFrame(columns=self.columns)
+            return pd.DataFrame([self.manifest['last_row']], columns=self.columns, index=[len(self) - 1])
+
+    def read_all(self):
+        """ The full log (every segment), e.g. for offline analysis. Not used per run. """
+
+        chunks = []
+        with self._lock:
+            for seq in range(1, self.manifest['active_seq'] + 1):
+                if os.path.exists(self.segment_path(seq)):
+                    with open(self.segment_path(seq), 'rb') as f:
+                        chunks.append(f.read())
+        data = b''.join(chunks)
+        return pd.read_csv(io.BytesIO(data)) if data else pd.DataFrame(columns=self.columns)
+
+
+# UPLOADER
+class JournalUploader:
+    """ Ships closed journal segments to the log object "blob_name" in "bucket_name"
+    from a daemon thread: each segment is uploaded as a part object and composed onto
+    the end of the log object server side, so an upload costs the size of the new
+    rows only. The log object's metadata records the last composed segment, so a
+    crash between the compose and the manifest update does not append a segment
+    twice. Runs every "interval" seconds, and right away when notified. """
+
+    def __init__(self, journal, bucket_name=None, blob_name=None, interval=None, client=None):
+        self.journal = journal
+        self.bucket_name = config_params['cloud_bucket_name'] if bucket_name is None else bucket_name
+        self.blob_name = config_params['output_log_file_path'] if blob_name is None else blob_name
+        self.interval = config_params['journal_upload_interval_seconds'] if interval is None else interval
+        self._client = client
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._upload_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def bucket(self):
+        if self._client is None:
+            self._client = cloud_storage.get_storage_client()
+        return self._client.bucket(self.bucket_name)
+
+    def remote_exists(self):
+        return self.bucket.blob(self.blob_name).exists()
+
+    def upload_pending(self):
+        """ Uploads and composes every closed segment not in the log object yet.
+        Returns the number of segments shipped. """
+
+        with self._upload_lock:
+            segments = self.journal.seal()
+            if not segments:
+                return 0
+            bucket = self.bucket
+            destination = bucket.blob(self.blob_name)
+            remote_seq = 0
+            if destination.exists():
+                destination.reload()
+                remote_seq = int((destination.metadata or {}).get(SEQ_METADATA_KEY, 0))
+            if remote_seq:
+                self.journal.mark_uploaded(min(remote_seq, segments[-1][0]))    # composed before a crash
+            segments = [(seq, path) for seq, path in segments if seq > remote_seq]
+
+            for start in range(0, len(segments), cloud_storage.MAX_COMPOSE_SOURCES - 1):    # one source is the log object itself
+                chunk = segments[start:start + cloud_storage.MAX_COMPOSE_SOURCES - 1]
+                parts = []
+                for seq, path in chunk:
+                    part = bucket.blob(self.blob_name + PART_SUFFIX.format(seq))
+                    part.upload_from_filename(path)
+                    parts.append(part)
+                sources = ([destination] if destination.exists() else []) + parts
+                destination.metadata = {SEQ_METADATA_KEY: str(chunk[-1][0])}
+                destination.compose(sources)
+                self.journal.mark_uploaded(chunk[-1][0])
+                for part in parts:
+                    part.delete()
+            return len(segments)
+
+    # BACKGROUND THREAD
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='journal-uploader', daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(self):
+        """ New rows were appended, upload them now instead of at the next interval. """
+
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                shipped = self.upload_pending()
+                if shipped:
+                    print('Uploaded {} trade journal segment(s) to the cloud log. [{}]'.format(shipped, datetime.datetime.utcnow()))
+            except Exception as e:    # kept for the next round, the local journal has the rows
+                print('Trade journal upload failed, retrying in {}s: {}'.format(self.interval, e))
+
+    def stop(self, flush=True):
+        """ Stops the thread, after a last upload when "flush" is set. """
+
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            try:
+                self.upload_pending()
+            except Exception as e:
+                print('Final trade journal upload failed, the rows stay in the local journal: ' + str(e))
+
+
+# SHARED INSTANCES
+_journal = None
+_uploader = None
+_lock = threading.Lock()
+
+
+def get_trade_journal():
+    """ Returns the process wide journal at trade_journal_path, or None when the
+    journal is not configured (the log is then rewritten and uploaded whole). """
+
+    global _journal
+    if not config_params['trade_journal_path']:
+        return None
+    with _lock:
+        if _journal is None:
+            _journal = TradeJournal(config_params['trade_journal_path'])
+    return _journal
+
+
+def get_journal_uploader():
+    """ Returns the process wide uploader of the trade journal, started on first use
+    and flushed when the process exits, or None when results do not go to the
+    cloud. """
+
+    global _uploader
+    journal = get_trade_journal()
+    if journal is None or not (config_params['in_production'] or config_params['output_results_to_cloud']):
+        return None
+    with _lock:
+        if _uploader is None:
+            _uploader = JournalUploader(journal).start()
+            atexit.register(_uploader.stop)
+    return _uploader
+
+
+def load_log_context(journal, read_history):
+    """ The part of the bot log the strategy needs: the journal's last row. An empty
+    journal is first seeded, once, from read_history() (the full log written before
+    the journal), which is taken to be uploaded already when the cloud log exists. """
+
+    if not len(journal):
+        uploader = get_journal_uploader()
+        journal.seed(read_history(), uploaded=uploader is not None and uploader.remote_exists())
+    return journal.tail()
@@ -0,0 +1,321 @@
+###############################################################################
+# FILENAME: kernels.py
+# CLIENT: Chainview Capital
+# AUTHOR: Matt Hartigan
+# DATE CREATED: 18-Oct-2026
+# DESCRIPTION: Pandas-free numpy kernels that back the indicator library.
+###############################################################################
+import numpy as np
+
+
+BLOCK_SIZE = 128    # rows solved per block by the recurrence kernel (keeps the triangular solve small)
+WINDOW_CHUNK_ELEMENTS = 2 ** 20    # max elements materialized at once by the sliding window kernels (~8 MB of float64)
+
+
+# RECURSIVE FILTERS
+def linear_recurrence(values, decay, initial=0.0):
+    """ Solves the first order recurrence y[i] = decay * y[i - 1] + values[i] with
+    y[-1] = initial, without a per-row python loop.
+
+    The input is cut into fixed size blocks. Every block is solved at once with a
+    small lower triangular matrix of decay powers, then the value carried over from
+    one block to the next is propagated with one step per block (n / BLOCK_SIZE
+    steps instead of n). Powers of decay never exceed 1, so there is no loss of
+    precision compared with the row by row loop. """
+
+    values = np.asarray(values, dtype=np.float64)
+    num_rows = values.shape[0]
+    if num_rows == 0:
+        return np.empty(0)
+
+    block_size = min(BLOCK_SIZE, num_rows)
+    num_blocks = -(-num_rows // block_size)    # ceiling division
+
+    blocks = np.zeros(num_blocks * block_size)    # pad the final block with zeros
+    blocks[:num_rows] = values
+    blocks = blocks.reshape(num_blocks, block_size)
+
+    powers = decay ** np.arange(block_size + 1, dtype=np.float64)    # decay^0 ... decay^block_size
+    lag = np.arange(block_size)[:, None] - np.arange(block_size)[None, :]
+    triangle = np.where(lag >= 0, powers[np.clip(lag, 0, None)], 0.0)    # triangle[k, j] = decay^(k - j) for j <= k
+
+    local = blocks @ triangle.T    # solution of each block assuming a zero carry in
+
+    carry = np.empty(num_blocks)    # value of y just before each block starts
+    previous = float(initial)
+    block_decay = powers[block_size]
+    for i, block_end in enumerate(local[:, -1]):
+        carry[i] = previous
+        previous = block_decay * previous + block_end
+
+    output = local + carry[:, None] * powers[None, 1:]
+    return output.ravel()[:num_rows]
+
+
+def exponential_filter(values, rolling_window, method='ema', seed='sma'):
+    """ Generic exponential smoothing engine for float arrays. Applies:
+
+    avg[i] = (1 - alpha) * avg[i - 1] + alpha * value[i]
+
+    ...where alpha = 2 / (rolling_window + 1) for method 'ema' and 1 / rolling_window
+    for method 'wilder'. The seed is either the simple average of the first
+    "rolling_window" observations ('sma') or the first observation itself ('first').
+    Rows before the seed are NaN. A missing value after the seed makes every later
+    row NaN, same as the recursive formula would. """
+
+    if method == 'ema':
+        alpha = 2 / (rolling_window + 1)
+    elif method == 'wilder':
+        alpha = 1 / rolling_window
+    else:
+        raise ValueError("method must be 'ema' or 'wilder'")
+
+    values = np.asarray(values, dtype=np.float64)
+    output = np.full(values.shape[0], np.nan)
+
+    observed = np.flatnonzero(~np.isnan(values))
+    if observed.size == 0:
+        return output
+
+    if seed == 'sma':
+        seed_index = observed[0] + rolling_window - 1
+        if seed_index >= values.shape[0]:
+            return output
+        seed_value = values[observed[0]:seed_index + 1].mean()
+    elif seed == 'first':
+        seed_index = observed[0]
+        seed_value = values[seed_index]
+    else:
+        raise ValueError("seed must be 'sma' or 'first'")
+
+    if np.isnan(seed_value):
+        return output
+    output[seed_index] = seed_value
+
+    remaining = values[seed_index + 1:]
+    missing = np.flatnonzero(np.isnan(remaining))
+    stop = missing[0] if missing.size else remaining.shape[0]    # recursion is NaN from the first gap onward
+
+    output[seed_index + 1:seed_index + 1 + stop] = linear_recurrence(alpha * remaining[:stop], 1 - alpha, initial=seed_value)
+
+    return output
+
+
+def ema(values, rolling_window, seed='sma'):
+    """ Classic exponential moving average with smoothing factor 2 / (rolling_window + 1). """
+
+    return exponential_filter(values, rolling_window, method='ema', seed=seed)
+
+
+def wilder_smoothing(values, rolling_window, seed='sma'):
+    """ Wilder's smoothed moving average (smoothing factor 1 / rolling_window). """
+
+    return exponential_filter(values, rolling_window, method='wilder', seed=seed)
+
+
+def dema(values, rolling_window, seed='sma'):
+    """ Double exponential moving average: 2 * EMA - EMA(EMA). """
+
+    first = ema(values, rolling_window, seed=seed)
+    second = ema(first, rolling_window, seed=seed)
+    return (2 * first) - second
+
+
+def tema(values, rolling_window, seed='sma'):
+    """ Triple exponential moving average: 3 * EMA - 3 * EMA(EMA) + EMA(EMA(EMA)). """
+
+    first = ema(values, rolling_window, seed=seed)
+    second = ema(first, rolling_window, seed=seed)
+    third = ema(second, rolling_window, seed=seed)
+    return (3 * first) - (3 * second) + third
+
+
+def zlema(values, rolling_window):
+    """ Zero lag exponential moving average. The ema is applied to the de-lagged
+    series 2 * value[i] - value[i - lag], with lag = floor((rolling_window - 1) / 2),
+    and is seeded with the raw value at row lag - 1.
+
+    Formula Source: https://tulipindicators.org/zlema
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    lag = (rolling_window - 1) // 2
+    seed_index = max(lag - 1, 0)
+
+    delagged = np.full(values.shape[0], np.nan)
+    if seed_index < values.shape[0]:
+        delagged[seed_index] = values[seed_index]    # start from the close price of the lagged row
+        delagged[lag:] = values[lag:] + (values[lag:] - values[:values.shape[0] - lag])
+
+    return exponential_filter(delagged, rolling_window, method='ema', seed='first')
+
+
+# ROLLING WINDOWS
+def rolling_sum(values, rolling_window):
+    """ Sum of the last "rolling_window" values. Rows without a full window of
+    observations are NaN, same as pandas rolling(rolling_window).sum().
+
+    Computed from a cumulative sum in a single pass. Values are shifted by the
+    first observation before summing so the running total stays small and the
+    differences keep full precision on long price histories. """
+
+    values = np.asarray(values, dtype=np.float64)
+    output = np.full(values.shape[0], np.nan)
+    if rolling_window > values.shape[0]:
+        return output
+
+    missing = np.isnan(values)
+    observed = values[~missing]
+    offset = observed[0] if observed.size else 0.0
+
+    totals = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0, values - offset))])
+    gaps = np.concatenate([[0], np.cumsum(missing)])
+
+    window_totals = totals[rolling_window:] - totals[:-rolling_window]
+    window_gaps = gaps[rolling_window:] - gaps[:-rolling_window]
+
+    output[rolling_window - 1:] = np.where(window_gaps > 0, np.nan, window_totals + (rolling_window * offset))
+    return output
+
+
+def rolling_mean(values, rolling_window):
+    """ Simple moving average of the last "rolling_window" values. """
+
+    return rolling_sum(values, rolling_window) / rolling_window
+
+
+def reduce_windows(values, rolling_window, reducer):
+    """ Applies reducer(windows) -> one value per window to every full window of
+    "rolling_window" values. Rows without a full window are NaN.
+
+    Works on a strided (zero copy) view of the windows, evaluated a chunk of rows
+    at a time so no more than WINDOW_CHUNK_ELEMENTS values are materialized at once,
+    whatever the length of the input or the size of the window. """
+
+    values = np.asarray(values, dtype=np.float64)
+    output = np.full(values.shape[0], np.nan)
+    if rolling_window > values.shape[0]:
+        return output
+
+    windows = np.lib.stride_tricks.sliding_window_view(values, rolling_window)
+    chunk_rows = max(1, WINDOW_CHUNK_ELEMENTS // rolling_window)
+    for start in range(0, windows.shape[0], chunk_rows):
+        chunk = windows[start:start + chunk_rows]
+        output[rolling_window - 1 + start:rolling_window - 1 + start + chunk.shape[0]] = reducer(chunk)
+
+    return output
+
+
+def rolling_mean_absolute_deviation(values, rolling_window):
+    """ Mean absolute deviation of the last "rolling_window" values around their own
+    average. Rows without a full window of observations are NaN. """
+
+    return reduce_windows(values, rolling_window, lambda chunk: np.abs(chunk - chunk.mean(axis=1)[:, None]).mean(axis=1))
+
+
+def rolling_std(values, rolling_window, ddof=1):
+    """ Sample standard deviation of the last "rolling_window" values, same as pandas
+    rolling(rolling_window).std(). Evaluated window by window rather than from
+    running sums of squares, which lose precision on price level data. """
+
+    return reduce_windows(values, rolling_window, lambda chunk: chunk.std(axis=1, ddof=ddof))
+
+
+# PRICE TRANSFORMS
+def shift(values, periods=1):
+    """ Value "periods" rows before each row. The first "periods" rows are NaN. """
+
+    values = np.asarray(values, dtype=np.float64)
+    output = np.full(values.shape[0], np.nan)
+    if 0 < periods < values.shape[0]:
+        output[periods:] = values[:-periods]
+    elif periods == 0:
+        output[:] = values
+    return output
+
+
+def diff(values, periods=1):
+    """ Difference between each value and the value "periods" rows before it. The
+    first "periods" rows are NaN. """
+
+    return np.asarray(values, dtype=np.float64) - shift(values, periods)
+
+
+def typical_price(high, low, close):
+    """ Typical price: (high + low + close) / 3. """
+
+    return (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) + np.asarray(close, dtype=np.float64)) / 3
+
+
+def log_returns(close):
+    """ Close to close log returns, ln(close[i] / close[i - 1]). The first row is NaN. """
+
+    close = np.asarray(close, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(close / shift(close))
+
+
+def gains(change):
+    """ Positive part of a change series. NaN stays NaN, like pandas clip. """
+
+    return np.clip(change, 0, None)
+
+
+def losses(change):
+    """ Magnitude of the negative part of a change series. NaN stays NaN. """
+
+    return np.abs(np.clip(change, None, 0))
+
+
+def split_by_direction(change, values):
+    """ Splits values into (up, down) arrays depending on whether change is >= 0 or
+    < 0. Rows with a NaN change count as neither and are zero in both. """
+
+    return np.where(change >= 0, values, 0.0), np.where(change < 0, values, 0.0)
+
+
+def garman_klass_terms(open_, high, low, close):
+    """ Weighted per-bar garman klass terms: 0.5 * ln(h/l)^2 + (2 ln 2 - 1) * ln(c/o)^2 """
+
+    constant = (2 * np.log(2)) - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        high_low_term = np.log(np.asarray(high, dtype=np.float64) / np.asarray(low, dtype=np.float64)) ** 2
+        close_open_term = np.log(np.asarray(close, dtype=np.float64) / np.asarray(open_, dtype=np.float64)) ** 2
+    return (0.5 * high_low_term) + (constant * close_open_term)
+
+
+# INDICATOR FORMULAS
+def ratio(numerator, denominator):
+    """ Elementwise numerator / denominator with NaN / inf instead of warnings. """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.asarray(numerator, dtype=np.float64) / denominator
+
+
+def relative_strength_index(up, down):
+    """ 100 - 100 / (1 + up / down), shared by rsi (smoothed gains / losses) and the
+    money flow index (summed positive / negative money flow). """
+
+    return 100 - (100 / (1 + ratio(up, down)))
+
+
+def bollinger_band_width(middle, std, standard_deviation):
+    """ Normalized bollinger band width: (top band - bottom band) / midpoint. """
+
+    deviation = standard_deviation * std
+    return ratio((middle + deviation) - (middle - deviation), middle)
+
+
+def commodity_channel_index(price, price_mean, mean_deviation, constant=0.015):
+    """ (typical price - moving average) / (constant * mean deviation), NaN where the
+    mean deviation is 0 (e.g. a window of 1), where the price can only differ from
+    its moving average by rounding. """
+
+    deviation = constant * np.asarray(mean_deviation, dtype=np.float64)
+    return np.where(deviation == 0, np.nan, ratio(price - price_mean, deviation))
+
+
+def chande_momentum_oscillator(sum_up, sum_down):
+    """ [(sum higher closes - sum lower closes) / (sum higher closes + sum lower closes)] x 100 """
+
+    return ratio(sum_up - sum_down, sum_up + sum_down) * 100
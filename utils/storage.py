@@ -0,0 +1,228 @@
+###############################################################################
+# FILENAME: storage.py
+# CLIENT: Chainview Capital
+# AUTHOR: Matt Hartigan
+# DATE CREATED: 18-Oct-2026
+# DESCRIPTION: Append-only columnar store for OHLCV bars and the bot log. One
+#              memory-mapped binary file per column plus a small json metadata
+#              file, indexed on the Unix timestamp column.
+###############################################################################
+import io
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+META_FILE = 'meta.json'
+TAIL_CHUNK_BYTES = 2 ** 16    # initial number of bytes read from the end of a csv when syncing
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DTYPES = {    # on disk type of each column kind
+    'index': '<i8',    # the Unix column, strictly increasing
+    'float': '<f8',
+    'datetime': '<i8',    # seconds since epoch
+    'category': '<i4',    # code into the column's category list, -1 for missing
+    'null': None,    # only missing values so far, no file until the first value arrives
+}
+MISSING = {    # on disk value of a missing entry of each column kind
+    'float': np.nan,
+    'datetime': np.iinfo(np.int64).min,    # NaT
+    'category': -1,
+}
+
+
+class ColumnStore:
+    """ Append-only columnar table stored in a directory. Reads memory-map only the
+    rows they need, so tail reads and time range reads cost the same whatever the
+    size of the history. The row count in the metadata file is the commit point: it
+    is only updated (atomically) after every column file has been written and
+    synced, so an interrupted append never exposes a partial row. """
+
+    def __init__(self, path, index_column='Unix'):
+        self.path = path
+        self.index_column = index_column
+        if os.path.exists(os.path.join(path, META_FILE)):
+            with open(os.path.join(path, META_FILE)) as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {'index_column': index_column, 'num_rows': 0, 'columns': []}
+
+    def __len__(self):
+        return self.meta['num_rows']
+
+    @property
+    def column_names(self):
+        return [column['name'] for column in self.meta['columns']]
+
+    # WRITES
+    @staticmethod
+    def _infer_kind(values):
+        """ Column kind of a batch of values. A column with no values yet is 'null', it
+        is typed by the first batch that has some (e.g. trade_win_or_loss of a new
+        log, empty until the first closed trade). """
+
+        present = values.dropna()
+        if len(present) == 0:
+            return 'null'
+        if pd.api.types.is_numeric_dtype(present):
+            return 'float'
+        if pd.api.types.is_datetime64_any_dtype(present) or pd.to_datetime(present, format=TIME_FORMAT, errors='coerce').notna().all():
+            return 'datetime'
+        return 'category'
+
+    def _infer_columns(self, df):
+        columns = []
+        for name in df.columns:
+            kind = 'index' if name == self.index_column else self._infer_kind(df[name])
+            columns.append({'name': name, 'kind': kind, 'categories': []})
+        if self.index_column not in df.columns:
+            raise ValueError('Column store needs an index column named ' + self.index_column)
+        return columns
+
+    def _type_null_column(self, i, column, values):
+        """ Types a 'null' column from the first batch with values and writes its file
+        with a missing entry for every stored row. The new kind is committed with the
+        batch's rows, a file left by an interrupted append is rewritten. """
+
+        column['kind'] = self._infer_kind(values)
+        with open(self._column_path(i), 'wb') as f:
+            f.write(np.full(len(self), MISSING[column['kind']], dtype=DTYPES[column['kind']]).tobytes())
+
+    def _encode(self, column, values):
+        if column['kind'] == 'index':
+            return values.to_numpy(dtype=np.int64)
+        if column['kind'] == 'float':
+            numeric = pd.to_numeric(values, errors='coerce')
+            if (numeric.isna() & values.notna()).any():    # never drop values silently
+                raise ValueError('Column ' + column['name'] + ' is numeric in the store, got non-numeric values ' + str(list(values[numeric.isna() & values.notna()].unique()[:5])))
+            return numeric.to_numpy(dtype=np.float64)
+        if column['kind'] == 'datetime':
+            return pd.to_datetime(values, format=TIME_FORMAT).to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+        codes = np.full(len(values), -1, dtype=np.int32)    # category
+        lookup = {label: code for code, label in enumerate(column['categories'])}
+        for label in values.dropna().unique():
+            if label not in lookup:
+                lookup[label] = len(column['categories'])
+                column['categories'].append(label)
+        present = values.notna().to_numpy()
+        codes[present] = values[present].map(lookup).to_numpy(dtype=np.int32)
+        return codes
+
+    def append(self, df):
+        """ Appends the rows of a data frame. Rows whose index value is not newer than
+        the last stored row are skipped, so re-appending an overlapping batch is safe.
+        Returns the number of rows written. """
+
+        if not self.meta['columns']:
+            os.makedirs(self.path, exist_ok=True)
+            self.meta['columns'] = self._infer_columns(df)
+        elif list(df.columns) != self.column_names:
+            raise ValueError('Column mismatch: store has ' + str(self.column_names) + ', got ' + str(list(df.columns)))
+
+        index = df[self.index_column].to_numpy(dtype=np.int64)
+        if len(self):
+            df = df[index > self.last_index()]
+            index = index[index > self.last_index()]
+        if len(df) == 0:
+            return 0
+        if np.any(np.diff(index) <= 0):
+            raise ValueError('Index column ' + self.index_column + ' must be strictly increasing')
+
+        for i, column in enumerate(self.meta['columns']):
+            if column['kind'] == 'null':
+                if df[column['name']].isna().all():
+                    continue
+                self._type_null_column(i, column, df[column['name']])
+            data = np.ascontiguousarray(self._encode(column, df[column['name']]), dtype=DTYPES[column['kind']])
+            with open(self._column_path(i), 'ab') as f:
+                f.truncate(len(self) * data.itemsize)    # drop bytes from an earlier append that never committed
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.meta['num_rows'] += len(df)
+        temp_path = os.path.join(self.path, META_FILE + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, os.path.join(self.path, META_FILE))    # commit
+
+        return len(df)
+
+    def sync_csv(self, csv_path):
+        """ Appends the rows of a csv file that are newer than the last stored row. An
+        empty store imports the whole file; after that only the end of the file is
+        read (growing the read until it reaches a row the store already has). A last
+        line without its newline is a row still being written and is left for the
+        next sync. """
+
+        if len(self) == 0:
+            with open(csv_path, 'rb') as f:
+                data = f.read()
+            data = data[:data.rfind(b'\n') + 1]    # complete lines only
+            return self.append(pd.read_csv(io.BytesIO(data))) if data.count(b'\n') > 1 else 0
+
+        size = os.path.getsize(csv_path)
+        read_bytes = min(size, TAIL_CHUNK_BYTES)
+        while True:
+            with open(csv_path, 'rb') as f:
+                f.seek(size - read_bytes)
+                data = f.read(read_bytes)
+            lines = data.split(b'\n')[1:-1]    # first line is either cut in half or the header, last is empty or still being written
+            tail_df = pd.read_csv(io.BytesIO(b'\n'.join(lines)), header=None, names=self.column_names)
+            if read_bytes == size or (len(tail_df) and tail_df[self.index_column].iloc[0] <= self.last_index()):
+                break
+            read_bytes = min(size, read_bytes * 2)
+
+        return self.append(tail_df)
+
+    # READS
+    def _column_path(self, i):
+        return os.path.join(self.path, '{:03d}.bin'.format(i))
+
+    def _column(self, i):
+        if self.meta['columns'][i]['kind'] == 'null':
+            return np.full(len(self), np.nan)
+        if len(self) == 0:
+            return np.empty(0, dtype=DTYPES[self.meta['columns'][i]['kind']])
+        return np.memmap(self._column_path(i), dtype=DTYPES[self.meta['columns'][i]['kind']], mode='r', shape=(len(self),))
+
+    def _decode(self, column, data):
+        if column['kind'] == 'datetime':
+            return data.astype('datetime64[s]')
+        if column['kind'] == 'category':
+            labels = np.array(column['categories'] + [None], dtype=object)    # code -1 picks the trailing None
+            return labels[data]
+        return np.array(data)
+
+    def last_index(self):
+        return int(self._column(self.column_names.index(self.index_column))[-1])
+
+    def read_rows(self, start, stop):
+        """ Rows [start, stop) as a data frame, with datetime columns as datetime64 and
+        category columns decoded back to their labels. """
+
+        start, stop = max(start, 0), min(stop, len(self))
+        return pd.DataFrame(
+            {column['name']: self._decode(column, self._column(i)[start:stop]) for i, column in enumerate(self.meta['columns'])},
+            index=pd.RangeIndex(start, max(start, stop)),
+        )
+
+    def tail(self, num_rows):
+        """ The last "num_rows" rows. """
+
+        return self.read_rows(len(self) - num_rows, len(self))
+
+    def read_range(self, start_index=None, end_index=None):
+        """ Rows whose index value is within [start_index, end_index]. Binary searches
+        the memory-mapped index column, so only the matching rows are touched. """
+
+        index = self._column(self.column_names.index(self.index_column))
+        start = 0 if start_index is None else int(np.searchsorted(index, start_index, side='left'))
+        stop = len(self) if end_index is None else int(np.searchsorted(index, end_index, side='right'))
+        return self.read_rows(start, stop)
+
+    def read_all(self):
+        return self.read_rows(0, len(self))
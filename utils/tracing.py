@@ -0,0 +1,341 @@
+###############################################################################
+# FILENAME: tracing.py
+# CLIENT: Chainview Capital
+# AUTHOR: Matt Hartigan
+# DATE CREATED: 18-Oct-2026
+# DESCRIPTION: Nested stage spans on the monotonic clock, rolling latency
+#              histograms per stage and their export as json lines and in the
+#              Prometheus text format.
+###############################################################################
+import json
+import time
+import datetime
+import threading
+import functools
+import contextlib
+import contextvars
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import config_params
+
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)    # histogram upper bounds (seconds)
+QUANTILES = (0.5, 0.9, 0.99)
+METRIC_PREFIX = 'eoc_bot'
+MIN_REGRESSION_SAMPLES = 20    # observations needed before a stage is checked for regressions
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+# SPANS
+class Span:
+    """ One timed stage. The path joins the names of the enclosing spans, e.g.
+    'run/machine_learning/indicators', and keys the stage's histogram. Attributes
+    hold counts and sizes such as rows processed or HTTP calls made. """
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.path = name if parent is None else parent.path + '/' + name
+        self.attributes = dict(attributes or {})
+        self.children = []
+        self.status = 'ok'
+        self.started_at = datetime.datetime.utcnow()
+        self.start = time.perf_counter()
+        self.duration = None
+        self._lock = threading.Lock()
+
+    def set(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def _add_child(self, span):
+        with self._lock:
+            self.children.append(span)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(),
+            'duration': self.duration,
+            'status': self.status,
+            'attributes': self.attributes,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+class _NoopSpan:
+    """ Stands in for a span when no trace is active (e.g. indicators computed by
+    the sweep workers), so instrumented code needs no checks. """
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+# METRICS
+class StageMetrics:
+    """ Latency of every stage path: a cumulative histogram (Prometheus histogram
+    semantics) plus the last "window" durations for rolling quantiles. """
+
+    def __init__(self, window=None, buckets=BUCKETS):
+        self.window = config_params['metrics_window'] if window is None else window
+        self.buckets = tuple(buckets)
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, path, seconds):
+        with self._lock:
+            if path not in self.stages:
+                self.stages[path] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(self.buckets), 'recent': collections.deque(maxlen=self.window)}
+            stage = self.stages[path]
+            stage['count'] += 1
+            stage['sum'] += seconds
+            for i, upper_bound in enumerate(self.buckets):
+                if seconds <= upper_bound:
+                    stage['buckets'][i] += 1
+            stage['recent'].append(seconds)
+
+    def snapshot(self):
+        """ {stage path: count, mean, max and QUANTILES over the rolling window, plus the
+        lifetime count} """
+
+        with self._lock:
+            stages = {path: (stage['count'], sorted(stage['recent'])) for path, stage in self.stages.items()}
+        result = {}
+        for path, (count, recent) in stages.items():
+            summary = {'count': count, 'window': len(recent), 'mean': sum(recent) / len(recent), 'max': recent[-1]}
+            for quantile in QUANTILES:
+                summary['p' + str(int(quantile * 100))] = quantile_of_sorted(recent, quantile)
+            result[path] = summary
+        return result
+
+    def is_regression(self, path, seconds, factor=None):
+        """ True when "seconds" is more than "factor" times the rolling median of the
+        stage (checked once the stage has MIN_REGRESSION_SAMPLES observations). """
+
+        factor = config_params['stage_regression_factor'] if factor is None else factor
+        with self._lock:
+            recent = sorted(self.stages[path]['recent']) if path in self.stages else []
+        return len(recent) >= MIN_REGRESSION_SAMPLES and seconds > factor * quantile_of_sorted(recent, 0.5)
+
+    def prometheus_text(self, prefix=METRIC_PREFIX):
+        """ Every stage in the Prometheus text exposition format: a histogram of all
+        observations and a summary of the rolling window. """
+
+        with self._lock:
+            stages = {path: (stage['count'], stage['sum'], list(stage['buckets']), sorted(stage['recent'])) for path, stage in self.stages.items()}
+        histogram, summary = prefix + '_stage_duration_seconds', prefix + '_stage_duration_recent_seconds'
+        lines = [
+            '# HELP ' + histogram + ' Duration of each traced stage.',
+            '# TYPE ' + histogram + ' histogram',
+        ]
+        for path, (count, total, buckets, recent) in sorted(stages.items()):
+            label = 'stage="' + escape_label(path) + '"'
+            for upper_bound, bucket_count in zip(self.buckets, buckets):
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(histogram, label, repr(float(upper_bound)), bucket_count))
+            lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(histogram, label, count))
+            lines.append('{}_sum{{{}}} {}'.format(histogram, label, repr(total)))
+            lines.append('{}_count{{{}}} {}'.format(histogram, label, count))
+        lines += [
+            '# HELP ' + summary + ' Duration of each traced stage over its last ' + str(self.window) + ' runs.',
+            '# TYPE ' + summary + ' summary',
+        ]
+        for path, (count, total, buckets, recent) in sorted(stages.items()):
+            label = 'stage="' + escape_label(path) + '"'
+            for quantile in QUANTILES:
+                lines.append('{}{{{},quantile="{}"}} {}'.format(summary, label, quantile, repr(quantile_of_sorted(recent, quantile))))
+            lines.append('{}_sum{{{}}} {}'.format(summary, label, repr(sum(recent))))
+            lines.append('{}_count{{{}}} {}'.format(summary, label, len(recent)))
+        return '\n'.join(lines) + '\n'
+
+
+def quantile_of_sorted(values, quantile):
+    """ Nearest rank quantile of an already sorted list. """
+
+    return values[min(len(values) - 1, max(0, int(round(quantile * len(values) + 0.5)) - 1))]
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# TRACER
+class Tracer:
+    """ Starts traces (root spans) and their nested spans. The active span lives in a
+    context variable, so it follows the code into asyncio tasks and into thread pool
+    work submitted through in_current_context. When a trace ends its span tree and
+    the rolling stage latencies are appended to "jsonl_path". """
+
+    def __init__(self, metrics=None, jsonl_path=None):
+        self.metrics = StageMetrics() if metrics is None else metrics
+        self.jsonl_path = config_params['metrics_jsonl_path'] if jsonl_path is None else jsonl_path
+        self._file_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def trace(self, name, **attributes):
+        """ Root span of one run. Nested inside another span it acts as a plain span. """
+
+        with self._span(name, _current_span.get(), attributes) as span:
+            yield span
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        """ Child of the active span, or a no-op when no trace is active. """
+
+        parent = _current_span.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+        with self._span(name, parent, attributes) as span:
+            yield span
+
+    @contextlib.contextmanager
+    def _span(self, name, parent, attributes):
+        span = Span(name, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.set(error=str(e))
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            _current_span.reset(token)
+            self._finish(span)
+
+    def record(self, name, duration, **attributes):
+        """ Adds an already timed stage (e.g. a model scored in a worker process) as a
+        child of the active span. """
+
+        parent = _current_span.get()
+        if parent is None:
+            return
+        span = Span(name, parent, attributes)
+        span.duration = duration
+        span.status = attributes.get('status', 'ok')
+        self._finish(span)
+
+    def _finish(self, span):
+        if span.status == 'ok' and self.metrics.is_regression(span.path, span.duration):
+            print('Stage {} took {:.3f}s, over {}x its rolling median.'.format(span.path, span.duration, config_params['stage_regression_factor']))
+        self.metrics.observe(span.path, span.duration)
+        if span.parent is not None:
+            span.parent._add_child(span)
+        else:
+            self.write_jsonl(span)
+
+    def write_jsonl(self, root):
+        if not self.jsonl_path:
+            return
+        records = [
+            dict({'type': 'trace'}, **root.to_dict()),
+            {'type': 'metrics', 'time': datetime.datetime.utcnow().isoformat(), 'stages': self.metrics.snapshot()},
+        ]
+        with self._file_lock, open(self.jsonl_path, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + '\n')
+
+
+# MODULE LEVEL HELPERS
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """ Returns the process wide tracer, creating it on first use. """
+
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def trace(name, **attributes):
+    return get_tracer().trace(name, **attributes)
+
+
+def span(name, **attributes):
+    return get_tracer().span(name, **attributes)
+
+
+def record(name, duration, **attributes):
+    get_tracer().record(name, duration, **attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def count(key, amount=1):
+    """ Adds "amount" to the "key" attribute of the active span and of every span
+    enclosing it, e.g. HTTP calls, so each stage reports its own and its children's. """
+
+    span = _current_span.get()
+    while span is not None:
+        span.add(key, amount)
+        span = span.parent
+
+
+def in_current_context(function):
+    """ Binds "function" to a copy of the caller's context, so work it does in a pool
+    thread is traced under the caller's active span. Copy once per submission: a
+    context can only be entered by one thread at a time. """
+
+    return functools.partial(contextvars.copy_context().run, function)
+
+
+def print_summary(root):
+    """ Prints the duration and attributes of every span under "root". """
+
+    def visit(span, depth):
+        attributes = ', '.join('{}={}'.format(key, value) for key, value in span.attributes.items())
+        print('{}{}: {:.3f}s{}'.format('  ' * depth, span.name, span.duration or 0.0, ' (' + attributes + ')' if attributes else ''))
+        for child in span.children:
+            visit(child, depth + 1)
+
+    visit(root, 0)
+
+
+# PROMETHEUS ENDPOINT
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = get_tracer().metrics.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):    # keep scrapes out of the bot output
+        pass
+
+
+def start_metrics_server(port=None, host=None):
+    """ Serves /metrics for Prometheus from a daemon thread. Returns the server, or
+    None when metrics_port is not set. """
+
+    port = config_params['metrics_port'] if port is None else port
+    if port is None:
+        return None
+    server = ThreadingHTTPServer((config_params['metrics_host'] if host is None else host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    print('Serving metrics on http://{}:{}/metrics'.format(*server.server_address[:2]))
+    return server